@@ -0,0 +1,56 @@
+"""Catalogue build throughput: the bulk engine's batched generation against one grid at a time.
+
+Usage: python3 benchmarks/bench_grid_bulk.py [--seeds 400] [--engines phased bulk] [--batch 1 8 64 256]
+
+Every run builds the packed records of a catalogue (every start space for
+--seeds seeds) in one process. The second table times the bulk engine
+alone at different seeds-per-call batch sizes: a single board per call
+pays NumPy's per-call overhead on every grid, so throughput only overtakes
+the per-grid engines once boards are generated together.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "scripts"))
+
+import grid_catalogue  # noqa: E402
+from grid_bulk import pack_grids  # noqa: E402
+from grid_generator import ENGINES  # noqa: E402
+
+
+def records_per_sec(engine, seeds):
+    began = time.perf_counter()
+    count = sum(1 for _ in grid_catalogue.generate_records(0, seeds, engine))
+    return count / (time.perf_counter() - began)
+
+
+def bulk_per_sec(seeds, batch):
+    starts = list(range(grid_catalogue.START_SPACES))
+    began = time.perf_counter()
+    for first in range(0, seeds, batch):
+        count = min(batch, seeds - first)
+        pack_grids([seed for seed in range(first, first + count) for _ in starts], starts * count)
+    return seeds * len(starts) / (time.perf_counter() - began)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seeds", type=int, default=400, help="seeds per run (25 grids each)")
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=sorted(ENGINES))
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 8, 64, 256], help="bulk seeds per call")
+    args = parser.parse_args()
+
+    pack_grids([0], [0])  # Warm up NumPy and the bulk tables
+    print(f"{'engine':<14}{'grids/s':>10}")
+    for engine in args.engines:
+        print(f"{engine:<14}{records_per_sec(engine, args.seeds):>10.0f}", flush=True)
+
+    print(f"\n{'bulk batch':<14}{'grids/s':>10}")
+    for batch in args.batch:
+        print(f"{batch:<14}{bulk_per_sec(args.seeds, batch):>10.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
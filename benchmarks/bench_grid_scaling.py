@@ -0,0 +1,47 @@
+"""Grid generation cost as the board grows from 5x5 to 50x50, per engine.
+
+Usage: python3 benchmarks/bench_grid_scaling.py [--sizes 5 10 20 30 40 50] [--grids 20]
+
+us/space staying roughly flat down a column means generation cost grows
+linearly with the number of spaces.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "scripts"))
+
+from grid_generator import ENGINES, create_grid  # noqa: E402
+from grid_geometry import get_geometry  # noqa: E402
+
+
+def bench_size(side, engine, grids):
+    spaces = side * side
+    began = time.perf_counter()
+    for seed in range(grids):
+        create_grid((seed * 7919) % spaces, engine, seed=seed, rows=side)
+    return (time.perf_counter() - began) / grids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 20, 30, 40, 50])
+    parser.add_argument("--grids", type=int, default=20, help="grids per size and engine")
+    args = parser.parse_args()
+
+    engines = sorted(ENGINES)
+    print(f"{'board':>7}{'spaces':>8}{'geometry ms':>13}" + "".join(f"{e + ' ms':>18}{'us/space':>10}" for e in engines))
+    for side in args.sizes:
+        began = time.perf_counter()
+        get_geometry(side)  # Built once per size and cached, so it is timed on its own
+        geometry_ms = 1000 * (time.perf_counter() - began)
+        row = f"{f'{side}x{side}':>7}{side * side:>8}{geometry_ms:>13.1f}"
+        for engine in engines:
+            seconds = bench_size(side, engine, args.grids)
+            row += f"{1000 * seconds:>18.2f}{1e6 * seconds / (side * side):>10.1f}"
+        print(row, flush=True)
+
+
+if __name__ == "__main__":
+    main()
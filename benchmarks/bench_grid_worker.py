@@ -0,0 +1,52 @@
+"""Rooms/sec: one python3 spawn per grid vs. the resident `grid_generator.py serve` worker.
+
+Usage: python3 benchmarks/bench_grid_worker.py [--rooms 200]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "scripts", "grid_generator.py")
+
+
+def bench_spawn(rooms):
+    start = time.perf_counter()
+    for i in range(rooms):
+        result = subprocess.run([sys.executable, SCRIPT, str(i % 25)], capture_output=True, check=True)
+        json.loads(result.stdout)
+    return time.perf_counter() - start
+
+
+def bench_worker(rooms):
+    start = time.perf_counter()
+    worker = subprocess.Popen([sys.executable, SCRIPT, "serve"], stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, text=True, bufsize=1)
+    # One request at a time, like the server handling room creations back to back
+    for i in range(rooms):
+        worker.stdin.write(json.dumps({"id": i, "start": i % 25}) + "\n")
+        worker.stdin.flush()
+        response = json.loads(worker.stdout.readline())
+        if "grid" not in response:
+            raise RuntimeError(response.get("error"))
+    worker.stdin.close()
+    worker.wait()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=200)
+    args = parser.parse_args()
+
+    results = [("spawn per grid", bench_spawn(args.rooms)), ("resident worker", bench_worker(args.rooms))]
+    baseline = results[0][1]
+    print(f"{'path':<18}{'seconds':>10}{'rooms/sec':>12}{'speedup':>10}")
+    for name, elapsed in results:
+        print(f"{name:<18}{elapsed:>10.3f}{args.rooms / elapsed:>12.1f}{baseline / elapsed:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Bytes moved and wall time per map render: base64 inside the JSON response vs. raw binary frames vs. a file.
+
+Usage: python3 benchmarks/bench_map_output.py [--renders 30]
+
+Every run re-renders one board with moving players through a
+`map_generator.py serve` worker whose PNG cache is disabled, so each job
+encodes a fresh image. "pipe bytes" is what crosses the worker's stdout;
+"http bytes" is the body /api/map-image would send (a JSON data URI for
+base64, the image itself otherwise).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "scripts")
+MAP_SCRIPT = os.path.join(SCRIPTS, "map_generator.py")
+
+sys.path.insert(0, SCRIPTS)
+
+from grid_generator import create_grid  # noqa: E402
+
+
+def jobs(renders, options):
+    grid = create_grid(12, seed=0)["spaces"]
+    return [
+        {"key": "room", "grid": grid, "players": [{"name": "Alice", "position": i % 25}, {"name": "Bob", "position": i // 25}],
+         **options}
+        for i in range(renders)
+    ]
+
+
+def bench(run_jobs):
+    worker = subprocess.Popen([sys.executable, MAP_SCRIPT, "serve", "--image-cache-mb", "0"],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    latencies, pipe_bytes, http_bytes = [], [], []
+    for i, job in enumerate(run_jobs):
+        sent = time.perf_counter()
+        worker.stdin.write((json.dumps({"id": i, **job}) + "\n").encode("utf-8"))
+        worker.stdin.flush()
+        line = worker.stdout.readline()
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        payload = worker.stdout.read(response["payload_bytes"]) if "payload_bytes" in response else b""
+        latencies.append(time.perf_counter() - sent)
+        pipe_bytes.append(len(line) + len(payload))
+        if "image" in response:
+            http_bytes.append(len(json.dumps({"image": f"data:{response['content_type']};base64,{response['image']}"})))
+        elif "path" in response:
+            http_bytes.append(response["bytes"])
+        else:
+            http_bytes.append(len(payload))
+    worker.stdin.close()
+    worker.wait()
+    # The first job draws the board; report the steady state after it
+    return latencies[1:], pipe_bytes[1:], http_bytes[1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [
+            ("base64 in JSON", {}),
+            ("binary png", {"encoding": "binary"}),
+            ("binary webp", {"encoding": "binary", "format": "webp"}),
+            ("file png", {"out": os.path.join(tmp, "map.png")}),
+        ]
+        print(f"{'output':<16}{'ms/render':>11}{'pipe bytes':>13}{'http bytes':>13}")
+        for name, options in runs:
+            latencies, pipe_bytes, http_bytes = bench(jobs(args.renders + 1, options))
+            print(f"{name:<16}{1000 * sum(latencies) / len(latencies):>11.1f}"
+                  f"{sum(pipe_bytes) // len(pipe_bytes):>13}{sum(http_bytes) // len(http_bytes):>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Replay cost as games get longer: time, output size and peak memory for a streamed GIF.
+
+Usage: python3 benchmarks/bench_map_replay.py [--frames 10 100 500] [--backend pillow]
+
+Each run animates random walks of three players on one seeded board,
+writing into a sink that only counts bytes. "peak KiB" is the traced
+Python heap (tracemalloc) during the replay; it should stay flat as the
+number of frames grows, since frames are drawn and encoded one at a time.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "scripts"))
+
+from grid_generator import create_grid  # noqa: E402
+from map_generator import board_class  # noqa: E402
+from map_replay import write_replay  # noqa: E402
+
+
+class CountingSink:
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+
+    def flush(self):
+        pass
+
+
+def random_walk(spaces, frames, seed=0):
+    rng = random.Random(seed)
+    names = ["Alice", "Bob", "Cara"]
+    positions = [12, 12, 12]
+    for step in range(frames):
+        mover = step % len(names)
+        positions[mover] = rng.choice(spaces[positions[mover]]["connections"])
+        yield [{"name": name, "position": position} for name, position in zip(names, positions)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--backend", choices=["pillow", "matplotlib"], default="pillow")
+    args = parser.parse_args()
+
+    spaces = create_grid(12, seed=0)["spaces"]
+    board = board_class(args.backend)(spaces)
+    write_replay(board, random_walk(spaces, 2), CountingSink())  # Warm up imports and fonts
+
+    print(f"{'frames':>8}{'seconds':>10}{'ms/frame':>10}{'KiB out':>10}{'peak KiB':>10}")
+    for frames in args.frames:
+        sink = CountingSink()
+        tracemalloc.start()
+        began = time.perf_counter()
+        write_replay(board, random_walk(spaces, frames), sink)
+        elapsed = time.perf_counter() - began
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{frames:>8}{elapsed:>10.2f}{1000 * elapsed / frames:>10.1f}{sink.bytes // 1024:>10}{peak // 1024:>10}",
+              flush=True)
+    board.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Map drawing cost as the board grows: time to draw a new board and to render players on it.
+
+Usage: python3 benchmarks/bench_map_scaling.py [--sizes 5 10 20 30] [--boards 3] [--backend matplotlib]
+
+"draw ms" is one new board (every connection, curve and space); "render ms"
+is one render_image() on that board. ms/edge shows how drawing cost grows
+with the number of connections.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "scripts"))
+
+from grid_generator import create_grid  # noqa: E402
+from map_generator import BACKENDS, board_class, resolve_backend  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 20, 30])
+    parser.add_argument("--boards", type=int, default=3, help="boards drawn per size; the fastest is reported")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="matplotlib")
+    args = parser.parse_args()
+
+    board_type = board_class(args.backend)
+    _, fmt = resolve_backend(args.backend)
+
+    players = [{"name": "Alice", "position": 0}, {"name": "Bob", "position": 1}]
+    print(f"{'board':>7}{'edges':>8}{'draw ms':>10}{'ms/edge':>10}{'render ms':>11}")
+    for side in args.sizes:
+        draws, renders = [], []
+        for seed in range(args.boards):
+            grid = create_grid(0, "constructive", seed=seed, rows=side)
+            began = time.perf_counter()
+            board = board_type(grid["spaces"], side, side)
+            draws.append(time.perf_counter() - began)
+            began = time.perf_counter()
+            board.render_image(players, fmt)
+            renders.append(time.perf_counter() - began)
+            board.close()
+        edges = sum(len(space["connections"]) for space in grid["spaces"]) // 2
+        print(f"{f'{side}x{side}':>7}{edges:>8}{1000 * min(draws):>10.0f}{1000 * min(draws) / edges:>10.2f}"
+              f"{1000 * min(renders):>11.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
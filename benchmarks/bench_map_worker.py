@@ -0,0 +1,98 @@
+"""Map render latency: one python3 spawn per image (the old /api/map-image path) vs. the resident `map_generator.py serve` worker.
+
+Usage: python3 benchmarks/bench_map_worker.py [--renders 30]
+
+"new board" renders a different grid every time; "same board" re-renders
+one room's grid with moving players, so the worker reuses its drawn board;
+"same image" asks for the same grid and positions again, which the worker
+answers from its PNG cache.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "scripts")
+MAP_SCRIPT = os.path.join(SCRIPTS, "map_generator.py")
+
+sys.path.insert(0, SCRIPTS)
+
+from grid_generator import create_grid  # noqa: E402
+
+
+def sample_jobs(renders):
+    players = [{"name": "Alice", "position": 3}, {"name": "Bob", "position": 17}, {"name": "Cara", "position": 21}]
+    return [{"grid": create_grid(i % 25, seed=i)["spaces"], "players": players} for i in range(renders)]
+
+
+def same_board_jobs(renders):
+    grid = create_grid(12, seed=0)["spaces"]
+    return [
+        {"key": "room", "grid": grid, "players": [{"name": "Alice", "position": i % 25}, {"name": "Bob", "position": (i * 7) % 25}]}
+        for i in range(renders)
+    ]
+
+
+def same_image_jobs(renders):
+    grid = create_grid(12, seed=0)["spaces"]
+    return [{"key": "room", "grid": grid, "players": [{"name": "Alice", "position": 3}]} for _ in range(renders)]
+
+
+def bench_spawn(jobs):
+    latencies = []
+    for job in jobs:
+        began = time.perf_counter()
+        subprocess.run([sys.executable, MAP_SCRIPT, json.dumps(job["grid"]), json.dumps(job["players"])],
+                       capture_output=True, check=True)
+        latencies.append(time.perf_counter() - began)
+    return latencies
+
+
+def bench_worker(jobs):
+    began = time.perf_counter()
+    worker = subprocess.Popen([sys.executable, MAP_SCRIPT, "serve"], stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, text=True, bufsize=1)
+    latencies = []
+    for i, job in enumerate(jobs):
+        sent = time.perf_counter()
+        worker.stdin.write(json.dumps({"id": i, **job}) + "\n")
+        worker.stdin.flush()
+        response = json.loads(worker.stdout.readline())
+        if "image" not in response:
+            raise RuntimeError(response.get("error"))
+        # The first job also waits for the worker to start and import matplotlib
+        latencies.append(time.perf_counter() - (began if i == 0 else sent))
+    worker.stdin.close()
+    worker.wait()
+    return latencies
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=30)
+    args = parser.parse_args()
+
+    jobs = sample_jobs(args.renders)
+    runs = [
+        ("spawn per render", bench_spawn, jobs),
+        ("worker, new board", bench_worker, jobs),
+        ("worker, same board", bench_worker, same_board_jobs(args.renders)),
+        ("worker, same image", bench_worker, same_image_jobs(args.renders)),
+    ]
+    print(f"{'path':<20}{'first ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'renders/sec':>13}")
+    for name, bench, run_jobs in runs:
+        latencies = bench(run_jobs)
+        steady = latencies[1:] or latencies
+        print(f"{name:<20}{1000 * latencies[0]:>10.0f}{1000 * percentile(steady, 0.5):>10.0f}"
+              f"{1000 * percentile(steady, 0.99):>10.0f}{len(latencies) / sum(latencies):>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Attempt-count, repair/restart and latency distribution of each grid generation engine.
+
+Usage: python3 benchmarks/grid_attempts_report.py [--grids 2000]
+"""
+import argparse
+import functools
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "scripts"))
+
+from grid_generator import ENGINES, create_grid_phased  # noqa: E402
+
+VARIANTS = [
+    ("phased, restart only", functools.partial(create_grid_phased, repair=False)),
+    ("phased", ENGINES["phased"]),
+    ("constructive", ENGINES["constructive"]),
+]
+
+ATTEMPT_BUCKETS = [(1, 1), (2, 2), (3, 5), (6, 10), (11, 50), (51, 200)]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_engine(generate, grids):
+    attempts = Counter()
+    edits = Counter()
+    latencies = []
+    failures = 0
+    for i in range(grids):
+        stats = {}
+        began = time.perf_counter()
+        try:
+            generate(i % 25, stats)
+        except Exception:
+            failures += 1
+            continue
+        latencies.append(time.perf_counter() - began)
+        attempts[stats["attempts"]] += 1
+        edits["repairs"] += stats.get("repairs", 0)
+        edits["restarts"] += stats.get("restarts", 0)
+    return attempts, edits, latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grids", type=int, default=2000)
+    args = parser.parse_args()
+
+    for name, generate in VARIANTS:
+        attempts, edits, latencies, failures = run_engine(generate, args.grids)
+        print(f"== {name} ({args.grids} grids, {failures} failed)")
+        for low, high in ATTEMPT_BUCKETS:
+            count = sum(n for a, n in attempts.items() if low <= a <= high)
+            label = str(low) if low == high else f"{low}-{high}"
+            print(f"  attempts {label:>7}: {count:6d} ({100 * count / args.grids:5.1f}%)")
+        if latencies:
+            print(f"  mean attempts {sum(a * n for a, n in attempts.items()) / len(latencies):.2f}, "
+                  f"max {max(attempts)}; repairs {edits['repairs']}, full restarts {edits['restarts']}")
+            print(f"  latency ms p50 {1000 * percentile(latencies, 0.5):.2f}  "
+                  f"p99 {1000 * percentile(latencies, 0.99):.2f}  max {1000 * max(latencies):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,788 @@
+"""Headless load generator: bot-played rooms against a local stand-in for server.js or a running server.
+
+Usage: python3 benchmarks/load_sim.py [--rooms 200] [--concurrency 50] [--target local|server] [--url URL]
+
+Every room is three bots: one creates it, two join, all three fetch the
+grid, then they take turns moving (toward the Crown along the grid's
+precomputed next hops most of the time, otherwise at random) and sending
+the whole state as an update, the way the browser client does. Every
+--map-every moves the player who just moved fetches the map image, and at
+the end all three do, each sending the ETag of the last image it holds.
+Rooms run concurrently on one asyncio loop, --concurrency at a time.
+
+Targets:
+    local   an in-process stand-in for server.js's room bookkeeping that
+            calls the Python side the same way the server does:
+            --grid worker and --map worker talk NDJSON to one resident
+            grid_generator.py / map_generator.py serve process (today's
+            server), --grid spawn and --map spawn start a python3 process
+            per request (the server before the resident workers). Socket
+            fan-out is not modelled
+    server  a running server (node server.js) at --url, over Socket.IO's
+            HTTP long-polling transport and plain HTTP for /api/grid and
+            /api/map-image; the grid worker's totals from /api/grid-stats
+            are included in the -o output
+
+The report has per-endpoint latency percentiles, error counts and bytes
+per response, overall rooms/s and requests/s, and (local target) the CPU
+time the simulator and the Python workers spent per room. An update's
+latency is until the state broadcast comes back to the sender on the
+server target, and the stand-in's bookkeeping on the local one.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+import urllib.parse
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "scripts")
+NAMES = ["Alice", "Bob", "Cara"]
+CROWN_GOLD = 5  # Gold a player needs on the Crown to win, as in gameplay.js
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(ordered) - 1, int(round(q * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class Sample:
+    def __init__(self):
+        self.bytes = 0
+        self.status = None
+
+
+class LoadStats:
+    """Latency, bytes and errors per endpoint."""
+
+    def __init__(self):
+        self.seconds = {}
+        self.bytes = {}
+        self.errors = {}
+        self.statuses = {}
+
+    def measure(self, endpoint):
+        return _Measure(self, endpoint)
+
+    def add(self, endpoint, seconds, sample=None, error=None):
+        if error is not None:
+            self.errors.setdefault(endpoint, {})
+            name = type(error).__name__
+            self.errors[endpoint][name] = self.errors[endpoint].get(name, 0) + 1
+            return
+        self.seconds.setdefault(endpoint, []).append(seconds)
+        self.bytes[endpoint] = self.bytes.get(endpoint, 0) + (sample.bytes if sample else 0)
+        if sample is not None and sample.status is not None:
+            counts = self.statuses.setdefault(endpoint, {})
+            counts[sample.status] = counts.get(sample.status, 0) + 1
+
+    def summary(self, elapsed):
+        results = {}
+        for endpoint in sorted(set(self.seconds) | set(self.errors)):
+            ordered = sorted(self.seconds.get(endpoint, []))
+            errors = sum(self.errors.get(endpoint, {}).values())
+            result = {"n": len(ordered), "errors": errors, "per_sec": round(len(ordered) / elapsed, 1)}
+            if ordered:
+                result.update({
+                    "p50_ms": round(1e3 * percentile(ordered, 0.50), 2),
+                    "p90_ms": round(1e3 * percentile(ordered, 0.90), 2),
+                    "p99_ms": round(1e3 * percentile(ordered, 0.99), 2),
+                    "max_ms": round(1e3 * ordered[-1], 2),
+                    "mean_ms": round(1e3 * sum(ordered) / len(ordered), 2),
+                    "bytes_per_response": self.bytes[endpoint] // len(ordered),
+                })
+            if endpoint in self.statuses:
+                result["statuses"] = {str(status): n for status, n in sorted(self.statuses[endpoint].items())}
+            if errors:
+                result["error_types"] = self.errors[endpoint]
+            results[endpoint] = result
+        return results
+
+
+class _Measure:
+    def __init__(self, stats, endpoint):
+        self.stats = stats
+        self.endpoint = endpoint
+        self.sample = Sample()
+
+    def __enter__(self):
+        self.began = time.perf_counter()
+        return self.sample
+
+    def __exit__(self, kind, error, traceback):
+        self.stats.add(self.endpoint, time.perf_counter() - self.began, self.sample, error)
+        return False
+
+
+# Local stand-in ---------------------------------------------------------------------------------
+
+class WorkerPipe:
+    """asyncio counterpart of pythonWorker.js: one resident NDJSON worker, many requests in flight."""
+
+    def __init__(self, script, args):
+        self.command = [sys.executable, os.path.join(SCRIPTS, script), *args]
+        self.process = None
+        self.pending = {}
+        self.next_id = 1
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, limit=1 << 24)
+        self.reader = asyncio.create_task(self.read_responses())
+
+    async def read_responses(self):
+        stdout = self.process.stdout
+        while True:
+            line = await stdout.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            response = json.loads(line)
+            if isinstance(response.get("payload_bytes"), int):
+                response["payload"] = await stdout.readexactly(response["payload_bytes"])
+            future = self.pending.pop(response.get("id"), None)
+            if future is None or future.done():
+                continue
+            if response.get("error"):
+                future.set_exception(RuntimeError(response["error"]))
+            else:
+                future.set_result(response)
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError(f"{self.command[1]} exited"))
+        self.pending.clear()
+
+    async def request(self, payload):
+        request_id = self.next_id
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self.process.stdin.write(json.dumps({**payload, "id": request_id}).encode("utf-8") + b"\n")
+        await self.process.stdin.drain()
+        return await future
+
+    async def stop(self):
+        if self.process is None:
+            return
+        self.process.stdin.close()
+        await self.process.wait()
+        await self.reader
+
+
+async def run_script(args, stdin=None):
+    """stdout of one python3 process per request, as server.js ran the generators before the resident workers."""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, *args, stdin=asyncio.subprocess.PIPE if stdin is not None else None,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    stdout, stderr = await process.communicate(stdin)
+    if process.returncode != 0:
+        raise RuntimeError(stderr.decode("utf-8", "replace").strip() or f"exit code {process.returncode}")
+    return stdout
+
+
+class LocalServer:
+    """The rooms, state merges and generator calls of server.js, without HTTP or Socket.IO."""
+
+    def __init__(self, grid_mode="worker", map_mode="worker", engine="phased", backend="matplotlib"):
+        self.grid_mode = grid_mode
+        self.map_mode = map_mode
+        self.engine = engine
+        self.backend = backend
+        self.rooms = {}
+        self.grid_worker = self.map_worker = None
+        self.next_room = 0
+
+    async def start(self):
+        if self.grid_mode == "worker":
+            self.grid_worker = WorkerPipe("grid_generator.py", ["serve", "--engine", self.engine,
+                                                                "--pool-depth", "4", "--timings"])
+            await self.grid_worker.start()
+        if self.map_mode == "worker":
+            self.map_worker = WorkerPipe("map_generator.py", ["serve", "--backend", self.backend])
+            await self.map_worker.start()
+
+    async def stop(self):
+        for worker in (self.grid_worker, self.map_worker):
+            if worker is not None:
+                await worker.stop()
+
+    async def grid_stats(self):
+        if self.grid_worker is None:
+            return None
+        return (await self.grid_worker.request({"op": "stats"}))["stats"]
+
+    async def generate_grid(self, start):
+        if self.grid_worker is not None:
+            return (await self.grid_worker.request({"start": start, "index": True}))["grid"]
+        stdout = await run_script([os.path.join(SCRIPTS, "grid_generator.py"), str(start),
+                                   "--engine", self.engine, "--index"])
+        return json.loads(stdout)
+
+    async def create(self, start, name):
+        self.next_room += 1
+        room_id = f"room{self.next_room}"
+        player_id = f"{room_id}-p0"
+        grid = await self.generate_grid(start)
+        player = {"id": player_id, "name": name, "gold": 1, "items": [], "position": start, "hasMoved": False}
+        self.rooms[room_id] = {
+            "grid": grid,
+            "history": [],
+            "state": {"players": [player], "currentPlayer": None, "round": 1, "turnOrder": [], "log": [],
+                      "memoryMode": False, "randomStartSpace": True, "startSpaceId": start, "traps": [],
+                      "goblins": [], "goldPiles": [], "gameOver": False, "extraShopBuys": {},
+                      "initComplete": False},
+        }
+        return room_id, player_id
+
+    def join(self, room_id, name, rng):
+        state = self.rooms[room_id]["state"]
+        if len(state["players"]) >= 3:
+            raise RuntimeError("Room is full")
+        player_id = f"{room_id}-p{len(state['players'])}"
+        state["players"].append({"id": player_id, "name": name, "gold": 1, "items": [],
+                                 "position": state["startSpaceId"], "hasMoved": False})
+        if len(state["players"]) == 3:
+            state["turnOrder"] = [p["id"] for p in state["players"]]
+            rng.shuffle(state["turnOrder"])
+            state["currentPlayer"] = state["turnOrder"][0]
+            state["initComplete"] = True
+            self.record_positions(self.rooms[room_id])
+        return player_id
+
+    def record_positions(self, room):
+        positions = [{"name": p["name"], "position": p["position"]} for p in room["state"]["players"]]
+        if not room["history"] or room["history"][-1] != positions:
+            room["history"].append(positions)
+
+    def update(self, room_id, new_state):
+        room = self.rooms[room_id]
+        by_id = {p["id"]: p for p in room["state"]["players"]}
+        players = [{**by_id.get(p["id"], {}), **p} for p in new_state.get("players", room["state"]["players"])]
+        room["state"] = {**room["state"], **new_state, "players": players}
+        if room["state"]["initComplete"]:
+            self.record_positions(room)
+        return json.dumps(room["state"])  # What io.to(roomId).emit('state', ...) serializes
+
+    async def map_image(self, room_id, etag):
+        """(status, body, etag) as /api/map-image answers them."""
+        room = self.rooms[room_id]
+        players = [{"name": p["name"], "position": p["position"]} for p in room["state"]["players"]]
+        if self.map_worker is None:
+            job = json.dumps({"grid": room["grid"]["spaces"], "players": players}).encode("utf-8")
+            body = await run_script([os.path.join(SCRIPTS, "map_generator.py"), "render", "-",
+                                     "--backend", self.backend], job)
+            return 200, body, None
+        response = await self.map_worker.request({"key": room_id, "grid": room["grid"]["spaces"], "players": players,
+                                                  "if_none_match": [etag] if etag else [], "encoding": "binary"})
+        if response.get("not_modified"):
+            return 304, b"", response["etag"]
+        return 200, response["payload"], response["etag"]
+
+    async def delete(self, room_id):
+        del self.rooms[room_id]
+        if self.map_worker is not None:
+            await self.map_worker.request({"op": "evict", "key": room_id})
+
+
+class LocalSession:
+    """One bot's connection to the stand-in."""
+
+    def __init__(self, server, stats, rng):
+        self.server = server
+        self.stats = stats
+        self.rng = rng
+        self.etag = None
+
+    async def connect(self):
+        pass
+
+    async def create(self, start, name):
+        with self.stats.measure("create"):
+            self.room_id, self.player_id = await self.server.create(start, name)
+        return self.room_id, self.player_id
+
+    async def join(self, room_id, name):
+        with self.stats.measure("join"):
+            self.room_id, self.player_id = room_id, self.server.join(room_id, name, self.rng)
+        return self.player_id
+
+    async def started(self):
+        state = self.server.rooms[self.room_id]["state"]
+        return state["turnOrder"], state["currentPlayer"]
+
+    async def grid(self, room_id):
+        with self.stats.measure("grid") as sample:
+            body = json.dumps(self.server.rooms[room_id]["grid"]).encode("utf-8")
+            sample.bytes = len(body)
+        return json.loads(body)
+
+    async def update(self, room_id, state):
+        with self.stats.measure("update") as sample:
+            sample.bytes = len(self.server.update(room_id, state))
+
+    async def map_image(self, room_id):
+        with self.stats.measure("map-image") as sample:
+            sample.status, body, self.etag = await self.server.map_image(room_id, self.etag)
+            sample.bytes = len(body)
+
+    async def game_over(self, room_id, reason):
+        self.server.rooms[room_id]["state"]["gameOver"] = True
+
+    async def leave(self, room_id):
+        room = self.server.rooms.get(room_id)
+        if room is None:
+            return
+        with self.stats.measure("leave"):
+            room["state"]["players"] = [p for p in room["state"]["players"] if p["id"] != self.player_id]
+            if not room["state"]["players"]:
+                await self.server.delete(room_id)
+
+    async def close(self):
+        pass
+
+
+# Running server -------------------------------------------------------------------------------
+
+def server_address(url):
+    """(host, port) of an http:// URL."""
+    parsed = urllib.parse.urlsplit(url)
+    return parsed.hostname or "localhost", parsed.port or 80
+
+
+async def http_request(host, port, method, path, body=None, headers=None):
+    """(status, headers, body) of one HTTP/1.1 request on its own connection."""
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 24)
+    try:
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {host}:{port}", "Connection: close"]
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b""))
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError(f"{method} {path}: connection closed without a response")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        if status in (204, 304) or method == "HEAD":
+            data = b""
+        elif "content-length" in response_headers:
+            data = await reader.readexactly(int(response_headers["content-length"]))
+        elif response_headers.get("transfer-encoding", "").lower() == "chunked":
+            data = bytearray()
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    break
+                data += await reader.readexactly(size)
+                await reader.readline()
+            data = bytes(data)
+        else:
+            data = await reader.read()
+        return status, response_headers, data
+    finally:
+        writer.close()
+
+
+class SocketIOClient:
+    """Minimal Socket.IO v4 client over Engine.IO v4 HTTP long-polling (no websocket upgrade, no binary events)."""
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sid = None
+        self.acks = {}
+        self.next_ack = 0
+        self.seen = {}
+        self.arrived = asyncio.Event()
+        self.poller = None
+
+    async def connect(self):
+        status, _, body = await http_request(self.host, self.port, "GET", "/socket.io/?EIO=4&transport=polling")
+        if status != 200 or not body.startswith(b"0"):
+            raise ConnectionError(f"Socket.IO handshake failed with status {status}")
+        self.sid = json.loads(body[1:])["sid"]
+        self.poller = asyncio.create_task(self.poll())
+        await self.send("40")
+        await self.wait_event("connect")
+
+    @property
+    def path(self):
+        return f"/socket.io/?EIO=4&transport=polling&sid={self.sid}"
+
+    async def send(self, packet):
+        status, _, body = await http_request(self.host, self.port, "POST", self.path, packet.encode("utf-8"),
+                                             {"Content-Type": "text/plain;charset=UTF-8"})
+        if status != 200:
+            raise ConnectionError(f"Socket.IO post failed with status {status}: {body[:200]!r}")
+
+    async def poll(self):
+        while True:
+            status, _, body = await http_request(self.host, self.port, "GET", self.path)
+            if status != 200:
+                self.dispatch("disconnect", status)
+                return
+            for packet in body.decode("utf-8").split("\x1e"):
+                if packet == "2":
+                    await self.send("3")
+                elif packet == "1":
+                    self.dispatch("disconnect", None)
+                    return
+                elif packet.startswith("4"):
+                    self.on_socket_packet(packet[1:])
+
+    def on_socket_packet(self, packet):
+        kind, rest = packet[:1], packet[1:]
+        if kind == "0":
+            self.dispatch("connect", json.loads(rest) if rest else None)
+        elif kind == "1":
+            self.dispatch("disconnect", None)
+        elif kind in ("2", "3"):
+            digits = len(rest) - len(rest.lstrip("0123456789"))
+            ack_id, data = (int(rest[:digits]) if digits else None), json.loads(rest[digits:])
+            if kind == "2":
+                self.dispatch(data[0], data[1] if len(data) > 1 else None)
+            else:
+                future = self.acks.pop(ack_id, None)
+                if future is not None and not future.done():
+                    future.set_result(data[0] if data else None)
+
+    def dispatch(self, event, data):
+        count = self.seen.get(event, (0, None))[0] + 1
+        self.seen[event] = (count, data)
+        self.arrived.set()
+        self.arrived = asyncio.Event()
+
+    def count(self, event):
+        return self.seen.get(event, (0, None))[0]
+
+    async def wait_event(self, event, after=0):
+        """Data of the event once more than `after` of it have arrived."""
+        async def arrival():
+            while True:
+                arrived = self.arrived
+                if self.count(event) > after:
+                    return self.seen[event][1]
+                await arrived.wait()
+        return await asyncio.wait_for(arrival(), self.timeout)
+
+    async def emit(self, event, data, ack=False):
+        if not ack:
+            await self.send("42" + json.dumps([event, data]))
+            return None
+        ack_id = self.next_ack
+        self.next_ack += 1
+        future = asyncio.get_running_loop().create_future()
+        self.acks[ack_id] = future
+        await self.send(f"42{ack_id}" + json.dumps([event, data]))
+        return await asyncio.wait_for(future, self.timeout)
+
+    async def close(self):
+        if self.sid is not None:
+            try:
+                await self.send("1")
+            except (ConnectionError, OSError):
+                pass
+        if self.poller is not None:
+            self.poller.cancel()
+            try:
+                await self.poller
+            except (asyncio.CancelledError, ConnectionError, OSError):
+                pass
+
+
+class ServerSession:
+    """One bot's connection to a running server, as a browser tab makes it."""
+
+    def __init__(self, url, stats, timeout):
+        self.host, self.port = server_address(url)
+        self.stats = stats
+        self.socket = SocketIOClient(self.host, self.port, timeout)
+        self.etag = None
+
+    async def connect(self):
+        with self.stats.measure("connect"):
+            await self.socket.connect()
+
+    async def create(self, start, name):
+        # The server picks the start space itself; randomStartSpace spreads rooms over all 25
+        with self.stats.measure("create"):
+            response = await self.socket.emit("create", {"memoryMode": False, "randomStartSpace": True,
+                                                         "name": name}, ack=True)
+        if response.get("error"):
+            raise RuntimeError(response["error"])
+        return response["roomId"], response["playerId"]
+
+    async def join(self, room_id, name):
+        with self.stats.measure("join"):
+            response = await self.socket.emit("join", {"roomId": room_id, "name": name}, ack=True)
+        if response.get("error"):
+            raise RuntimeError(response["error"])
+        return response["playerId"]
+
+    async def started(self):
+        started = await self.socket.wait_event("initComplete")
+        return started["turnOrder"], started["currentPlayer"]
+
+    async def get(self, endpoint, path, headers=None):
+        with self.stats.measure(endpoint) as sample:
+            sample.status, response_headers, body = await http_request(self.host, self.port, "GET", path,
+                                                                       headers=headers)
+            sample.bytes = len(body)
+            if sample.status >= 400:
+                raise RuntimeError(f"{path}: {sample.status} {body[:200]!r}")
+        return sample.status, response_headers, body
+
+    async def grid(self, room_id):
+        _, _, body = await self.get("grid", f"/api/grid?roomId={urllib.parse.quote(room_id)}")
+        return json.loads(body)
+
+    async def update(self, room_id, state):
+        seen = self.socket.count("state")
+        with self.stats.measure("update") as sample:
+            await self.socket.emit("update", {"roomId": room_id, "state": state})
+            sample.bytes = len(json.dumps(await self.socket.wait_event("state", seen)))
+
+    async def map_image(self, room_id):
+        headers = {"If-None-Match": f'"{self.etag}"'} if self.etag else None
+        status, response_headers, _ = await self.get("map-image", f"/api/map-image?roomId={urllib.parse.quote(room_id)}",
+                                                     headers)
+        if status == 200:
+            self.etag = response_headers.get("etag", "").strip('"') or None
+
+    async def game_over(self, room_id, reason):
+        await self.socket.emit("gameOver", {"roomId": room_id, "reason": reason})
+
+    async def leave(self, room_id):
+        with self.stats.measure("leave"):
+            await self.socket.emit("leaveRoom", {"roomId": room_id}, ack=True)
+
+    async def close(self):
+        await self.socket.close()
+
+
+# Bots -----------------------------------------------------------------------------------------
+
+def bot_move(grid, state, player, rng, smart):
+    """Move player one step like makeMove() and apply the space effects that do not need a wheel spin.
+
+    Returns True when the move wins the game.
+    """
+    spaces = grid["spaces"]
+    here = player["position"]
+    hops = grid.get("index", {}).get("nextHop")
+    options = hops[here] if hops and hops[here] and rng.random() < smart else spaces[here]["connections"]
+    if not options:
+        return False
+    player["position"] = rng.choice(options)
+    player["hasMoved"] = True
+    space_type = spaces[player["position"]]["type"]
+    if space_type in ("Start", "Good"):
+        player["gold"] += 1  # A Good space's wheel is most often gold; the bots skip the spin
+    elif space_type == "Bad":
+        player["gold"] = max(0, player["gold"] - 1)
+    elif space_type == "Teleport":
+        targets = grid.get("index", {}).get("teleportTargets")
+        linked = set(spaces[player["position"]]["connections"])
+        targets = targets[player["position"]] if targets else [
+            s["id"] for s in spaces if s["id"] != player["position"] and s["id"] not in linked]
+        if targets:
+            player["position"] = rng.choice(targets)
+    if spaces[player["position"]]["type"] == "Crown" and player["gold"] >= CROWN_GOLD:
+        player["gold"] -= CROWN_GOLD
+        state["gameOver"] = True
+        return True
+    return False
+
+
+def next_turn(state):
+    """Advance currentPlayer and the round like nextTurn() in gameplay.js."""
+    order = state["turnOrder"]
+    index = order.index(state["currentPlayer"])
+    if index == len(order) - 1:
+        state["round"] += 1
+    state["currentPlayer"] = order[(index + 1) % len(order)]
+    for player in state["players"]:
+        player["hasMoved"] = False
+
+
+async def play_room(sessions, stats, rng, args):
+    """Play one room to a win or --max-rounds with three connected sessions; returns the number of moves."""
+    began = time.perf_counter()
+    room_id, first_id = await sessions[0].create(rng.randrange(25), NAMES[0])
+    ids = [first_id]
+    for session, name in zip(sessions[1:], NAMES[1:]):
+        ids.append(await session.join(room_id, name))
+    turn_order, current = await sessions[0].started()
+    grids = await asyncio.gather(*(session.grid(room_id) for session in sessions))
+    grid = grids[0]
+
+    # Everyone starts on the Start space; on the server target the server picked it
+    start = next(space["id"] for space in grid["spaces"] if space["type"] == "Start")
+    players = [{"id": player_id, "name": name, "gold": 1, "items": [], "position": start, "hasMoved": False}
+               for player_id, name in zip(ids, NAMES)]
+    state = {"roomId": room_id, "players": players, "currentPlayer": current, "round": 1, "turnOrder": turn_order,
+             "log": [], "traps": [], "goblins": [], "goldPiles": [], "gameOver": False, "initComplete": True}
+
+    moves = 0
+    while state["round"] <= args.max_rounds:
+        index = ids.index(state["currentPlayer"])
+        session = sessions[index]
+        won = bot_move(grid, state, players[index], rng, args.smart)
+        moves += 1
+        await session.update(room_id, state)
+        if args.map_every and moves % args.map_every == 0:
+            await session.map_image(room_id)
+        if won:
+            await session.game_over(room_id, "Crown reached")
+            break
+        next_turn(state)
+        await session.update(room_id, state)
+        if args.think:
+            await asyncio.sleep(rng.expovariate(1 / args.think))
+
+    # Everyone looks at the end-of-game map
+    await asyncio.gather(*(session.map_image(room_id) for session in sessions))
+    for session in sessions:
+        await session.leave(room_id)
+    stats.add("game", time.perf_counter() - began)
+    return moves
+
+
+async def run_load(args, stats):
+    """Play args.rooms rooms, args.concurrency at a time; returns (completed, failed, moves, extra report)."""
+    server = None
+    if args.target == "local":
+        server = LocalServer(args.grid, args.map, args.engine, args.backend)
+        await server.start()
+
+    limit = asyncio.Semaphore(args.concurrency)
+    totals = {"completed": 0, "failed": 0, "moves": 0}
+    failures = {}
+
+    async def one_room(number):
+        rng = random.Random(args.seed * 1_000_003 + number)
+        async with limit:
+            if server is not None:
+                sessions = [LocalSession(server, stats, rng) for _ in NAMES]
+            else:
+                sessions = [ServerSession(args.url, stats, args.timeout) for _ in NAMES]
+            try:
+                for session in sessions:
+                    await session.connect()
+                moves = await play_room(sessions, stats, rng, args)
+                totals["moves"] += moves
+                totals["completed"] += 1
+            except Exception as e:  # One broken room should not stop the run
+                totals["failed"] += 1
+                reason = f"{type(e).__name__}: {e}"[:160]
+                failures[reason] = failures.get(reason, 0) + 1
+            finally:
+                for session in sessions:
+                    await session.close()
+
+    await asyncio.gather(*(one_room(number) for number in range(args.rooms)))
+
+    extra = {"failures": failures}
+    if server is not None:
+        extra["grid_stats"] = await server.grid_stats()
+        await server.stop()
+    else:
+        try:
+            status, _, body = await http_request(*server_address(args.url), "GET", "/api/grid-stats")
+            extra["grid_stats"] = json.loads(body) if status == 200 else None
+        except (OSError, ValueError):
+            extra["grid_stats"] = None
+    return totals, extra
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=["local", "server"], default="local")
+    parser.add_argument("--url", default="http://localhost:3000", help="server for --target server")
+    parser.add_argument("--rooms", type=int, default=200, help="rooms to play (three bots each)")
+    parser.add_argument("--concurrency", type=int, default=50, help="rooms in flight at once")
+    parser.add_argument("--max-rounds", type=int, default=30, help="end a game after this many rounds")
+    parser.add_argument("--map-every", type=int, default=6,
+                        help="fetch the map image after every N-th move (0: only at the end)")
+    parser.add_argument("--smart", type=float, default=0.7,
+                        help="chance a bot steps toward the Crown instead of moving at random")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds a bot waits between turns")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for a server reply")
+    parser.add_argument("--grid", choices=["worker", "spawn"], default="worker",
+                        help="local target: resident grid worker or one python3 process per room")
+    parser.add_argument("--map", choices=["worker", "spawn"], default="worker",
+                        help="local target: resident map worker or one python3 process per image")
+    parser.add_argument("--engine", default="phased", help="local target: grid engine (as server.js)")
+    parser.add_argument("--backend", default="matplotlib", help="local target: map backend (as server.js)")
+    parser.add_argument("--seed", type=int, default=0, help="seeds the bots' choices and start spaces")
+    parser.add_argument("-o", "--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    stats = LoadStats()
+    cpu_began = time.process_time()
+    began = time.perf_counter()
+    totals, extra = asyncio.run(run_load(args, stats))
+    elapsed = time.perf_counter() - began
+    cpu_self = time.process_time() - cpu_began
+    # Resident workers are waited for at shutdown, so their CPU time is in here too
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_children = children.ru_utime + children.ru_stime
+
+    results = stats.summary(elapsed)
+    print(f"{'endpoint':<12}{'n':>8}{'errors':>8}{'per s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}"
+          f"{'max ms':>9}{'bytes':>9}")
+    for endpoint, result in results.items():
+        if not result["n"]:
+            print(f"{endpoint:<12}{0:>8}{result['errors']:>8}")
+            continue
+        print(f"{endpoint:<12}{result['n']:>8}{result['errors']:>8}{result['per_sec']:>9.1f}{result['p50_ms']:>9.1f}"
+              f"{result['p90_ms']:>9.1f}{result['p99_ms']:>9.1f}{result['max_ms']:>9.1f}"
+              f"{result['bytes_per_response']:>9}")
+    requests = sum(result["n"] for endpoint, result in results.items() if endpoint != "game")
+    completed = totals["completed"]
+    print(f"\n{completed} rooms played, {totals['failed']} failed, {totals['moves']} moves in {elapsed:.1f}s: "
+          f"{completed / elapsed:.1f} rooms/s, {requests / elapsed:.1f} requests/s")
+    if args.target == "local":
+        per_room = 1e3 * (cpu_self + cpu_children) / max(completed, 1)
+        print(f"CPU: simulator {cpu_self:.1f}s, Python workers {cpu_children:.1f}s ({per_room:.1f} ms per room)")
+    for reason, count in sorted(extra["failures"].items(), key=lambda item: -item[1]):
+        print(f"  {count} x {reason}", file=sys.stderr)
+
+    if args.output:
+        run = {
+            "meta": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "options": vars(args),
+            },
+            "totals": {**totals, "seconds": round(elapsed, 3), "rooms_per_sec": round(completed / elapsed, 2),
+                       "requests_per_sec": round(requests / elapsed, 1)},
+            "cpu_seconds": {"simulator": round(cpu_self, 3),
+                            "workers": round(cpu_children, 3) if args.target == "local" else None},
+            "results": results,
+            **extra,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""Seeded benchmark suite for grid generation and map rendering, with JSON baselines and regression gates.
+
+Usage: python3 benchmarks/run.py [--quick] [--only grid map] [--save] [--check] [--baseline PATH]
+
+Cases (all seeded, no network):
+    grid/generate/<engine>            create_grid() latency over every start space
+    grid/generate/<engine>/start-NN   the same, per start space 0-24
+    grid/validate                     validate_grid() on generated grids
+    map/<backend>/first               import + draw + encode in a fresh process (one-shot CLI cost)
+    map/<backend>/cold                new board for a new grid, then one render, in a warm process
+    map/<backend>/warm                re-render of a cached board with moved players
+The map cases also record the encoded image size ("bytes") and the peak
+Python heap during one render ("peak_kb", from tracemalloc; memory held by
+C extensions such as Agg's pixel buffer is not included).
+
+--save writes the results to the baseline file; --check compares against
+it and exits 1 when a case's p50 or p99, image size or peak memory grew by
+more than its threshold (p99 is only gated on cases with at least 100
+samples). Baselines are only comparable on the machine and
+Python that produced them, so they are kept out of git.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "scripts")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "local.json")
+
+sys.path.insert(0, SCRIPTS)
+
+from grid_generator import ENGINES, BitGrid, create_grid, validate_grid  # noqa: E402
+from map_generator import BACKENDS, board_class, resolve_backend  # noqa: E402
+
+PLAYERS = ["Alice", "Bob", "Cara"]
+
+# Spawned for map/<backend>/first: times its own imports, one new board and one render
+FIRST_RENDER = """
+import json, sys, time
+began = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from map_generator import board_class
+board = board_class(sys.argv[2])(json.loads(sys.argv[3]))
+image = board.render_image(json.loads(sys.argv[4]), sys.argv[5])
+print(json.dumps({"seconds": time.perf_counter() - began}))
+"""
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(ordered) - 1, int(round(q * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(seconds, unit="us"):
+    scale = 1e6 if unit == "us" else 1e3
+    ordered = sorted(seconds)
+    return {
+        "unit": unit,
+        "n": len(ordered),
+        "min": round(scale * ordered[0], 2),
+        "p50": round(scale * percentile(ordered, 0.50), 2),
+        "p90": round(scale * percentile(ordered, 0.90), 2),
+        "p99": round(scale * percentile(ordered, 0.99), 2),
+        "mean": round(scale * sum(ordered) / len(ordered), 2),
+    }
+
+
+def players_at(step, count):
+    return [{"name": name, "position": (step * 7 + i * 11) % count} for i, name in enumerate(PLAYERS)]
+
+
+def bench_grids(results, per_start):
+    for engine in sorted(ENGINES):
+        create_grid(12, engine, seed=0)  # Warm up imports and the geometry cache
+        everything = []
+        for start in range(25):
+            gc.collect()
+            samples = []
+            for i in range(per_start):
+                seed = start * 100_003 + i
+                began = time.perf_counter()
+                create_grid(start, engine, seed=seed)
+                samples.append(time.perf_counter() - began)
+            results[f"grid/generate/{engine}/start-{start:02d}"] = summarize(samples)
+            everything += samples
+        results[f"grid/generate/{engine}"] = summarize(everything)
+
+    grids = []
+    for i in range(per_start * 4):
+        start = i % 25
+        spaces = create_grid(start, "phased", seed=i)["spaces"]
+        crown = next(space["id"] for space in spaces if space["type"] == "Crown")
+        grids.append((BitGrid.from_spaces(spaces), crown, start))
+    gc.collect()
+    samples = []
+    for grid, crown, start in grids:
+        began = time.perf_counter()
+        validate_grid(grid, crown, start)
+        samples.append(time.perf_counter() - began)
+    results["grid/validate"] = summarize(samples)
+
+
+def peak_kb(render):
+    """Peak traced Python heap, in KiB, while render() runs."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        render()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def bench_maps(results, backends, renders, first_runs):
+    grids = [create_grid(i % 25, seed=i)["spaces"] for i in range(renders + 1)]  # The server's phased engine
+    for backend in backends:
+        board_type = board_class(backend)
+        _, fmt = resolve_backend(backend)
+        board_type(grids[0]).close()  # Imports and font loading are map/<backend>/first's business
+
+        gc.collect()
+        samples, sizes = [], []
+        for step, grid in enumerate(grids[1:]):
+            began = time.perf_counter()
+            board = board_type(grid)
+            image = board.render_image(players_at(step, len(grid)), fmt)
+            samples.append(time.perf_counter() - began)
+            sizes.append(len(image))
+            board.close()
+        cold = summarize(samples, "ms")
+        cold["bytes"] = sum(sizes) // len(sizes)
+
+        def render_new_board():
+            new_board = board_type(grids[1])
+            new_board.render_image(players_at(0, 25), fmt)
+            new_board.close()
+        cold["peak_kb"] = peak_kb(render_new_board)
+        results[f"map/{backend}/cold"] = cold
+
+        board = board_type(grids[0])
+        board.render_image(players_at(0, 25), fmt)
+        gc.collect()
+        samples, sizes = [], []
+        for step in range(renders):
+            began = time.perf_counter()
+            image = board.render_image(players_at(step + 1, 25), fmt)
+            samples.append(time.perf_counter() - began)
+            sizes.append(len(image))
+        warm = summarize(samples, "ms")
+        warm["bytes"] = sum(sizes) // len(sizes)
+        warm["peak_kb"] = peak_kb(lambda: board.render_image(players_at(renders + 1, 25), fmt))
+        board.close()
+        results[f"map/{backend}/warm"] = warm
+
+        samples = []
+        for run in range(first_runs):
+            output = subprocess.run(
+                [sys.executable, "-c", FIRST_RENDER, SCRIPTS, backend, json.dumps(grids[run % len(grids)]),
+                 json.dumps(players_at(run, 25)), fmt],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            samples.append(json.loads(output)["seconds"])
+        results[f"map/{backend}/first"] = summarize(samples, "ms")
+
+
+def available_backends(names):
+    backends = []
+    for name in names:
+        try:
+            board_class(name)
+        except ImportError as e:
+            print(f"skipping map backend {name}: {e}", file=sys.stderr)
+        else:
+            backends.append(name)
+    return backends
+
+
+def compare(baseline, results, thresholds, min_delta):
+    """Rows of (case, metric, before, after, change, regressed) for every metric present in both runs."""
+    rows = []
+    for case, after in sorted(results.items()):
+        before = baseline.get(case)
+        if before is None:
+            continue
+        for metric, limit in thresholds.items():
+            if metric not in before or metric not in after or not before[metric]:
+                continue
+            if metric == "p99" and after["n"] < 100:
+                continue  # With under 100 samples p99 is just the slowest one
+            change = after[metric] / before[metric] - 1
+            # Latency gates also need an absolute slowdown, so microsecond jitter on tiny cases is not a failure
+            slack = min_delta.get(after.get("unit"), 0) if metric in ("p50", "p99") else 0
+            regressed = change > limit and after[metric] - before[metric] > slack
+            rows.append((case, metric, before[metric], after[metric], change, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="fewer samples, for a fast sanity check")
+    parser.add_argument("--only", nargs="+", choices=["grid", "map"], default=["grid", "map"])
+    parser.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), default=sorted(BACKENDS))
+    parser.add_argument("--per-start", type=int, help="grids per start space and engine (default 200, 40 with --quick)")
+    parser.add_argument("--renders", type=int, help="renders per map case (default 30, 8 with --quick)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file (default %(default)s)")
+    parser.add_argument("--save", action="store_true", help="write the results to the baseline file")
+    parser.add_argument("--check", action="store_true", help="compare with the baseline and exit 1 on a regression")
+    parser.add_argument("--p50-threshold", type=float, default=0.15, help="allowed p50 growth (default %(default)s)")
+    parser.add_argument("--p99-threshold", type=float, default=0.35, help="allowed p99 growth (default %(default)s)")
+    parser.add_argument("--bytes-threshold", type=float, default=0.05, help="allowed image size growth")
+    parser.add_argument("--memory-threshold", type=float, default=0.20, help="allowed peak memory growth")
+    parser.add_argument("-o", "--output", help="also write this run's results to this JSON file")
+    args = parser.parse_args()
+
+    per_start = args.per_start or (40 if args.quick else 200)
+    renders = args.renders or (8 if args.quick else 30)
+    first_runs = 2 if args.quick else 5
+
+    results = {}
+    began = time.perf_counter()
+    if "grid" in args.only:
+        bench_grids(results, per_start)
+    if "map" in args.only:
+        bench_maps(results, available_backends(args.backends), renders, first_runs)
+
+    print(f"{'case':<34}{'n':>6}{'p50':>10}{'p90':>10}{'p99':>10}{'mean':>10}  unit{'bytes':>10}{'peak KiB':>10}")
+    for case, result in results.items():
+        print(f"{case:<34}{result['n']:>6}{result['p50']:>10.1f}{result['p90']:>10.1f}{result['p99']:>10.1f}"
+              f"{result['mean']:>10.1f}  {result['unit']:<4}{result.get('bytes', ''):>10}{result.get('peak_kb', ''):>10}")
+    print(f"suite took {time.perf_counter() - began:.1f}s", file=sys.stderr)
+
+    run = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "system": platform.system(),
+            "cpus": os.cpu_count(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "quick": args.quick,
+            "per_start": per_start,
+            "renders": renders,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+
+    status = 0
+    if args.check:
+        try:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f"no baseline at {args.baseline}; create one with --save", file=sys.stderr)
+            return 2
+        for key in ("python", "machine", "cpus"):
+            if baseline["meta"].get(key) != run["meta"][key]:
+                print(f"warning: baseline {key} {baseline['meta'].get(key)} differs from {run['meta'][key]}",
+                      file=sys.stderr)
+        thresholds = {"p50": args.p50_threshold, "p99": args.p99_threshold,
+                      "bytes": args.bytes_threshold, "peak_kb": args.memory_threshold}
+        rows = compare(baseline["results"], results, thresholds, {"us": 5.0, "ms": 1.0})
+        regressions = [row for row in rows if row[5]]
+        print(f"\ncompared {len(rows)} metrics with {args.baseline}")
+        for case, metric, before, after, change, _ in regressions:
+            print(f"REGRESSION {case} {metric}: {before} -> {after} ({change:+.0%}, limit +{thresholds[metric]:.0%})")
+        if regressions:
+            status = 1
+        else:
+            print("no regressions")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+        print(f"saved baseline to {args.baseline}", file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
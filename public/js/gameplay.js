@@ -70,9 +70,9 @@ function checkSpaceEffects() {
         getSocket().emit('update', { roomId: state.roomId, state });
         return;
     } else if (space.type === 'Teleport') {
-        const nonAdj = grid.spaces.filter(s => !space.connections.includes(s.id) && s.id !== player.position);
-        if (nonAdj.length > 0) {
-            const target = nonAdj[Math.floor(Math.random() * nonAdj.length)];
+        const targets = teleportTargets(grid, player.position);
+        if (targets.length > 0) {
+            const target = grid.spaces[targets[Math.floor(Math.random() * targets.length)]];
             player.position = target.id;
             log(`${player.name} teleported to ${target.type}`);
             player.hasMoved = true;
@@ -295,19 +295,25 @@ function showBoard() {
 
     boardContainer.innerHTML = '<p>Generating map...</p>';
 
-    fetch(`/api/map-image?roomId=${encodeURIComponent(state.roomId)}`)
-        .then(res => res.json())
-        .then(data => {
-            const img = document.createElement('img');
-            img.src = data.image;
-            img.style.maxWidth = '600px';
-            img.style.borderRadius = '10px';
-            img.style.border = '2px solid #d4a017';
-            boardContainer.innerHTML = '';
-            boardContainer.appendChild(img);
-        })
-        .catch(err => {
-            console.error('Error loading map image:', err);
-            boardContainer.innerHTML = '<p>Error loading map image</p>';
-        });
+    // The endpoint answers with the image itself, so the browser caches and revalidates it by ETag
+    const img = document.createElement('img');
+    img.style.maxWidth = '600px';
+    img.style.borderRadius = '10px';
+    img.style.border = '2px solid #d4a017';
+    img.onload = () => {
+        boardContainer.innerHTML = '';
+        boardContainer.appendChild(img);
+        const replay = document.createElement('a');
+        replay.href = `/api/map-replay?roomId=${encodeURIComponent(state.roomId)}`;
+        replay.target = '_blank';
+        replay.textContent = 'Watch the replay';
+        replay.style.alignSelf = 'flex-end';
+        replay.style.marginLeft = '12px';
+        boardContainer.appendChild(replay);
+    };
+    img.onerror = () => {
+        console.error('Error loading map image');
+        boardContainer.innerHTML = '<p>Error loading map image</p>';
+    };
+    img.src = `/api/map-image?roomId=${encodeURIComponent(state.roomId)}`;
 }
\ No newline at end of file
@@ -30,15 +30,10 @@ function chaosSwap(player) {
 
 function crownCompass(player) {
     const grid = getGrid();
-    const crownId = grid.spaces.find(s => s.type === 'Crown').id;
-    const distances = bfsDistances(crownId, grid);
-    const currentDist = distances[player.position];
     const closerDirections = [];
-    grid.spaces[player.position].connections.forEach(conn => {
-        if (distances[conn] < currentDist) {
-            const dir = getDirection(player.position, conn);
-            if (dir) closerDirections.push(dir);
-        }
+    crownNextHops(grid, player.position).forEach(conn => {
+        const dir = getDirection(player.position, conn);
+        if (dir) closerDirections.push(dir);
     });
     if (closerDirections.length > 0) {
         log(`${player.name} used Crown Compass: Move ${closerDirections.join(' or ')} to get closer.`);
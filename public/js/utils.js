@@ -45,6 +45,25 @@ function bfsDistances(start, grid) {
     return distances;
 }
 
+// Grids from the server carry a precomputed index (grid_index.py); these read it and
+// only fall back to walking the graph for a grid that came without one.
+function teleportTargets(grid, spaceId) {
+    if (grid.index) {
+        return grid.index.teleportTargets[spaceId];
+    }
+    const connections = grid.spaces[spaceId].connections;
+    return grid.spaces.filter(s => !connections.includes(s.id) && s.id !== spaceId).map(s => s.id);
+}
+
+function crownNextHops(grid, spaceId) {
+    if (grid.index) {
+        return grid.index.nextHop[spaceId];
+    }
+    const crownId = grid.spaces.find(s => s.type === 'Crown').id;
+    const distances = bfsDistances(crownId, grid);
+    return grid.spaces[spaceId].connections.filter(conn => distances[conn] < distances[spaceId]);
+}
+
 function log(message) {
     const state = getState();
     state.log.push(message);
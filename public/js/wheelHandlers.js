@@ -129,10 +129,9 @@ function handleBadWheelResult(result) {
         getSocket().emit('update', { roomId: state.roomId, state });
         updateUI();
     } else if (result === 'Teleport') {
-        const currentSpace = grid.spaces[player.position];
-        const nonAdj = grid.spaces.filter(s => !currentSpace.connections.includes(s.id) && s.id !== player.position);
-        if (nonAdj.length > 0) {
-            const target = nonAdj[Math.floor(Math.random() * nonAdj.length)];
+        const targets = teleportTargets(grid, player.position);
+        if (targets.length > 0) {
+            const target = grid.spaces[targets[Math.floor(Math.random() * targets.length)]];
             player.position = target.id;
             log(`${player.name} spun Bad wheel: Teleported to ${target.type}`);
             player.hasMoved = true;
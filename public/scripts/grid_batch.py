@@ -0,0 +1,172 @@
+import json
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import time
+
+from grid_generator import board_geometry, create_grid, pack_grid, unpack_grid
+
+BATCH_MAGIC = b"BCQB"
+BATCH_VERSION = 1
+START_SPACES = 25
+FORMATS = ("ndjson", "binary")
+MASK64 = (1 << 64) - 1
+
+
+def _splitmix64(x):
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def grid_seed(seed, start_space_id):
+    """The seed a batch generates (seed, start space) from: splitmix64 of both, cut to 53 bits.
+
+    The engines seed one random.Random per grid, so the 25 start spaces of
+    one seed would otherwise share a stream and come out alike. Hashing the
+    pair gives every grid its own stream, the way grid_bulk keys its boards;
+    53 bits keep the seed exact as a JavaScript number.
+    """
+    return _splitmix64((seed & MASK64) ^ _splitmix64(start_space_id)) >> 11
+
+
+def grid_key(index, first_seed, start_space_id=None, spaces=START_SPACES):
+    """(grid seed, start space) of the index-th grid in a batch on a board with `spaces` spaces.
+
+    Without a fixed start space the batch walks every start space for each
+    seed in turn (seed-major); with one, every grid uses the next seed. The
+    grid seed is grid_seed(seed, start), which is what the grid records and
+    what `grid_generator.py <start> --seed` reproduces it from.
+    """
+    if start_space_id is None:
+        seed, start = first_seed + index // spaces, index % spaces
+    else:
+        seed, start = first_seed + index, start_space_id
+    return grid_seed(seed, start), start
+
+
+def encode_chunk(task):
+    """Generate grids [begin, end) of a batch and return them encoded, ready to write.
+
+    Runs in the pool workers; each chunk comes back as a single bytes object
+    so the parent only concatenates. With timings every grid's phase record
+    is written to stderr as a JSON line (see grid_timing).
+    """
+    begin, end, first_seed, start_space_id, engine, fmt, with_stats, rows, cols, timings = task
+    spaces = rows * (cols or rows)
+    recorder = None
+    if timings:
+        from grid_timing import GenerationRecorder
+        recorder = GenerationRecorder(emit=sys.stderr)
+    if engine == "bulk" and recorder is None:
+        return encode_bulk_chunk(task)
+    out = bytearray()
+    for index in range(begin, end):
+        seed, start = grid_key(index, first_seed, start_space_id, spaces)
+        stats = {} if with_stats else None
+        grid = create_grid(start, engine, stats=stats, seed=seed, rows=rows, cols=cols, recorder=recorder)
+        if fmt == "binary":
+            out += struct.pack("<Q", seed)
+            out += pack_grid(grid)
+        else:
+            if with_stats:
+                grid["stats"] = stats
+            out += json.dumps(grid, separators=(",", ":")).encode("utf-8")
+            out += b"\n"
+    return bytes(out)
+
+
+def encode_bulk_chunk(task):
+    """encode_chunk() for the bulk engine: the whole chunk is generated in one grid_bulk call."""
+    from grid_bulk import create_grids, pack_grids
+
+    begin, end, first_seed, start_space_id, engine, fmt, with_stats, rows, cols, timings = task
+    board_geometry(rows, cols, start_space_id)
+    spaces = rows * (cols or rows)
+    seeds, starts = zip(*(grid_key(index, first_seed, start_space_id, spaces) for index in range(begin, end)))
+    out = bytearray()
+    if fmt == "binary":
+        for seed, packed in zip(seeds, pack_grids(seeds, starts, rows, cols)):
+            out += struct.pack("<Q", seed)
+            out += packed
+        return bytes(out)
+    stats = [] if with_stats else None
+    for i, grid in enumerate(create_grids(seeds, starts, rows, cols, stats)):
+        if with_stats:
+            grid["stats"] = stats[i]
+        out += json.dumps(grid, separators=(",", ":")).encode("utf-8")
+        out += b"\n"
+    return bytes(out)
+
+
+def iter_chunks(count, first_seed=0, start_space_id=None, engine="phased", fmt="ndjson",
+                with_stats=False, workers=None, chunk_size=500, rows=5, cols=None, timings=False):
+    """Yield encoded chunks covering `count` grids, in batch order, generated across a process pool."""
+    tasks = [
+        (begin, min(begin + chunk_size, count), first_seed, start_space_id, engine, fmt, with_stats, rows, cols,
+         timings)
+        for begin in range(0, count, chunk_size)
+    ]
+    if workers == 1:
+        yield from map(encode_chunk, tasks)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(encode_chunk, tasks)
+
+
+def write_batch(out, count, first_seed=0, start_space_id=None, engine="phased", fmt="ndjson",
+                with_stats=False, workers=None, chunk_size=500, rows=5, cols=None, timings=False):
+    """Write `count` grids to the binary file object `out` and return a throughput report.
+
+    Binary output starts with magic, version and grid count, followed by a
+    uint64 seed and the packed grid (see pack_grid) per record; read it back
+    with read_batch. NDJSON output is one compact grid per line.
+    """
+    workers = workers or os.cpu_count() or 1
+    began = time.perf_counter()
+    if fmt == "binary":
+        out.write(BATCH_MAGIC + struct.pack("<BI", BATCH_VERSION, count))
+    for chunk in iter_chunks(count, first_seed, start_space_id, engine, fmt, with_stats, workers, chunk_size,
+                             rows, cols, timings):
+        out.write(chunk)
+    out.flush()
+    elapsed = time.perf_counter() - began
+    rate = count / elapsed if elapsed else None
+    return {
+        "grids": count,
+        "engine": engine,
+        "format": fmt,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "grids_per_sec": round(rate, 1) if rate else None,
+        "grids_per_sec_per_core": round(rate / workers, 1) if rate else None,
+    }
+
+
+def read_batch(path):
+    """Yield the grids of a batch file written in either format, each with its seed.
+
+    Records are decoded one at a time, NDJSON line by line and binary
+    batches from a memory map, so a large file is never held in memory.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(4)
+        if magic != BATCH_MAGIC:
+            f.seek(0)
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if len(data) < 9 or data[4] != BATCH_VERSION:
+                raise ValueError(f"{path} is not a version {BATCH_VERSION} grid batch")
+            (count,) = struct.unpack_from("<I", data, 5)
+            offset = 9
+            for _ in range(count):
+                (seed,) = struct.unpack_from("<Q", data, offset)
+                grid, offset = unpack_grid(data, offset + 8)
+                grid["seed"] = seed
+                yield grid
@@ -0,0 +1,314 @@
+"""Bulk engine: many boards per call, generated together as stacked NumPy arrays.
+
+create_grids(seeds, starts) builds one candidate board per (seed, start
+space) pair at once: adjacency as a (boards, spaces, spaces) bool array,
+degrees and per-direction flags beside it. The phased engine's rules run
+over all boards in lockstep: type assignment, phase 1's outside ring,
+phase 2's 5% non-adjacent links (unique direction at the target, degree
+cap), phase 3's 50% cardinal links, phase 4's diagonal removal and phase
+5's single Crown connector. Python only loops over the board's structure
+(spaces, quadrants, neighbour slots), never over boards. Validation is a
+batched BFS; boards that fail are thrown away and their pairs drawn again
+until every pair has a valid board, so nothing is repaired.
+
+Randomness is counter-based: every board has a 64-bit key derived from
+its seed and start space, and its n-th draw is a hash of (key, n). Draws
+happen in the same order for every board, so a board depends only on its
+own seed and start, never on which other boards share the batch;
+create_grid(start, "bulk", seed=s) is the same grid as the one a batch
+or catalogue build makes for (s, start). The grids follow the phased
+engine's rules but are not the phased engine's grids for the same seed.
+
+The arrays are dense, spaces x spaces per board, so the engine suits the
+5x5 game board and other small boards.
+"""
+import functools
+import random
+import struct
+
+import numpy as np
+
+from grid_generator import SPACE_TYPES, SPECIAL_TYPES_PER_25, pack_grid
+from grid_geometry import OPPOSITE_DIRECTIONS, ORDINAL_DIRECTIONS, get_geometry
+
+MAX_ROUNDS = 64  # Candidate boards drawn per pair before giving up, as the phased engine's max_attempts
+GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(x):
+    """splitmix64's finalizer over a uint64 array."""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class KeyedRandom:
+    """Uniform draws in [0, 1) for many boards at once; board k's n-th draw depends only on keys[k] and n."""
+
+    def __init__(self, keys):
+        self.keys = keys[:, None]
+        self.counter = 0
+
+    def random(self, width):
+        counters = np.arange(self.counter, self.counter + width, dtype=np.uint64)
+        self.counter += width
+        return (_mix(self.keys + counters * GOLDEN) >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+def seed_bits(seed):
+    """The 64 bits a board's key starts from: the first draw of random.Random(seed), as create_grid() seeds engines."""
+    return random.Random(seed).getrandbits(64)
+
+
+def board_keys(bits, starts, attempt=0):
+    """Key of each (seed bits, start space, attempt)."""
+    base = np.asarray(bits, dtype=np.uint64)
+    salt = np.asarray(starts, dtype=np.uint64) + np.uint64(attempt << 32)
+    return _mix(base ^ _mix(salt + GOLDEN))
+
+
+@functools.lru_cache(maxsize=None)
+def bulk_tables(rows, cols):
+    """Index arrays the phases need for one board shape, built once."""
+    geo = get_geometry(rows, cols)
+    count = geo.count
+    quadrants = {d: i for i, d in enumerate(ORDINAL_DIRECTIONS)}
+    direction = np.full((count, count), -1, dtype=np.int8)
+    quadrant_mask = np.zeros((count, 4, count), dtype=bool)
+    for a in range(count):
+        for d, i in quadrants.items():
+            quadrant_mask[a, i] = [bool(geo.quadrant_mask[a][d] >> b & 1) for b in range(count)]
+        for b in range(count):
+            d = geo.direction(a, b)
+            if d is not None:
+                direction[a, b] = quadrants[d]
+    ring = [(a, b) for a in geo.outside for b in geo.cardinal[a] if b in geo.outside]
+    return {
+        "geo": geo,
+        "direction": direction,
+        "quadrant_mask": quadrant_mask,
+        "ring": (np.array([a for a, _ in ring]), np.array([b for _, b in ring])),
+        "non_adjacent": [
+            [(quadrants[d], quadrants[OPPOSITE_DIRECTIONS[d]], np.array(geo.non_adjacent(s, d), dtype=np.intp))
+             for d in ORDINAL_DIRECTIONS if geo.non_adjacent(s, d)]
+            for s in range(count)
+        ],
+        "cardinal": [np.array(geo.cardinal[s], dtype=np.intp) for s in range(count)],
+        "inside_diagonal": [(s, np.array(geo.diagonal[s], dtype=np.intp)) for s in geo.inside],
+        "special": [SPACE_TYPES.index("Crown")] + [
+            SPACE_TYPES.index(t) for t, per_25 in SPECIAL_TYPES_PER_25 for _ in range(max(1, round(per_25 * count / 25)))
+        ],
+    }
+
+
+def build_boards(keys, starts, tables):
+    """One candidate board per key; returns (types, crown, adj, fell_back) arrays."""
+    geo = tables["geo"]
+    count = geo.count
+    boards = len(keys)
+    rng = KeyedRandom(keys)
+    every = np.arange(boards)
+
+    # Types: Start, then the special types on a random permutation of the other spaces
+    order = rng.random(count)
+    order[every, starts] = 2.0  # Never picked: draws are below 1
+    placed = np.argsort(order, axis=1)[:, :len(tables["special"])]
+    types = np.zeros((boards, count), dtype=np.int8)
+    types[every, starts] = SPACE_TYPES.index("Start")
+    types[every[:, None], placed] = tables["special"]
+    crown = placed[:, 0]
+
+    adj = np.zeros((boards, count, count), dtype=bool)
+    linked = np.zeros((boards, count, 4), dtype=bool)  # Any link in each ordinal direction
+
+    # Phase 1: the outside ring's cardinal links, skipping the Crown
+    ring_a, ring_b = tables["ring"]
+    adj[:, ring_a, ring_b] = (crown[:, None] != ring_a) & (crown[:, None] != ring_b)
+    degree = adj.sum(axis=2, dtype=np.int16)
+
+    # Phase 2: per space and quadrant, each open candidate links with 5% chance; the first success in
+    # the phased engine's random order wins, which is a uniform pick among the successes
+    for space_id, candidates_by_quadrant in enumerate(tables["non_adjacent"]):
+        source_open = (crown != space_id)
+        for quadrant, opposite, candidates in candidates_by_quadrant:
+            draws = rng.random(2 * len(candidates))
+            hit, pick = draws[:, :len(candidates)], draws[:, len(candidates):]
+            room = source_open & (degree[:, space_id] < 4)
+            ok = (room[:, None] & (degree[:, candidates] < 4) & ~linked[:, candidates, opposite]
+                  & (crown[:, None] != candidates) & (hit < 0.05))
+            chosen = np.flatnonzero(ok.any(axis=1))
+            if not len(chosen):
+                continue
+            target = candidates[np.where(ok[chosen], pick[chosen], -1.0).argmax(axis=1)]
+            adj[chosen, space_id, target] = adj[chosen, target, space_id] = True
+            degree[chosen, space_id] += 1
+            degree[chosen, target] += 1
+            linked[chosen, space_id, quadrant] = True
+            linked[chosen, target, opposite] = True
+
+    # Phase 3: cardinal neighbours in a random order per board, each linked with 50% chance while both have room
+    for space_id, neighbours in enumerate(tables["cardinal"]):
+        slots = np.argsort(rng.random(len(neighbours)), axis=1)
+        coins = rng.random(len(neighbours))
+        source_open = (crown != space_id)
+        for slot in range(len(neighbours)):
+            other = neighbours[slots[:, slot]]
+            ok = (source_open & (crown != other) & (degree[:, space_id] < 4) & (degree[every, other] < 4)
+                  & (coins[:, slot] < 0.5) & ~adj[every, space_id, other])
+            chosen = np.flatnonzero(ok)
+            other = other[chosen]
+            adj[chosen, space_id, other] = adj[chosen, other, space_id] = True
+            degree[chosen, space_id] += 1
+            degree[chosen, other] += 1
+
+    # Phase 4: inside spaces lose their diagonal links
+    for space_id, diagonal in tables["inside_diagonal"]:
+        drop = adj[:, space_id, diagonal] & (crown != space_id)[:, None]
+        adj[:, space_id, diagonal] &= ~drop
+        adj[:, diagonal, space_id] &= ~drop
+    degree = adj.sum(axis=2, dtype=np.int16)
+    # Degrees are at most 4, so the uint8 sums cannot overflow
+    linked = np.einsum("kab,aqb->kaq", adj.view(np.uint8), tables["quadrant_mask"].view(np.uint8)) > 0
+
+    # Phase 5: one link into the Crown from a space with that direction free and room to spare
+    toward = tables["direction"][:, crown].T  # (boards, spaces): direction from each space to its board's Crown
+    has_direction = toward >= 0
+    taken = np.take_along_axis(linked, np.where(has_direction, toward, 0)[:, :, None], axis=2)[:, :, 0]
+    pick = rng.random(count)
+    drop = rng.random(count)
+    connectors = has_direction & ~taken & (degree < 4)
+    fell_back = ~connectors.any(axis=1)
+    # Fallback as in the phased engine: any space off the Crown's row and column, cleared toward it,
+    # and one more link dropped when that leaves it full
+    connectors[fell_back] = has_direction[fell_back]
+    connector = np.where(connectors, pick, -1.0).argmax(axis=1)
+    for board in np.flatnonzero(fell_back):
+        c, quadrant = connector[board], toward[board, connector[board]]
+        cleared = adj[board, c] & tables["quadrant_mask"][c, quadrant]
+        adj[board, c, cleared] = adj[board, cleared, c] = False
+        if adj[board, c].sum() >= 4:
+            other = np.where(adj[board, c], drop[board], -1.0).argmax()
+            adj[board, c, other] = adj[board, other, c] = False
+    adj[every, connector, crown] = adj[every, crown, connector] = True
+    return types, crown, adj, fell_back
+
+
+def check_boards(adj, starts, crown):
+    """validate_grid for every board at once: (reasons, crown_distance), reason "" for valid boards."""
+    boards, count, _ = adj.shape
+    every = np.arange(boards)
+    reached = np.zeros((boards, count), dtype=bool)
+    reached[every, starts] = True
+    frontier = reached.copy()
+    crown_distance = np.where(starts == crown, 0, -1)
+    adjacency = adj.view(np.uint8)
+    for step in range(1, count):
+        grown = np.einsum("ka,kab->kb", frontier.view(np.uint8), adjacency) > 0
+        frontier = grown & ~reached
+        if not frontier.any():
+            break
+        reached |= frontier
+        crown_distance = np.where((crown_distance < 0) & frontier[every, crown], step, crown_distance)
+    in_degree = adj[every, crown].sum(axis=1)
+    over_degree = (adj.sum(axis=2) > 4).any(axis=1)
+    reasons = np.where(over_degree, "over_degree",
+                       np.where(~reached.all(axis=1), "unreachable",
+                                np.where(in_degree != 1, "crown_in_degree",
+                                         np.where(crown_distance < 3, "crown_too_close", ""))))
+    return reasons, crown_distance
+
+
+def create_grids(seeds, starts, rows=5, cols=None, stats=None):
+    """Valid grids for every (seed, start space) pair, in order, in create_grid()'s JSON shape.
+
+    stats, when a list, receives one dict per grid: attempts (candidate
+    boards drawn for its pair), crown_fallbacks and failures (validate_grid
+    reasons of the rejected candidates).
+    """
+    seeds = list(seeds)
+    types, adj = generate_boards(seeds_to_bits(seeds), starts, rows, cols, stats)
+    return [{"spaces": spaces, "seed": seed} for spaces, seed in zip(to_spaces(types, adj), seeds)]
+
+
+def pack_grids(seeds, starts, rows=5, cols=None):
+    """create_grids() already encoded as grid_generator.pack_grid() would, without building the dicts."""
+    types, adj = generate_boards(seeds_to_bits(seeds), starts, rows, cols)
+    if adj.shape[1] > 256:
+        return [pack_grid({"spaces": spaces}) for spaces in to_spaces(types, adj)]
+    neighbours, degree = neighbour_table(adj)
+    boards, count, width = neighbours.shape
+    # Per space one (type << 4 | degree) byte then its connection ids, all boards in one array
+    table = np.empty((boards, count, 1 + width), dtype=np.uint8)
+    table[:, :, 0] = (types.astype(np.uint8) << 4) | degree
+    table[:, :, 1:] = neighbours
+    keep = np.arange(1 + width) <= degree[:, :, None]
+    blob = table[keep].tobytes()
+    ends = np.cumsum(count + degree.sum(axis=1)).tolist()
+    header = struct.pack("<H", count)
+    return [header + blob[begin:end] for begin, end in zip([0] + ends[:-1], ends)]
+
+
+def seeds_to_bits(seeds):
+    """seed_bits() of each seed, worked out once per distinct seed (a catalogue repeats each seed 25 times)."""
+    cache = {}
+    return [cache[seed] if seed in cache else cache.setdefault(seed, seed_bits(seed)) for seed in seeds]
+
+
+def neighbour_table(adj):
+    """(boards, spaces, max degree) connection ids in ascending order, padded with zeros, and the degrees."""
+    degree = adj.sum(axis=2, dtype=np.uint8)
+    width = max(int(degree.max()), 1)
+    # A stable sort of "not linked" puts each row's linked ids first, still ascending
+    neighbours = np.argsort(~adj, axis=2, kind="stable")[:, :, :width].astype(np.uint16)
+    neighbours[np.arange(width) >= degree[:, :, None]] = 0
+    return neighbours, degree
+
+
+def to_spaces(types, adj):
+    """The {"id", "type", "connections"} spaces list of every board."""
+    neighbours, degree = neighbour_table(adj)
+    names = [SPACE_TYPES[t] for t in range(len(SPACE_TYPES))]
+    return [
+        [
+            {"id": s, "type": names[t], "connections": links[:d]}
+            for s, (t, links, d) in enumerate(zip(board_types, board_links, board_degree))
+        ]
+        for board_types, board_links, board_degree in zip(types.tolist(), neighbours.tolist(), degree.tolist())
+    ]
+
+
+def generate_boards(bits, starts, rows=5, cols=None, stats=None):
+    """(types, adj) arrays of a valid board for each pair's seed bits (see seed_bits) and start space."""
+    tables = bulk_tables(rows, rows if cols is None else cols)
+    bits = np.asarray(bits, dtype=np.uint64)
+    starts = np.asarray(starts, dtype=np.intp)
+    total = len(bits)
+    types = np.zeros((total, tables["geo"].count), dtype=np.int8)
+    adj = np.zeros((total, tables["geo"].count, tables["geo"].count), dtype=bool)
+    attempts = np.zeros(total, dtype=np.int64)
+    fallbacks = np.zeros(total, dtype=bool)
+    failures = [{} for _ in range(total)] if stats is not None else None
+
+    pending = np.arange(total)
+    for attempt in range(MAX_ROUNDS):
+        if not len(pending):
+            break
+        keys = board_keys(bits[pending], starts[pending], attempt)
+        board_types, crown, board_adj, fell_back = build_boards(keys, starts[pending], tables)
+        reasons, _ = check_boards(board_adj, starts[pending], crown)
+        valid = reasons == ""
+        done = pending[valid]
+        types[done], adj[done], fallbacks[done] = board_types[valid], board_adj[valid], fell_back[valid]
+        attempts[pending] += 1
+        if failures is not None:
+            for i, reason in zip(pending[~valid], reasons[~valid]):
+                failures[i][reason] = failures[i].get(reason, 0) + 1
+        pending = pending[~valid]
+    if len(pending):
+        raise Exception("Failed to generate valid grid after max attempts")
+    if stats is not None:
+        stats.extend(
+            {"attempts": n, "crown_fallbacks": int(fell), "failures": failed}
+            for n, fell, failed in zip(attempts.tolist(), fallbacks.tolist(), failures)
+        )
+    return types, adj
@@ -0,0 +1,116 @@
+import mmap
+import multiprocessing
+import random
+import struct
+from array import array
+
+from grid_generator import create_grid, pack_grid, unpack_grid
+
+MAGIC = b"BCQC"
+VERSION = 1
+# magic, version, engine name, first seed, seed count, start spaces per seed
+HEADER = struct.Struct("<4sB16sQII")
+START_SPACES = 25
+BULK_SEEDS = 64  # Seeds per grid_bulk call when building with the bulk engine
+
+
+def pack_seed(task):
+    """Packed grids of every start space for one seed."""
+    seed, engine = task
+    return [pack_grid(create_grid(start_space_id, engine, seed=seed)) for start_space_id in range(START_SPACES)]
+
+
+def pack_bulk(task):
+    """Packed grids of every start space for seeds [first, first + count), from one grid_bulk call."""
+    from grid_bulk import pack_grids
+
+    first, count = task
+    seeds = [seed for seed in range(first, first + count) for _ in range(START_SPACES)]
+    return pack_grids(seeds, list(range(START_SPACES)) * count)
+
+
+def generate_records(first_seed, seed_count, engine="phased", workers=1):
+    """Packed grids for every (seed, start space) pair, seed-major, as stored in a catalogue.
+
+    With workers other than 1 the seeds are spread over a process pool
+    (None means one process per core); the order is unchanged.
+    """
+    end = first_seed + seed_count
+    if engine == "bulk":
+        pack, chunksize = pack_bulk, 1
+        tasks = [(seed, min(BULK_SEEDS, end - seed)) for seed in range(first_seed, end, BULK_SEEDS)]
+    else:
+        pack, chunksize = pack_seed, 16
+        tasks = [(seed, engine) for seed in range(first_seed, end)]
+    if workers == 1:
+        for task in tasks:
+            yield from pack(task)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        for records in pool.imap(pack, tasks, chunksize=chunksize):
+            yield from records
+
+
+def write_catalogue(path, first_seed, seed_count, engine="phased", records=None, workers=1):
+    """Write a catalogue file covering seeds [first_seed, first_seed + seed_count).
+
+    Layout: header, then seed_count * 25 + 1 uint64 offsets into the data
+    section, then the packed grids back to back. Grid (seed, start) is record
+    (seed - first_seed) * 25 + start, so a lookup is two offset reads and one
+    slice. records defaults to generating the grids with `workers` processes;
+    any iterable of packed grids in the same order can be passed instead.
+    """
+    if records is None:
+        records = generate_records(first_seed, seed_count, engine, workers)
+    count = seed_count * START_SPACES
+    offsets = array("Q", [0])
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, engine.encode("ascii"), first_seed, seed_count, START_SPACES))
+        index_at = f.tell()
+        f.write(bytes(8 * (count + 1)))
+        position = 0
+        for record in records:
+            f.write(record)
+            position += len(record)
+            offsets.append(position)
+        if len(offsets) != count + 1:
+            raise ValueError(f"expected {count} grids, got {len(offsets) - 1}")
+        f.seek(index_at)
+        f.write(offsets.tobytes())
+    return count
+
+
+class Catalogue:
+    """Read-only, memory-mapped view of a catalogue file with O(1) lookup by (seed, start space)."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, engine, self.first_seed, self.seed_count, starts = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or starts != START_SPACES:
+            raise ValueError(f"{path} is not a version {VERSION} grid catalogue")
+        self.engine = engine.rstrip(b"\0").decode("ascii")
+        self._index_at = HEADER.size
+        self._data_at = self._index_at + 8 * (self.seed_count * START_SPACES + 1)
+
+    def covers(self, seed):
+        return self.first_seed <= seed < self.first_seed + self.seed_count
+
+    def random_seed(self, rng=random):
+        return self.first_seed + rng.randrange(self.seed_count)
+
+    def get(self, seed, start_space_id):
+        if not self.covers(seed):
+            raise KeyError(f"seed {seed} is outside this catalogue")
+        record = (seed - self.first_seed) * START_SPACES + start_space_id
+        begin, end = struct.unpack_from("<QQ", self._map, self._index_at + 8 * record)
+        grid, _ = unpack_grid(self._map[self._data_at + begin:self._data_at + end])
+        grid["seed"] = seed
+        return grid
+
+    def describe(self):
+        return {"path": self.path, "engine": self.engine, "first_seed": self.first_seed, "seed_count": self.seed_count}
+
+    def close(self):
+        self._map.close()
@@ -1,375 +1,977 @@
 import random
 import json
+import struct
 import sys
-from collections import deque
+from collections import namedtuple
 
-def create_grid(start_space_id=12):
-    spaces = [
-        {"id": i, "type": "Neutral", "connections": []}
-        for i in range(25)
-    ]
-    spaces[start_space_id]["type"] = "Start"
+from grid_geometry import OPPOSITE_DIRECTIONS, ORDINAL_DIRECTIONS, board_shape, get_geometry, iter_bits
+
+# Type codes for the packed binary grid format (pack_grid / unpack_grid)
+SPACE_TYPES = ["Neutral", "Start", "Crown", "Shadow Realm", "Teleport", "Combat", "Good", "Bad", "Shop"]
+SPACE_TYPE_CODES = {t: i for i, t in enumerate(SPACE_TYPES)}
+
+# How many of each special type a 5x5 board gets; larger boards scale these with their space count
+SPECIAL_TYPES_PER_25 = [("Shadow Realm", 1), ("Teleport", 1), ("Combat", 2), ("Good", 3), ("Bad", 3), ("Shop", 3)]
+
+# Phase-2 quadrants with more candidate cells than this are sampled lazily instead of shuffled whole
+LAZY_QUADRANT_CELLS = 64
+
+class BitGrid:
+    """Connections of a board as one bitmask per space, plus degree counters.
+
+    Bit b of adj[a] is set when spaces a and b are connected; links are
+    always symmetric. "Does a already have a link in direction d" is a single
+    AND against the geometry's quadrant_mask, and membership tests, degree
+    checks and removals are O(1). The {"id", "type", "connections"} dicts are
+    only built by to_spaces() at the output boundary.
+    """
+
+    __slots__ = ("geo", "adj", "degree")
+
+    def __init__(self, geo):
+        self.geo = geo
+        self.adj = [0] * geo.count
+        self.degree = [0] * geo.count
+
+    @classmethod
+    def from_spaces(cls, spaces, geo=None):
+        """Build a BitGrid from the {"id", "type", "connections"} list form."""
+        grid = cls(geo or get_geometry(*board_shape(len(spaces))))
+        for space in spaces:
+            for conn in space["connections"]:
+                grid.connect(space["id"], conn)
+        return grid
+
+    def clear(self):
+        for i in range(self.geo.count):
+            self.adj[i] = 0
+            self.degree[i] = 0
+
+    def connected(self, a, b):
+        return self.adj[a] >> b & 1 == 1
+
+    def connect(self, a, b):
+        if not self.adj[a] >> b & 1:
+            self.adj[a] |= self.geo.bit[b]
+            self.adj[b] |= self.geo.bit[a]
+            self.degree[a] += 1
+            self.degree[b] += 1
+
+    def disconnect(self, a, b):
+        if self.adj[a] >> b & 1:
+            self.adj[a] &= ~self.geo.bit[b]
+            self.adj[b] &= ~self.geo.bit[a]
+            self.degree[a] -= 1
+            self.degree[b] -= 1
+
+    def has_direction(self, space_id, direction):
+        """Check if space already has a connection in the given ordinal direction"""
+        return self.adj[space_id] & self.geo.quadrant_mask[space_id][direction] != 0
+
+    def occupied_directions(self, space_id):
+        """Ordinal directions this space already has a connection in."""
+        adj = self.adj[space_id]
+        return [d for d, mask in self.geo.quadrant_mask[space_id].items() if adj & mask]
+
+    def reachable(self, start):
+        """Bitmask of every space reachable from start."""
+        adj = self.adj
+        seen = frontier = self.geo.bit[start]
+        while frontier:
+            grown = 0
+            for space_id in iter_bits(frontier):
+                grown |= adj[space_id]
+            frontier = grown & ~seen
+            seen |= frontier
+        return seen
+
+    def to_spaces(self, types):
+        return [
+            {"id": i, "type": t, "connections": list(iter_bits(self.adj[i]))}
+            for i, t in enumerate(types)
+        ]
+
+
+GridCheck = namedtuple("GridCheck", ["reason", "reached", "crown_distance", "crown_in_degree"])
+GridCheck.__doc__ = """Outcome of validate_grid.
+
+reason is None for a valid grid, otherwise the first rule that failed:
+"over_degree" (a space with more than 4 connections), "unreachable",
+"crown_in_degree" or "crown_too_close". reached is the
+bitmask of spaces reachable from Start, crown_distance the number of steps
+from Start to the Crown (None when unreachable) and crown_in_degree the
+number of spaces linking to the Crown.
+"""
+
+
+def validate_grid(grid, crown_id, start_id):
+    """Check the connection cap, connectivity, Crown in-degree and Crown distance in one layered BFS over the bitmasks."""
+    adj = grid.adj
+    crown_bit = grid.geo.bit[crown_id]
+    reached = frontier = grid.geo.bit[start_id]
+    crown_distance = 0 if frontier & crown_bit else None
+    steps = 0
+    while frontier:
+        steps += 1
+        grown = 0
+        for space_id in iter_bits(frontier):
+            grown |= adj[space_id]
+        frontier = grown & ~reached
+        reached |= frontier
+        if crown_distance is None and frontier & crown_bit:
+            crown_distance = steps
+    crown_in_degree = grid.degree[crown_id]
+    if max(grid.degree) > 4:
+        reason = "over_degree"
+    elif reached != grid.geo.all_mask:
+        reason = "unreachable"
+    elif crown_in_degree != 1:
+        reason = "crown_in_degree"
+    elif crown_distance < 3:
+        reason = "crown_too_close"
+    else:
+        reason = None
+    return GridCheck(reason, reached, crown_distance, crown_in_degree)
+
+
+def is_valid_grid(grid, crown_id, start_id):
+    return validate_grid(grid, crown_id, start_id).reason is None
+
+
+def assign_types(start_space_id, rng, count=25):
+    """Space types with Start and the shuffled special types placed; returns (types, crown_id).
+
+    There is always exactly one Crown; the other special types keep their
+    5x5 share of the board (at least one each).
+    """
+    types = ["Neutral"] * count
+    types[start_space_id] = "Start"
     
     # Assign unique space types
-    types = ["Crown", "Shadow Realm", "Teleport"] + ["Combat"] * 2 + ["Good"] * 3 + ["Bad"] * 3 + ["Shop"] * 3
-    available_ids = [i for i in range(25) if i != start_space_id]
-    random.shuffle(available_ids)
-    for i, t in enumerate(types):
-        spaces[available_ids[i]]["type"] = t
+    special = ["Crown"]
+    for space_type, per_25 in SPECIAL_TYPES_PER_25:
+        special += [space_type] * max(1, round(per_25 * count / 25))
+    available_ids = [i for i in range(count) if i != start_space_id]
+    rng.shuffle(available_ids)
+    for i, t in enumerate(special):
+        types[available_ids[i]] = t
     
     # Get crown ID early
-    crown_id = next(i for i, s in enumerate(spaces) if s["type"] == "Crown")
-    
-    # Define outside spaces (0-4, 5, 9, 10, 14, 15, 19, 20-24)
-    outside = {0, 1, 2, 3, 4, 5, 9, 10, 14, 15, 19, 20, 21, 22, 23, 24}
-    
-    # Helper to get row and column
-    def get_coords(space_id):
-        return space_id // 5, space_id % 5
-    
-    # Helper to get direction from space1 to space2
-    def get_direction(from_id, to_id):
-        r1, c1 = get_coords(from_id)
-        r2, c2 = get_coords(to_id)
-        dr, dc = r2 - r1, c2 - c1
-        if dr == 0 or dc == 0:  # Same row or column
-            return None
-        if abs(dr) > 1 or abs(dc) > 1:  # Non-adjacent
-            if dr < 0 and dc < 0:
-                return "NorthWest"
-            if dr < 0 and dc > 0:
-                return "NorthEast"
-            if dr > 0 and dc < 0:
-                return "SouthWest"
-            if dr > 0 and dc > 0:
-                return "SouthEast"
-        # Adjacent connections
-        if dr == -1 and dc == 0:
-            return "North"
-        if dr == 1 and dc == 0:
-            return "South"
-        if dr == 0 and dc == 1:
-            return "East"
-        if dr == 0 and dc == -1:
-            return "West"
-        if dr == -1 and dc == -1:
-            return "NorthWest"
-        if dr == -1 and dc == 1:
-            return "NorthEast"
-        if dr == 1 and dc == -1:
-            return "SouthWest"
-        if dr == 1 and dc == 1:
-            return "SouthEast"
-        return None
-    
-    # Get cardinal adjacent spaces
-    def get_adjacent_cardinal(space_id):
-        r, c = get_coords(space_id)
-        adjacent = []
-        for dr, dc in [(-1,0), (1,0), (0,-1), (0,1)]:  # Cardinal only
-            r_new, c_new = r + dr, c + dc
-            if 0 <= r_new < 5 and 0 <= c_new < 5:
-                adjacent.append(r_new * 5 + c_new)
-        return adjacent
-    
-    # Get diagonal adjacent spaces
-    def get_adjacent_diagonal(space_id):
-        r, c = get_coords(space_id)
-        adjacent = []
-        for dr, dc in [(-1,-1), (-1,1), (1,-1), (1,1)]:  # Diagonal only
-            r_new, c_new = r + dr, c + dc
-            if 0 <= r_new < 5 and 0 <= c_new < 5:
-                adjacent.append(r_new * 5 + c_new)
-        return adjacent
-    
-    # Check if a space already has a connection in a given direction
-    def has_connection_in_direction(space_id, target_direction):
-        """Check if space already has a connection in the given ordinal direction"""
-        for conn in spaces[space_id]["connections"]:
-            conn_dir = get_direction(space_id, conn)
-            if conn_dir == target_direction:
-                return True
-        return False
-    
-    # BFS to check connectivity and Crown distance
-    def is_valid_grid(spaces, crown_id, start_id):
-        visited = set()
-        queue = deque([start_id])
-        visited.add(start_id)
-        steps_to_crown = None
-        while queue:
-            current = queue.popleft()
-            if current == crown_id:
-                steps_to_crown = len(bfs_path(spaces, start_id, crown_id)) - 1
-            for next_space in spaces[current]["connections"]:
-                if next_space not in visited:
-                    visited.add(next_space)
-                    queue.append(next_space)
-        incoming_to_crown = sum(1 for s in spaces if crown_id in s["connections"])
-        return len(visited) == 25 and steps_to_crown >= 3 and incoming_to_crown == 1
-    
-    def bfs_path(spaces, start, target):
-        queue = deque([(start, [start])])
-        visited = set([start])
-        while queue:
-            current, path = queue.popleft()
-            if current == target:
-                return path
-            for next_space in spaces[current]["connections"]:
-                if next_space not in visited:
-                    visited.add(next_space)
-                    queue.append((next_space, path + [next_space]))
-        return []
+    crown_id = types.index("Crown")
+    return types, crown_id
+
+
+def non_adjacent_order(geo, space_id, quadrant, rng, allowed):
+    """Yield the phase-2 candidates in quadrant from space_id in random order.
+
+    Small quadrants are listed and shuffled whole (this is all a 5x5 board
+    ever sees). In larger ones only spaces in the allowed mask, the ones that
+    could still take the link, are yielded: a few are listed and shuffled,
+    many are sampled cell by cell without replacement. Either way a caller
+    that stops at its first link, as phase 2 does, pays for about as many
+    cells as it looks at rather than for the whole quadrant.
+    """
+    r0, r1, c0, c1 = geo.quadrant_bounds(space_id, quadrant)
+    width = c1 - c0
+    area = (r1 - r0) * width
+    if area <= LAZY_QUADRANT_CELLS:
+        group = geo.non_adjacent(space_id, quadrant)
+        rng.shuffle(group)
+        yield from group
+        return
+    candidates = geo.quadrant_mask[space_id][quadrant] & ~geo.diagonal_mask[space_id] & allowed
+    if candidates.bit_count() * 4 < area:
+        group = list(iter_bits(candidates))
+        rng.shuffle(group)
+        yield from group
+        return
+    seen = set()
+    while len(seen) < area:
+        cell = int(rng.random() * area)
+        if cell in seen:
+            continue
+        seen.add(cell)
+        target = (r0 + cell // width) * geo.cols + c0 + cell % width
+        if candidates >> target & 1:
+            yield target
+
+
+def build_phases(grid, crown_id, rng, timer=None):
+    """Run phases 1-5 of the phased engine on a grid with no connections.
+
+    Returns True when phase 5 found no free connector and had to fall back
+    to clearing links out of a random space to reach the Crown. timer, when
+    given, gets a lap after each phase (see grid_timing.PhaseTimer).
+    """
+    geo = grid.geo
+    direction = geo.direction
+    degree = grid.degree
     
     # Phase 1: Connect outside spaces to all cardinal adjacent outside spaces (SKIP CROWN)
-    for space_id in outside:
-        if spaces[space_id]["type"] == "Crown":
+    for space_id in geo.outside:
+        if space_id == crown_id:
             continue
-        adj_outside = get_adjacent_cardinal(space_id)
-        for adj in adj_outside:
-            if adj in outside and adj not in spaces[space_id]["connections"] and spaces[adj]["type"] != "Crown":
-                spaces[space_id]["connections"].append(adj)
-                if space_id not in spaces[adj]["connections"]:
-                    spaces[adj]["connections"].append(space_id)
+        for adj in geo.cardinal[space_id]:
+            if adj in geo.outside and adj != crown_id:
+                grid.connect(space_id, adj)
+    if timer:
+        timer.lap("phase1")
     
     # Phase 2: Non-adjacent connections (5% chance, unique directions, stop after connecting in a quadrant)
     # SKIP CROWN ENTIRELY
-    ordinal_directions = ["NorthWest", "NorthEast", "SouthWest", "SouthEast"]
-    for space_id in range(25):
-        if spaces[space_id]["type"] == "Crown":
+    # Spaces with room for a link, and spaces already linked in each direction, as masks for large quadrants
+    open_mask = sum(geo.bit[i] for i in range(geo.count) if degree[i] < 4 and i != crown_id)
+    linked_toward = {d: sum(geo.bit[i] for i in range(geo.count) if grid.has_direction(i, d)) for d in ORDINAL_DIRECTIONS}
+    for space_id in range(geo.count):
+        if space_id == crown_id:
             continue
-        r, c = get_coords(space_id)
-        non_adjacent = [i for i in range(25) if i != space_id and get_coords(i)[0] != r and get_coords(i)[1] != c]
-        non_adjacent = [i for i in non_adjacent if abs(get_coords(i)[0] - r) > 1 or abs(get_coords(i)[1] - c) > 1]
-        # Filter out crown
-        non_adjacent = [i for i in non_adjacent if spaces[i]["type"] != "Crown"]
-        
-        direction_groups = {d: [] for d in ordinal_directions}
-        for target in non_adjacent:
-            direction = get_direction(space_id, target)
-            if direction in ordinal_directions:
-                direction_groups[direction].append(target)
-        for direction in ordinal_directions:
-            random.shuffle(direction_groups[direction])
-            for target in direction_groups[direction]:
-                if len(spaces[space_id]["connections"]) >= 4 or len(spaces[target]["connections"]) >= 4:
+        for quadrant in ORDINAL_DIRECTIONS:
+            allowed = open_mask & ~linked_toward[OPPOSITE_DIRECTIONS[quadrant]]
+            for target in non_adjacent_order(geo, space_id, quadrant, rng, allowed):
+                if target == crown_id:
                     continue
-                inverse_direction = get_direction(target, space_id)
-                if inverse_direction and not has_connection_in_direction(target, inverse_direction):
-                    if random.random() < 0.05:
-                        spaces[space_id]["connections"].append(target)
-                        spaces[target]["connections"].append(space_id)
+                if degree[space_id] >= 4:
+                    break  # No room left, so nothing in this quadrant can link
+                if degree[target] >= 4:
+                    continue
+                if not grid.has_direction(target, direction(target, space_id)):
+                    if rng.random() < 0.05:
+                        grid.connect(space_id, target)
+                        linked_toward[quadrant] |= geo.bit[space_id]
+                        linked_toward[OPPOSITE_DIRECTIONS[quadrant]] |= geo.bit[target]
+                        for end in (space_id, target):
+                            if degree[end] >= 4:
+                                open_mask &= ~geo.bit[end]
                         break  # Move to next quadrant
+    if timer:
+        timer.lap("phase2")
     
     # Phase 3: Cardinal adjacent connections for all spaces (50% chance)
     # SKIP CROWN ENTIRELY
-    for space_id in range(25):
-        if spaces[space_id]["type"] == "Crown":
+    for space_id in range(geo.count):
+        if space_id == crown_id:
             continue
-        adjacent = get_adjacent_cardinal(space_id)
-        random.shuffle(adjacent)
+        adjacent = list(geo.cardinal[space_id])
+        rng.shuffle(adjacent)
         for adj in adjacent:
-            if len(spaces[space_id]["connections"]) >= 4 or len(spaces[adj]["connections"]) >= 4:
+            if degree[space_id] >= 4 or degree[adj] >= 4:
                 continue
-            if spaces[adj]["type"] == "Crown":
+            if adj == crown_id:
                 continue
-            if random.random() < 0.5 and adj not in spaces[space_id]["connections"]:
-                spaces[space_id]["connections"].append(adj)
-                if space_id not in spaces[adj]["connections"] and len(spaces[adj]["connections"]) < 4:
-                    spaces[adj]["connections"].append(space_id)
+            if rng.random() < 0.5 and not grid.connected(space_id, adj):
+                grid.connect(space_id, adj)
+    if timer:
+        timer.lap("phase3")
     
     # Phase 4: Remove diagonal connections for non-outside spaces
-    non_outside = [i for i in range(25) if i not in outside and spaces[i]["type"] != "Crown"]
-    for space_id in non_outside:
-        diagonal_adj = get_adjacent_diagonal(space_id)
-        connections_to_remove = [(space_id, adj) for adj in diagonal_adj if adj in spaces[space_id]["connections"]]
-        for source, target in connections_to_remove:
-            if target in spaces[source]["connections"]:
-                spaces[source]["connections"].remove(target)
-            if source in spaces[target]["connections"]:
-                spaces[target]["connections"].remove(source)
+    for space_id in geo.inside:
+        if space_id == crown_id:
+            continue
+        for adj in iter_bits(grid.adj[space_id] & geo.diagonal_mask[space_id]):
+            grid.disconnect(space_id, adj)
+    if timer:
+        timer.lap("phase4")
     
     # Phase 5: Crown connections - FIXED VERSION
     # The crown should have exactly ONE bidirectional connection
-    # We need to be careful about which space we connect it to
-    
     # Find potential connectors (spaces that can connect to crown without violating direction rules)
     potential_connectors = []
-    for space_id in range(25):
-        if space_id == crown_id or spaces[space_id]["type"] == "Crown":
+    for space_id in range(geo.count):
+        if space_id == crown_id:
             continue
-        
         # Check if this space already has a connection in the direction of the crown
-        direction_to_crown = get_direction(space_id, crown_id)
-        if direction_to_crown and not has_connection_in_direction(space_id, direction_to_crown):
+        direction_to_crown = direction(space_id, crown_id)
+        if direction_to_crown and not grid.has_direction(space_id, direction_to_crown):
             # Check if connecting wouldn't exceed connection limit
-            if len(spaces[space_id]["connections"]) < 4:
+            if degree[space_id] < 4:
                 potential_connectors.append(space_id)
     
-    if not potential_connectors:
-        # Fallback: force a connection by removing an existing one if needed
-        all_spaces = [i for i in range(25) if i != crown_id]
-        random.shuffle(all_spaces)
-        for space_id in all_spaces:
-            direction_to_crown = get_direction(space_id, crown_id)
-            if direction_to_crown:
-                # Remove any existing connection in this direction
-                for conn in list(spaces[space_id]["connections"]):
-                    if get_direction(space_id, conn) == direction_to_crown:
-                        spaces[space_id]["connections"].remove(conn)
-                        if space_id in spaces[conn]["connections"]:
-                            spaces[conn]["connections"].remove(space_id)
-                
-                # Now connect to crown
-                spaces[space_id]["connections"].append(crown_id)
-                spaces[crown_id]["connections"] = [space_id]
-                break
-    else:
+    if potential_connectors:
         # Choose a random valid connector
-        connector = random.choice(potential_connectors)
-        spaces[connector]["connections"].append(crown_id)
-        spaces[crown_id]["connections"] = [connector]
+        connector = rng.choice(potential_connectors)
+        fell_back = False
+    else:
+        # Fallback: force a connection by removing any existing one in the crown's direction
+        connector = rng.choice([i for i in range(geo.count) if direction(i, crown_id)])
+        in_direction = grid.adj[connector] & geo.quadrant_mask[connector][direction(connector, crown_id)]
+        for conn in iter_bits(in_direction):
+            grid.disconnect(connector, conn)
+        if degree[connector] >= 4:
+            # Full without a link toward the Crown: drop one so the Crown link stays within the cap
+            grid.disconnect(connector, rng.choice(list(iter_bits(grid.adj[connector]))))
+        fell_back = True
+    grid.connect(connector, crown_id)
+    if timer:
+        timer.lap("phase5")
+    return fell_back
+
+
+def connect_unvisited(grid, crown_id, start_space_id, rng):
+    """Retry fallback: link each space unreachable from Start to a random non-crown space with room."""
+    geo = grid.geo
+    visited = grid.reachable(start_space_id)
+    for u in iter_bits(geo.all_mask & ~visited & ~geo.bit[crown_id]):
+        if grid.degree[u] >= 4:
+            continue
+        possible_connectors = [i for i in range(geo.count) if i != u and i != crown_id and grid.degree[i] < 4]
+        if possible_connectors:
+            connector = rng.choice(possible_connectors)
+            if geo.direction(connector, u):
+                grid.connect(u, connector)
+
+
+def bfs_layers(grid, start, skip=0):
+    """Bitmasks of the spaces 0, 1, 2, ... steps from start, never entering spaces in skip."""
+    adj = grid.adj
+    reached = frontier = grid.geo.bit[start]
+    layers = []
+    while frontier:
+        layers.append(frontier)
+        grown = 0
+        for space_id in iter_bits(frontier):
+            grown |= adj[space_id]
+        frontier = grown & ~reached & ~skip
+        reached |= frontier
+    return layers
+
+
+def bridge_unreachable(grid, crown_id, reached, rng):
+    """Repair: link one space reachable from Start to one that is not.
+
+    Cardinal links are preferred; otherwise a phase-2 style non-adjacent
+    link whose direction is still free at both ends. Both ends must be under
+    the 4-connection cap. Returns False when no such link exists.
+    """
+    geo = grid.geo
+    degree = grid.degree
+    outside = geo.all_mask & ~reached & ~geo.bit[crown_id]
+    inside = reached & ~geo.bit[crown_id]
+    cardinal_links = [
+        (a, b)
+        for a in iter_bits(inside) if degree[a] < 4
+        for b in geo.cardinal[a] if outside >> b & 1 and degree[b] < 4
+    ]
+    if cardinal_links:
+        grid.connect(*rng.choice(cardinal_links))
+        return True
+    direction = geo.direction
+    far_links = [
+        (a, b)
+        for a in iter_bits(inside) if degree[a] < 4
+        for quadrant in ORDINAL_DIRECTIONS if not grid.has_direction(a, quadrant)
+        for b in geo.non_adjacent(a, quadrant)
+        if outside >> b & 1 and degree[b] < 4 and not grid.has_direction(b, direction(b, a))
+    ]
+    if far_links:
+        grid.connect(*rng.choice(far_links))
+        return True
+    return False
+
+
+def reroute_crown(grid, crown_id, start_space_id, rng):
+    """Repair: drop the Crown's links and reattach it to one connector at least two steps from Start.
+
+    The connector follows the phase-5 rules (different row and column, no
+    link in the Crown's direction yet, under the cap). Returns False when no
+    space qualifies.
+    """
+    geo = grid.geo
+    for conn in iter_bits(grid.adj[crown_id]):
+        grid.disconnect(crown_id, conn)
+    layers = bfs_layers(grid, start_space_id, geo.bit[crown_id])
+    far_enough = 0
+    for layer in layers[2:]:
+        far_enough |= layer
+    direction = geo.direction
+    connectors = [
+        i for i in iter_bits(far_enough)
+        if direction(i, crown_id) and grid.degree[i] < 4 and not grid.has_direction(i, direction(i, crown_id))
+    ]
+    if not connectors:
+        return False
+    grid.connect(rng.choice(connectors), crown_id)
+    return True
+
+
+def repair_grid(grid, crown_id, start_space_id, check, rng):
+    """Make one targeted edit for the rule validate_grid reported; False means start over instead."""
+    if check.reason == "over_degree":
+        return False
+    if check.reason == "unreachable" and check.reached | grid.geo.bit[crown_id] != grid.geo.all_mask:
+        return bridge_unreachable(grid, crown_id, check.reached, rng)
+    # Only the Crown is cut off, or it has the wrong in-degree, or it sits too close to Start
+    return reroute_crown(grid, crown_id, start_space_id, rng)
+
+
+def create_grid_phased(start_space_id=12, stats=None, rng=random, repair=True, geo=None, timer=None):
+    """Original engine: build all five phases, validate, and fix what is broken.
+
+    With repair on, a failed check is answered with a targeted edit (bridge
+    an unreachable component, reroute the Crown connector) and only falls
+    back to clearing every connection and re-running the phases when no
+    edit applies or max_repairs edits have not helped. stats["failures"]
+    counts the validate_grid reasons that were seen along the way.
+    """
+    geo = geo or get_geometry()
+    types, crown_id = assign_types(start_space_id, rng, geo.count)
+    grid = BitGrid(geo)
+    if timer:
+        timer.lap("types")
+    crown_fallbacks = int(build_phases(grid, crown_id, rng, timer))
     
     # Ensure all spaces are connected and valid
     attempts = 0
     max_attempts = 200
-    while not is_valid_grid(spaces, crown_id, start_space_id) and attempts < max_attempts:
-        # Clear connections and retry
-        for s in spaces:
-            s["connections"] = []
-        
-        # Re-run all phases
-        # Phase 1: Outside cardinal connections (skip crown)
-        for space_id in outside:
-            if spaces[space_id]["type"] == "Crown":
-                continue
-            adj_outside = get_adjacent_cardinal(space_id)
-            for adj in adj_outside:
-                if adj in outside and adj not in spaces[space_id]["connections"] and spaces[adj]["type"] != "Crown":
-                    spaces[space_id]["connections"].append(adj)
-                    if space_id not in spaces[adj]["connections"]:
-                        spaces[adj]["connections"].append(space_id)
-        
-        # Phase 2: Non-adjacent connections (skip crown)
-        for space_id in range(25):
-            if spaces[space_id]["type"] == "Crown":
-                continue
-            r, c = get_coords(space_id)
-            non_adjacent = [i for i in range(25) if i != space_id and get_coords(i)[0] != r and get_coords(i)[1] != c]
-            non_adjacent = [i for i in non_adjacent if abs(get_coords(i)[0] - r) > 1 or abs(get_coords(i)[1] - c) > 1]
-            non_adjacent = [i for i in non_adjacent if spaces[i]["type"] != "Crown"]
-            
-            direction_groups = {d: [] for d in ordinal_directions}
-            for target in non_adjacent:
-                direction = get_direction(space_id, target)
-                if direction in ordinal_directions:
-                    direction_groups[direction].append(target)
-            for direction in ordinal_directions:
-                random.shuffle(direction_groups[direction])
-                for target in direction_groups[direction]:
-                    if len(spaces[space_id]["connections"]) >= 4 or len(spaces[target]["connections"]) >= 4:
-                        continue
-                    inverse_direction = get_direction(target, space_id)
-                    if inverse_direction and not has_connection_in_direction(target, inverse_direction):
-                        if random.random() < 0.05:
-                            spaces[space_id]["connections"].append(target)
-                            spaces[target]["connections"].append(space_id)
-                            break
-        
-        # Phase 3: Cardinal adjacent connections (skip crown)
-        for space_id in range(25):
-            if spaces[space_id]["type"] == "Crown":
-                continue
-            adjacent = get_adjacent_cardinal(space_id)
-            random.shuffle(adjacent)
-            for adj in adjacent:
-                if len(spaces[space_id]["connections"]) >= 4 or len(spaces[adj]["connections"]) >= 4:
-                    continue
-                if spaces[adj]["type"] == "Crown":
-                    continue
-                if random.random() < 0.5 and adj not in spaces[space_id]["connections"]:
-                    spaces[space_id]["connections"].append(adj)
-                    if space_id not in spaces[adj]["connections"] and len(spaces[adj]["connections"]) < 4:
-                        spaces[adj]["connections"].append(space_id)
-        
-        # Phase 4: Remove diagonal connections for non-outside
-        non_outside = [i for i in range(25) if i not in outside and spaces[i]["type"] != "Crown"]
-        for space_id in non_outside:
-            diagonal_adj = get_adjacent_diagonal(space_id)
-            connections_to_remove = [(space_id, adj) for adj in spaces[space_id]["connections"] if adj in diagonal_adj]
-            for source, target in connections_to_remove:
-                if target in spaces[source]["connections"]:
-                    spaces[source]["connections"].remove(target)
-                if source in spaces[target]["connections"]:
-                    spaces[target]["connections"].remove(source)
-        
-        # Phase 5: Crown connections (fixed)
-        potential_connectors = []
-        for space_id in range(25):
-            if space_id == crown_id or spaces[space_id]["type"] == "Crown":
-                continue
-            direction_to_crown = get_direction(space_id, crown_id)
-            if direction_to_crown and not has_connection_in_direction(space_id, direction_to_crown):
-                if len(spaces[space_id]["connections"]) < 4:
-                    potential_connectors.append(space_id)
-        
-        if not potential_connectors:
-            all_spaces = [i for i in range(25) if i != crown_id]
-            random.shuffle(all_spaces)
-            for space_id in all_spaces:
-                direction_to_crown = get_direction(space_id, crown_id)
-                if direction_to_crown:
-                    for conn in list(spaces[space_id]["connections"]):
-                        if get_direction(space_id, conn) == direction_to_crown:
-                            spaces[space_id]["connections"].remove(conn)
-                            if space_id in spaces[conn]["connections"]:
-                                spaces[conn]["connections"].remove(space_id)
-                    spaces[space_id]["connections"].append(crown_id)
-                    spaces[crown_id]["connections"] = [connector]
-                    break
+    repairs = 0
+    restarts = 0
+    max_repairs = 25
+    repairs_since_restart = 0
+    failures = {}
+    check = validate_grid(grid, crown_id, start_space_id)
+    if timer:
+        timer.lap("validate")
+    while check.reason is not None and attempts < max_attempts:
+        failures[check.reason] = failures.get(check.reason, 0) + 1
+        if repair and repairs_since_restart < max_repairs and repair_grid(grid, crown_id, start_space_id, check, rng):
+            repairs += 1
+            repairs_since_restart += 1
+            if timer:
+                timer.lap("repair")
         else:
-            connector = random.choice(potential_connectors)
-            spaces[connector]["connections"].append(crown_id)
-            spaces[crown_id]["connections"] = [connector]
-        
-        # Fallback: Connect unvisited spaces
-        visited = set()
-        queue = deque([start_space_id])
-        visited.add(start_space_id)
-        while queue:
-            current = queue.popleft()
-            for next_space in spaces[current]["connections"]:
-                if next_space not in visited:
-                    visited.add(next_space)
-                    queue.append(next_space)
-        unvisited = [i for i in range(25) if i not in visited and spaces[i]["type"] != "Crown"]
-        for u in unvisited:
-            possible_connectors = [i for i in range(25) if i != u and len(spaces[i]["connections"]) < 4 and spaces[i]["type"] != "Crown"]
-            if possible_connectors:
-                connector = random.choice(possible_connectors)
-                r1, c1 = get_coords(connector)
-                r2, c2 = get_coords(u)
-                if r1 != r2 and c1 != c2 and connector not in spaces[u]["connections"]:
-                    spaces[u]["connections"].append(connector)
-                    if u not in spaces[connector]["connections"]:
-                        spaces[connector]["connections"].append(u)
+            # Clear connections and re-run all phases
+            grid.clear()
+            crown_fallbacks += build_phases(grid, crown_id, rng, timer)
+            connect_unvisited(grid, crown_id, start_space_id, rng)
+            restarts += 1
+            repairs_since_restart = 0
+            if timer:
+                timer.lap("restart")
+        check = validate_grid(grid, crown_id, start_space_id)
         attempts += 1
+        if timer:
+            timer.lap("validate")
     
+    if stats is not None:
+        stats["attempts"] = attempts + 1
+        stats["repairs"] = repairs
+        stats["restarts"] = restarts
+        stats["crown_fallbacks"] = crown_fallbacks
+        stats["failures"] = failures
     if attempts >= max_attempts:
         raise Exception("Failed to generate valid grid after max attempts")
     
+    spaces = grid.to_spaces(types)
+    if timer:
+        timer.lap("output")
     return {"spaces": spaces}
 
-if __name__ == "__main__":
-    start_space_id = 12  # Default
-    if len(sys.argv) > 1:
+
+def create_grid_constructive(start_space_id=12, stats=None, rng=random, geo=None, timer=None):
+    """Engine that is valid by construction, so it never retries.
+
+    The Crown connector is picked up front: any space in a different row and
+    column from the Crown that is not Start or next to it. Phases 1-3
+    then run as in the phased engine while keeping that connector's fourth
+    slot free and its Crown direction clear, and never linking it straight to
+    Start. Afterwards the components left over are bridged with cardinal edges,
+    dropping a link from a full space when that is the only way to make
+    room. Bridging only adds cardinal links, so the Crown ends up with
+    exactly one in-edge and at least three steps from Start.
+    """
+    geo = geo or get_geometry()
+    direction = geo.direction
+    types, crown_id = assign_types(start_space_id, rng, geo.count)
+    grid = BitGrid(geo)
+    degree = grid.degree
+    connector_options = [
+        i for i in range(geo.count)
+        if direction(i, crown_id) and i != start_space_id and i not in geo.cardinal[start_space_id]
+    ]
+    connector = rng.choice(connector_options)
+    connector_direction = direction(connector, crown_id)
+    if timer:
+        timer.lap("types")
+
+    def capacity(space_id):
+        return 3 if space_id == connector else 4
+
+    # Phase 1: Connect outside spaces to all cardinal adjacent outside spaces (skip crown)
+    for space_id in geo.outside:
+        if space_id == crown_id:
+            continue
+        for adj in geo.cardinal[space_id]:
+            if adj in geo.outside and adj != crown_id:
+                grid.connect(space_id, adj)
+    if timer:
+        timer.lap("phase1")
+
+    # Phase 2: Non-adjacent connections (5% chance, unique directions, one per quadrant)
+    open_mask = sum(geo.bit[i] for i in range(geo.count) if degree[i] < capacity(i) and i != crown_id)
+    linked_toward = {d: sum(geo.bit[i] for i in range(geo.count) if grid.has_direction(i, d)) for d in ORDINAL_DIRECTIONS}
+    for space_id in range(geo.count):
+        if space_id == crown_id:
+            continue
+        for quadrant in ORDINAL_DIRECTIONS:
+            allowed = open_mask & ~linked_toward[OPPOSITE_DIRECTIONS[quadrant]]
+            for target in non_adjacent_order(geo, space_id, quadrant, rng, allowed):
+                if target == crown_id:
+                    continue
+                if degree[space_id] >= capacity(space_id):
+                    break  # No room left, so nothing in this quadrant can link
+                if degree[target] >= capacity(target):
+                    continue
+                if {space_id, target} == {start_space_id, connector}:
+                    continue
+                inverse_direction = direction(target, space_id)
+                if (space_id == connector and quadrant == connector_direction) or \
+                        (target == connector and inverse_direction == connector_direction):
+                    continue
+                if not grid.has_direction(target, inverse_direction):
+                    if rng.random() < 0.05:
+                        grid.connect(space_id, target)
+                        linked_toward[quadrant] |= geo.bit[space_id]
+                        linked_toward[inverse_direction] |= geo.bit[target]
+                        for end in (space_id, target):
+                            if degree[end] >= capacity(end):
+                                open_mask &= ~geo.bit[end]
+                        break  # Move to next quadrant
+    if timer:
+        timer.lap("phase2")
+
+    # Phase 3: Cardinal adjacent connections for all spaces (50% chance, skip crown)
+    for space_id in range(geo.count):
+        if space_id == crown_id:
+            continue
+        adjacent = list(geo.cardinal[space_id])
+        rng.shuffle(adjacent)
+        for adj in adjacent:
+            if degree[space_id] >= capacity(space_id) or degree[adj] >= capacity(adj):
+                continue
+            if adj == crown_id:
+                continue
+            if rng.random() < 0.5 and not grid.connected(space_id, adj):
+                grid.connect(space_id, adj)
+    if timer:
+        timer.lap("phase3")
+
+    # Bridge leftover components with cardinal edges until every non-crown space is connected
+    cardinal_pairs = [(a, b) for a, b in geo.cardinal_pairs if crown_id not in (a, b)]
+    non_crown = geo.all_mask & ~geo.bit[crown_id]
+    bridges = 0
+    freed = 0
+    while grid.reachable(start_space_id) != non_crown:
+        component = [None] * geo.count
+        for space_id in range(geo.count):
+            if space_id != crown_id and component[space_id] is None:
+                for member in iter_bits(grid.reachable(space_id)):
+                    component[member] = space_id
+        crossing = [(a, b) for a, b in cardinal_pairs if component[a] != component[b]]
+        open_pairs = [(a, b) for a, b in crossing if degree[a] < capacity(a) and degree[b] < capacity(b)]
+        if open_pairs:
+            a, b = rng.choice(open_pairs)
+            grid.connect(a, b)
+            bridges += 1
+            continue
+        # Every crossing edge touches a full space. A full space is missing at least one
+        # cardinal neighbor here, so it holds a non-adjacent link that can be dropped; only
+        # the connector, full at 3, can be holding nothing but cardinal links.
+        full_ends = []
+        for a, b in crossing:
+            for end in (a, b):
+                if degree[end] >= capacity(end) and end not in full_ends:
+                    full_ends.append(end)
+        droppable = {end: [conn for conn in iter_bits(grid.adj[end]) if direction(end, conn)] for end in full_ends}
+        with_links = [end for end in full_ends if droppable[end]]
+        if with_links:
+            full = rng.choice(with_links)
+            grid.disconnect(full, rng.choice(droppable[full]))
+        else:
+            # Drop one of the connector's cardinal links, one that lies on a cycle when there is one
+            links = list(iter_bits(grid.adj[connector]))
+            on_cycle = []
+            for conn in links:
+                grid.disconnect(connector, conn)
+                if grid.reachable(connector) >> conn & 1:
+                    on_cycle.append(conn)
+                grid.connect(connector, conn)
+            grid.disconnect(connector, rng.choice(on_cycle or links))
+        freed += 1
+    if timer:
+        timer.lap("bridge")
+
+    # Phase 5: Crown connection through the reserved connector
+    grid.connect(connector, crown_id)
+    if timer:
+        timer.lap("phase5")
+
+    if stats is not None:
+        stats["attempts"] = 1
+        stats["bridges"] = bridges
+        stats["freed"] = freed
+        stats["crown_fallbacks"] = 0  # The connector is reserved, so phase 5 never falls back
+    spaces = grid.to_spaces(types)
+    if timer:
+        timer.lap("output")
+    return {"spaces": spaces}
+
+
+def create_grid_bulk(start_space_id=12, stats=None, rng=random, geo=None, timer=None):
+    """NumPy engine built for many boards per call (see grid_bulk); here it makes just one.
+
+    The board's randomness comes from rng's first 64 bits, so for a given
+    seed this is the grid grid_bulk.create_grids() makes for the same seed
+    and start space in any batch.
+    """
+    from grid_bulk import generate_boards, to_spaces
+
+    geo = geo or get_geometry()
+    bulk_stats = [] if stats is not None else None
+    types, adj = generate_boards([rng.getrandbits(64)], [start_space_id], geo.rows, geo.cols, bulk_stats)
+    (spaces,) = to_spaces(types, adj)
+    if timer:
+        timer.lap("generate")
+    if stats is not None:
+        stats.update(bulk_stats[0])
+    return {"spaces": spaces}
+
+
+ENGINES = {
+    "phased": create_grid_phased,
+    "constructive": create_grid_constructive,
+    "bulk": create_grid_bulk,
+}
+
+
+def board_geometry(rows=5, cols=None, start_space_id=None):
+    """Geometry for a rows x cols board, checking the board size and (when given) the start space."""
+    geo = get_geometry(rows, cols)
+    if geo.rows < 4 or geo.cols < 4:
+        raise ValueError("boards need at least 4 rows and 4 columns")
+    if start_space_id is not None and not (0 <= start_space_id < geo.count):
+        raise ValueError(f"start_space_id must be between 0 and {geo.count - 1}")
+    return geo
+
+
+def create_grid(start_space_id=12, engine="phased", stats=None, seed=None, rows=5, cols=None, recorder=None):
+    """Generate a grid with the named engine (see ENGINES) on a rows x cols board (square by default).
+
+    All randomness comes from a private random.Random(seed), so the same
+    (start_space_id, engine, seed, board) always yields the same grid.
+    Without a seed a fresh one is drawn; either way it is returned as
+    grid["seed"] so any board can be replayed. stats, when a dict, receives
+    per-grid counters. recorder, when given (see grid_timing), gets the
+    per-phase wall time and counters of this grid, including failed ones.
+    """
+    geo = board_geometry(rows, cols, start_space_id)
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(32)
+    if recorder is None:
+        grid = ENGINES[engine](start_space_id, stats, random.Random(seed), geo=geo)
+        grid["seed"] = seed
+        return grid
+
+    timer = recorder.timer()
+    if stats is None:
+        stats = {}
+    details = {"seed": seed, "start": start_space_id, "rows": geo.rows, "cols": geo.cols}
+    try:
+        grid = ENGINES[engine](start_space_id, stats, random.Random(seed), geo=geo, timer=timer)
+    except Exception:
+        recorder.add(engine, timer, stats, failed=True, **details)
+        raise
+    recorder.add(engine, timer, stats, **details)
+    grid["seed"] = seed
+    return grid
+
+
+def pack_grid(grid):
+    """Encode a grid as compact bytes: per space one (type << 4 | degree) byte then its connection ids.
+
+    Connection ids are one byte each on boards of up to 256 spaces and a
+    little-endian uint16 each on larger ones; the space count comes first,
+    so the width never has to be stored.
+    """
+    spaces = grid["spaces"]
+    wide = len(spaces) > 256
+    out = bytearray(struct.pack("<H", len(spaces)))
+    for space in spaces:
+        connections = space["connections"]
+        if len(connections) > 15:
+            raise ValueError(f"space {space['id']} has too many connections to pack")
+        out.append(SPACE_TYPE_CODES[space["type"]] << 4 | len(connections))
+        if wide:
+            out += struct.pack(f"<{len(connections)}H", *connections)
+        else:
+            out.extend(connections)
+    return bytes(out)
+
+
+def unpack_grid(data, offset=0):
+    """Decode one packed grid starting at offset; returns (grid, next_offset)."""
+    (count,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    id_size = 2 if count > 256 else 1
+    spaces = []
+    for space_id in range(count):
+        header = data[offset]
+        degree = header & 0x0F
+        if id_size == 1:
+            connections = list(data[offset + 1:offset + 1 + degree])
+        else:
+            connections = list(struct.unpack_from(f"<{degree}H", data, offset + 1))
+        spaces.append({"id": space_id, "type": SPACE_TYPES[header >> 4], "connections": connections})
+        offset += 1 + id_size * degree
+    return {"spaces": spaces}, offset
+
+
+def handle_request(request, pool=None, catalogue=None, engine="phased", recorder=None):
+    """Answer one request from the serve loop.
+
+    {"op": "stats"} reports pool and catalogue details, and with a recorder
+    the per-phase timings of every grid generated so far ("reset": true
+    starts them over); anything else is a
+    grid request. A catalogue built for the requested engine answers seeds
+    it covers (and picks one of its seeds for unseeded requests); other
+    unseeded requests for the default engine come from the pool when there
+    is one, and everything else is generated fresh. Requests for a board
+    other than 5x5 ("rows"/"cols") are always generated fresh. Every grid
+    carries the seed it was made from, and with "index": true also the
+    precomputed lookups of grid_index.build_index under "index".
+    """
+    if request.get("op") == "stats":
+        generation = None
+        if recorder is not None:
+            generation = recorder.summary()
+            if request.get("reset"):
+                recorder.reset()
+        return {"stats": {
+            "pool": pool.stats() if pool else None,
+            "catalogue": catalogue.describe() if catalogue else None,
+            "generation": generation,
+        }}
+    start_space_id = int(request.get("start", 12))
+    rows = int(request.get("rows", 5))
+    cols = int(request.get("cols", rows))
+    board_geometry(rows, cols, start_space_id)
+    seed = request.get("seed")
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool)):
+        raise ValueError(f"seed must be an integer, got {seed!r}")
+    request_engine = request.get("engine", engine)
+    if request_engine not in ENGINES:
+        raise ValueError(f"unknown engine {request_engine!r}")
+    grid = None
+    if (rows, cols) != (5, 5):
+        grid = create_grid(start_space_id, request_engine, seed=seed, rows=rows, cols=cols, recorder=recorder)
+    elif catalogue is not None and catalogue.engine == request_engine:
+        if seed is None:
+            seed = catalogue.random_seed()
+        if catalogue.covers(seed):
+            grid = catalogue.get(seed, start_space_id)
+    elif seed is None and pool is not None and request_engine == engine:
+        grid = pool.take(start_space_id)
+    if grid is None:
+        grid = create_grid(start_space_id, request_engine, seed=seed, recorder=recorder)
+    if request.get("index"):
+        from grid_index import build_index
+        grid["index"] = build_index(grid["spaces"], rows, cols)
+    return {"grid": grid}
+
+
+def serve_lines(lines, write, handle):
+    """Read newline-delimited JSON requests and write one JSON response per line.
+
+    Each request looks like {"id": 1, "start": 12, "seed": 42}; "start" and
+    "seed" are optional. Responses echo the id alongside either "grid" or
+    "error" so callers can pipeline several requests on one connection.
+
+    handle may also return (response, payload) with payload as bytes: the
+    response line then carries "payload_bytes" and is followed directly by
+    that many raw bytes, so write must accept bytes as well as text.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        request_id = None
+        payload = None
         try:
-            start_space_id = int(sys.argv[1])
-            if not (0 <= start_space_id < 25):
-                raise ValueError("start_space_id must be between 0 and 24")
+            request = json.loads(line)
+            request_id = request.get("id")
+            response = handle(request)
+            if isinstance(response, tuple):
+                response, payload = response
+                response = {**response, "payload_bytes": len(payload)}
+        except Exception as e:
+            response = {"error": str(e)}
+        response = {"id": request_id, **response}
+        write(json.dumps(response, separators=(",", ":")) + "\n")
+        if payload is not None:
+            write(payload)
+
+
+def serve(socket_path=None, pool_depth=0, pool_store=None, engine="phased", catalogue_path=None, timings=False):
+    """Keep the generator warm in one process and answer requests until EOF.
+
+    Without socket_path requests are read from stdin and answered on stdout.
+    With socket_path a Unix socket is bound there and every client connection
+    gets its own request stream. A positive pool_depth keeps that many grids
+    per start space ready (see grid_pool.GridPool), persisted to pool_store
+    when given. catalogue_path opens a grid_catalogue file for O(1) lookups
+    by seed. engine is the default for requests that do not name one. With
+    timings every grid generated, including pool refills, is timed per phase
+    and the totals are reported by {"op": "stats"} (see grid_timing).
+    """
+    import functools
+    import os
+
+    recorder = None
+    if timings:
+        from grid_timing import GenerationRecorder
+        recorder = GenerationRecorder()
+    pool = None
+    if pool_depth > 0:
+        from grid_pool import GridPool
+        pool = GridPool(pool_depth, pool_store, generate=functools.partial(create_grid, engine=engine, recorder=recorder),
+                        engine=engine)
+    catalogue = None
+    if catalogue_path:
+        from grid_catalogue import Catalogue
+        catalogue = Catalogue(catalogue_path)
+    handle = functools.partial(handle_request, pool=pool, catalogue=catalogue, engine=engine, recorder=recorder)
+
+    try:
+        if socket_path is None:
+            def write(text):
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            serve_lines(sys.stdin, write, handle)
+            return
+
+        import socketserver
+
+        class GridRequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                def write(text):
+                    self.wfile.write(text.encode("utf-8"))
+                    self.wfile.flush()
+
+                serve_lines((raw.decode("utf-8") for raw in self.rfile), write, handle)
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        with socketserver.ThreadingUnixStreamServer(socket_path, GridRequestHandler) as server:
+            server.daemon_threads = True
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os.unlink(socket_path)
+    finally:
+        if pool is not None:
+            pool.close()
+
+
+def main(argv):
+    import argparse
+
+    if argv and argv[0] == "serve":
+        parser = argparse.ArgumentParser(prog="grid_generator.py serve",
+                                         description="Answer newline-delimited JSON grid requests")
+        parser.add_argument("--socket", help="listen on this Unix socket path instead of stdin/stdout")
+        parser.add_argument("--pool-depth", type=int, default=0,
+                            help="keep this many pre-generated grids per start space")
+        parser.add_argument("--pool-store", help="persist the grid pool to this file across restarts")
+        parser.add_argument("--engine", choices=sorted(ENGINES), default="phased")
+        parser.add_argument("--catalogue", help="answer seeds from this grid catalogue file")
+        parser.add_argument("--timings", action="store_true",
+                            help="time every generated grid per phase and report the totals in {\"op\": \"stats\"}")
+        args = parser.parse_args(argv[1:])
+        serve(args.socket, args.pool_depth, args.pool_store, args.engine, args.catalogue, args.timings)
+        return 0
+
+    if argv and argv[0] == "catalogue":
+        from grid_catalogue import write_catalogue
+        parser = argparse.ArgumentParser(prog="grid_generator.py catalogue",
+                                         description="Write every start space's grid for a range of seeds to an indexed file")
+        parser.add_argument("output", help="catalogue file to write")
+        parser.add_argument("--first-seed", type=int, default=0)
+        parser.add_argument("--seeds", type=int, default=1000, help="number of consecutive seeds")
+        parser.add_argument("--engine", choices=sorted(ENGINES), default="phased")
+        parser.add_argument("--workers", type=int, help="generator processes (default: one per core)")
+        args = parser.parse_args(argv[1:])
+        count = write_catalogue(args.output, args.first_seed, args.seeds, args.engine, workers=args.workers)
+        print(json.dumps({"output": args.output, "grids": count}), file=sys.stderr)
+        return 0
+
+    if argv and argv[0] == "batch":
+        from grid_batch import FORMATS, write_batch
+        parser = argparse.ArgumentParser(prog="grid_generator.py batch",
+                                         description="Generate many grids across a process pool")
+        parser.add_argument("count", type=int, help="number of grids to generate")
+        parser.add_argument("--output", "-o", help="write here instead of stdout")
+        parser.add_argument("--format", choices=FORMATS, default="ndjson")
+        parser.add_argument("--engine", choices=sorted(ENGINES), default="phased")
+        parser.add_argument("--first-seed", type=int, default=0)
+        parser.add_argument("--start", type=int, help="use this start space for every grid instead of cycling all of them")
+        parser.add_argument("--rows", type=int, default=5)
+        parser.add_argument("--cols", type=int, help="defaults to --rows")
+        parser.add_argument("--workers", type=int, help="generator processes (default: one per core)")
+        parser.add_argument("--chunk-size", type=int, default=500, help="grids per task handed to a worker")
+        parser.add_argument("--with-stats", action="store_true", help="include per-grid generator counters (ndjson only)")
+        parser.add_argument("--timings", action="store_true",
+                            help="write each grid's per-phase timing record to stderr as a JSON line")
+        args = parser.parse_args(argv[1:])
+        try:
+            board_geometry(args.rows, args.cols, args.start)
         except ValueError as e:
-            print(json.dumps({"error": str(e)}), file=sys.stderr)
-            sys.exit(1)
+            parser.error(str(e))
+        if args.with_stats and args.format != "ndjson":
+            parser.error("--with-stats needs --format ndjson")
+        options = dict(first_seed=args.first_seed, start_space_id=args.start, engine=args.engine, fmt=args.format,
+                       with_stats=args.with_stats, workers=args.workers, chunk_size=args.chunk_size,
+                       rows=args.rows, cols=args.cols, timings=args.timings)
+        try:
+            if args.output:
+                with open(args.output, "wb") as out:
+                    report = write_batch(out, args.count, **options)
+            else:
+                report = write_batch(sys.stdout.buffer, args.count, **options)
+        except BrokenPipeError:
+            # Downstream reader (e.g. `| head`) went away; not an error for us
+            sys.stdout = None
+            return 0
+        print(json.dumps(report), file=sys.stderr)
+        return 0
+
+    parser = argparse.ArgumentParser(prog="grid_generator.py", description="Print one generated grid as JSON")
+    parser.add_argument("start_space_id", nargs="?", default="12")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="phased")
+    parser.add_argument("--seed", type=int, help="reproduce the grid generated from this seed")
+    parser.add_argument("--rows", type=int, default=5, help="board height")
+    parser.add_argument("--cols", type=int, help="board width (defaults to --rows)")
+    parser.add_argument("--timings", action="store_true", help="write the grid's per-phase timing record to stderr")
+    parser.add_argument("--index", action="store_true",
+                        help="attach the precomputed distance/next-hop/teleport index (see grid_index)")
+    args = parser.parse_args(argv)
+    try:
+        start_space_id = int(args.start_space_id)
+        board_geometry(args.rows, args.cols, start_space_id)
+    except ValueError as e:
+        print(json.dumps({"error": str(e)}), file=sys.stderr)
+        return 1
     
-    grid = create_grid(start_space_id)
-    print(json.dumps(grid, indent=2))
\ No newline at end of file
+    recorder = None
+    if args.timings:
+        from grid_timing import GenerationRecorder
+        recorder = GenerationRecorder(emit=sys.stderr)
+    grid = create_grid(start_space_id, args.engine, seed=args.seed, rows=args.rows, cols=args.cols, recorder=recorder)
+    if args.index:
+        from grid_index import build_index
+        grid["index"] = build_index(grid["spaces"], args.rows, args.cols)
+    print(json.dumps(grid, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
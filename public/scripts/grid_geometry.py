@@ -0,0 +1,113 @@
+import functools
+import math
+
+ORDINAL_DIRECTIONS = ["NorthWest", "NorthEast", "SouthWest", "SouthEast"]
+OPPOSITE_DIRECTIONS = {"NorthWest": "SouthEast", "NorthEast": "SouthWest", "SouthWest": "NorthEast", "SouthEast": "NorthWest"}
+
+
+class Geometry:
+    """Lookup tables for a rows x cols board, built once and shared by every generation attempt.
+
+    Spaces are numbered row by row. direction(a, b) follows the generator's
+    rules: None for spaces in the same row or column, otherwise the ordinal
+    direction from a to b. The spaces in direction d from a form a rectangle
+    (quadrant_bounds); its members other than the diagonal neighbour are the
+    phase-2 candidates (non_adjacent). quadrant_mask[a][d] has a bit set for
+    every space in that rectangle. Every table is O(spaces) in size, so large
+    boards stay cheap to build; nothing is indexed by pairs of spaces.
+    """
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.count = rows * cols
+        spaces = range(self.count)
+        self.row_of = tuple(i // cols for i in spaces)
+        self.col_of = tuple(i % cols for i in spaces)
+        self.outside = frozenset(
+            i for i in spaces if self.row_of[i] in (0, rows - 1) or self.col_of[i] in (0, cols - 1)
+        )
+        self.inside = tuple(i for i in spaces if i not in self.outside)
+
+        self.cardinal = tuple(self._neighbors(i, [(-1, 0), (1, 0), (0, -1), (0, 1)]) for i in spaces)
+        self.diagonal = tuple(self._neighbors(i, [(-1, -1), (-1, 1), (1, -1), (1, 1)]) for i in spaces)
+        self.cardinal_pairs = tuple((a, b) for a in spaces for b in self.cardinal[a] if a < b)
+
+        # Bitmask forms: bit i stands for space i
+        self.bit = tuple(1 << i for i in spaces)
+        self.all_mask = (1 << self.count) - 1
+        self.outside_mask = sum(self.bit[i] for i in self.outside)
+        self.diagonal_mask = tuple(sum(self.bit[b] for b in self.diagonal[a]) for a in spaces)
+        # A quadrant is (rows above or below) AND (columns left or right), so it is built
+        # from prefix masks instead of by scanning every other space
+        column = sum(1 << (r * cols) for r in range(rows))
+        rows_before = [(1 << (r * cols)) - 1 for r in range(rows)]
+        rows_after = [self.all_mask & ~((1 << ((r + 1) * cols)) - 1) for r in range(rows)]
+        cols_before = [sum(column << k for k in range(c)) for c in range(cols)]
+        cols_after = [sum(column << k for k in range(c + 1, cols)) for c in range(cols)]
+        self.quadrant_mask = tuple(
+            {
+                "NorthWest": rows_before[r] & cols_before[c],
+                "NorthEast": rows_before[r] & cols_after[c],
+                "SouthWest": rows_after[r] & cols_before[c],
+                "SouthEast": rows_after[r] & cols_after[c],
+            }
+            for r, c in zip(self.row_of, self.col_of)
+        )
+
+    def direction(self, a, b):
+        dr = self.row_of[b] - self.row_of[a]
+        dc = self.col_of[b] - self.col_of[a]
+        if dr == 0 or dc == 0:  # Same row or column
+            return None
+        return ORDINAL_DIRECTIONS[2 * (dr > 0) + (dc > 0)]
+
+    def quadrant_bounds(self, space_id, direction):
+        """(first row, end row, first col, end col) of the spaces in direction from space_id."""
+        r, c = self.row_of[space_id], self.col_of[space_id]
+        row_range = (0, r) if direction.startswith("North") else (r + 1, self.rows)
+        col_range = (0, c) if direction.endswith("West") else (c + 1, self.cols)
+        return row_range + col_range
+
+    def non_adjacent(self, space_id, direction):
+        """Phase-2 candidates in direction from space_id, ascending: the quadrant minus the diagonal neighbour."""
+        r0, r1, c0, c1 = self.quadrant_bounds(space_id, direction)
+        return [
+            r * self.cols + c
+            for r in range(r0, r1) for c in range(c0, c1)
+            if abs(r - self.row_of[space_id]) > 1 or abs(c - self.col_of[space_id]) > 1
+        ]
+
+    def _neighbors(self, space_id, offsets):
+        r, c = self.row_of[space_id], self.col_of[space_id]
+        return tuple(
+            (r + dr) * self.cols + c + dc
+            for dr, dc in offsets
+            if 0 <= r + dr < self.rows and 0 <= c + dc < self.cols
+        )
+
+
+def get_geometry(rows=5, cols=None):
+    """Shared Geometry for a rows x cols board (square when cols is omitted)."""
+    return _cached_geometry(rows, rows if cols is None else cols)
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_geometry(rows, cols):
+    return Geometry(rows, cols)
+
+
+def board_shape(count):
+    """(rows, cols) of a square board with count spaces; other shapes have to be given explicitly."""
+    side = math.isqrt(count)
+    if side * side != count:
+        raise ValueError(f"{count} spaces is not a square board; pass rows and cols")
+    return side, side
+
+
+def iter_bits(mask):
+    """Yield the space ids whose bits are set in mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
@@ -0,0 +1,86 @@
+"""Precomputed lookups shipped with a grid so the game reads graph facts instead of recomputing them.
+
+build_index(spaces) returns a JSON-ready dict (camelCase keys, read by
+public/js) with, for every space id:
+
+    distances[a][b]     steps from a to b along connections (null when unreachable)
+    nextHop[a]          connections of a that are one step closer to the Crown
+                        (every equally short option; empty on the Crown)
+    teleportTargets[a]  spaces a Teleport from a can land on: not a, not connected to a
+    neighbors[a]        connections of a grouped by compass direction, named
+                        as utils.js getDirection() names them
+    crownId             the Crown's space id
+
+It is built once per room (grid_generator.py serve answers {"index": true}
+requests with it attached) and is a few KiB of JSON for a 5x5 board.
+"""
+from collections import deque
+
+from grid_geometry import board_shape, get_geometry
+
+
+def compass_direction(geo, a, b):
+    """The direction from a to b as utils.js getDirection() reports it, or None for a non-adjacent same row/column."""
+    dr = geo.row_of[b] - geo.row_of[a]
+    dc = geo.col_of[b] - geo.col_of[a]
+    if dr == -1 and dc == 0:
+        return "North"
+    if dr == 1 and dc == 0:
+        return "South"
+    if dr == 0 and dc == 1:
+        return "East"
+    if dr == 0 and dc == -1:
+        return "West"
+    if dr == 0 or dc == 0:
+        return None
+    return ("North" if dr < 0 else "South") + ("west" if dc < 0 else "east")
+
+
+def bfs_distances(connections, start):
+    distances = [None] * len(connections)
+    distances[start] = 0
+    queue = deque([start])
+    while queue:
+        current = queue.popleft()
+        step = distances[current] + 1
+        for neighbor in connections[current]:
+            if distances[neighbor] is None:
+                distances[neighbor] = step
+                queue.append(neighbor)
+    return distances
+
+
+def build_index(spaces, rows=None, cols=None):
+    """Index a grid given as its list of {"id", "type", "connections"} spaces (see the module docstring)."""
+    if rows is None:
+        rows, cols = board_shape(len(spaces))
+    geo = get_geometry(rows, cols)
+    connections = [space["connections"] for space in sorted(spaces, key=lambda space: space["id"])]
+    count = len(connections)
+    crown_id = next(space["id"] for space in spaces if space["type"] == "Crown")
+
+    distances = [bfs_distances(connections, a) for a in range(count)]
+    to_crown = distances[crown_id]  # Connections are two-way, so distances are symmetric
+
+    next_hop = []
+    teleport_targets = []
+    neighbors = []
+    for a, linked in enumerate(connections):
+        here = to_crown[a]
+        next_hop.append([b for b in linked if here is not None and to_crown[b] is not None and to_crown[b] < here])
+        linked_set = set(linked)
+        teleport_targets.append([b for b in range(count) if b != a and b not in linked_set])
+        by_direction = {}
+        for b in linked:
+            direction = compass_direction(geo, a, b)
+            if direction is not None:
+                by_direction.setdefault(direction, []).append(b)
+        neighbors.append(by_direction)
+
+    return {
+        "crownId": crown_id,
+        "distances": distances,
+        "nextHop": next_hop,
+        "teleportTargets": teleport_targets,
+        "neighbors": neighbors,
+    }
@@ -0,0 +1,160 @@
+import os
+import struct
+import threading
+import time
+from collections import deque
+
+from grid_generator import create_grid, pack_grid, unpack_grid
+
+STORE_MAGIC = b"BCQP"
+STORE_VERSION = 3
+# magic, version, engine name, rows, cols, grid count
+STORE_HEADER = struct.Struct("<4sB16sHHI")
+
+
+class GridPool:
+    """Keeps `depth` ready-made grids per start space and refills them on a background thread.
+
+    take() pops a pooled grid when one is available (a hit) and otherwise
+    generates inline (a miss). The pool can be persisted with save() and is
+    reloaded from `store_path` on construction, so a restarted worker starts hot.
+    engine, rows and cols describe what generate() makes; they are written
+    into the store, and a store made for another engine or board is skipped.
+    """
+
+    def __init__(self, depth=4, store_path=None, generate=create_grid, engine="phased", rows=5, cols=None):
+        self.depth = depth
+        self.store_path = store_path
+        self.generate = generate
+        self.engine = engine
+        self.rows = rows
+        self.cols = rows if cols is None else cols
+        self.grids = {start: deque() for start in range(self.rows * self.cols)}
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self.refill_seconds = 0.0
+        self.refill_max_seconds = 0.0
+        self.dirty = False
+        self._wakeup = threading.Condition()
+        self._stopped = False
+        if store_path and os.path.exists(store_path):
+            self.load(store_path)
+        self._thread = threading.Thread(target=self._refill_loop, name="grid-pool-refill", daemon=True)
+        self._thread.start()
+
+    def take(self, start_space_id):
+        with self._wakeup:
+            bucket = self.grids[start_space_id]
+            grid = bucket.popleft() if bucket else None
+            if grid is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.dirty = True
+            self._wakeup.notify()
+        if grid is None:
+            grid = self.generate(start_space_id)
+        return grid
+
+    def _next_start(self):
+        """Start space with the fewest pooled grids, or None when every bucket is full."""
+        start = min(self.grids, key=lambda s: len(self.grids[s]))
+        return start if len(self.grids[start]) < self.depth else None
+
+    def _refill_loop(self):
+        while True:
+            with self._wakeup:
+                start = self._next_start()
+                while start is None and not self._stopped:
+                    if self.dirty and self.store_path:
+                        self.dirty = False
+                        self._wakeup.release()
+                        try:
+                            self.save(self.store_path)
+                        finally:
+                            self._wakeup.acquire()
+                    else:
+                        self._wakeup.wait()
+                    start = self._next_start()
+                if self._stopped:
+                    return
+            began = time.perf_counter()
+            grid = self.generate(start)
+            elapsed = time.perf_counter() - began
+            with self._wakeup:
+                self.grids[start].append(grid)
+                self.refills += 1
+                self.refill_seconds += elapsed
+                self.refill_max_seconds = max(self.refill_max_seconds, elapsed)
+                self.dirty = True
+
+    def stats(self):
+        with self._wakeup:
+            lookups = self.hits + self.misses
+            return {
+                "target_depth": self.depth,
+                "depth": {str(start): len(bucket) for start, bucket in self.grids.items()},
+                "pooled": sum(len(bucket) for bucket in self.grids.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "refills": self.refills,
+                "refill_ms_mean": 1000 * self.refill_seconds / self.refills if self.refills else None,
+                "refill_ms_max": 1000 * self.refill_max_seconds,
+            }
+
+    def save(self, path):
+        """Write every pooled grid to `path` atomically (STORE_HEADER, then seed + packed grid each)."""
+        with self._wakeup:
+            grids = [grid for bucket in self.grids.values() for grid in bucket]
+        data = bytearray(STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION, self.engine.encode("ascii"),
+                                           self.rows, self.cols, len(grids)))
+        for grid in grids:
+            data += struct.pack("<Q", grid["seed"])
+            data += pack_grid(grid)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Add the grids stored at `path`, bucketed by their Start space.
+
+        Stores that are unreadable, truncated, from another store version or
+        made for another engine or board size are ignored as a whole.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            magic, version, engine, rows, cols, count = STORE_HEADER.unpack_from(data, 0)
+            if magic != STORE_MAGIC or version != STORE_VERSION:
+                return 0
+            if (engine.rstrip(b"\0").decode("ascii"), rows, cols) != (self.engine, self.rows, self.cols):
+                return 0
+            offset = STORE_HEADER.size
+            stored = []
+            for _ in range(count):
+                (seed,) = struct.unpack_from("<Q", data, offset)
+                grid, offset = unpack_grid(data, offset + 8)
+                grid["seed"] = seed
+                stored.append(grid)
+            starts = [next(s["id"] for s in grid["spaces"] if s["type"] == "Start") for grid in stored]
+        except (OSError, IndexError, KeyError, StopIteration, struct.error, ValueError):
+            return 0
+        loaded = 0
+        with self._wakeup:
+            for grid, start in zip(stored, starts):
+                if start in self.grids and len(self.grids[start]) < self.depth:
+                    self.grids[start].append(grid)
+                    loaded += 1
+        return loaded
+
+    def close(self):
+        """Stop refilling and persist what is left in the pool."""
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify()
+        self._thread.join()
+        if self.store_path:
+            self.save(self.store_path)
@@ -0,0 +1,216 @@
+"""Monte Carlo statistics over generated grids, computed on NumPy adjacency arrays.
+
+Usage:
+    python3 grid_stats.py grids.bin            # a file written by `grid_generator.py batch`
+    python3 grid_stats.py --generate 100000    # generate (with counters) and analyse in one go
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from grid_generator import ENGINES, SPACE_TYPE_CODES, SPACE_TYPES
+from grid_geometry import board_shape
+
+UNREACHABLE = -1
+
+
+def pack_arrays(grids):
+    """Adjacency (K, N, N) bool, type codes (K, N) and Start/Crown ids (K,) for a list of grids."""
+    count = len(grids)
+    size = len(grids[0]["spaces"])
+    adjacency = np.zeros((count, size, size), dtype=bool)
+    types = np.empty((count, size), dtype=np.int8)
+    ks, src, dst = [], [], []
+    for k, grid in enumerate(grids):
+        types[k] = [SPACE_TYPE_CODES[space["type"]] for space in grid["spaces"]]
+        for space in grid["spaces"]:
+            connections = space["connections"]
+            ks.extend([k] * len(connections))
+            src.extend([space["id"]] * len(connections))
+            dst.extend(connections)
+    adjacency[ks, src, dst] = True
+    start = (types == SPACE_TYPE_CODES["Start"]).argmax(axis=1)
+    crown = (types == SPACE_TYPE_CODES["Crown"]).argmax(axis=1)
+    return adjacency, types, start, crown
+
+
+def all_pairs_distances(adjacency):
+    """Shortest path lengths for every grid at once: BFS expanded one layer per batched matmul.
+
+    Returns (K, N, N) int16 with UNREACHABLE where there is no path.
+    """
+    count, size, _ = adjacency.shape
+    step_matrix = adjacency.astype(np.float32)
+    reached = np.broadcast_to(np.eye(size, dtype=bool), adjacency.shape).copy()
+    distances = np.where(reached, 0, UNREACHABLE).astype(np.int16)
+    for step in range(1, size):
+        expanded = reached | (np.matmul(reached.astype(np.float32), step_matrix) > 0)
+        newly = expanded & ~reached
+        if not newly.any():
+            break
+        distances[newly] = step
+        reached = expanded
+    return distances
+
+
+def ordinal_mask(rows, cols):
+    """(N, N) bool, True where two spaces share neither row nor column (a phase-2 or Crown link)."""
+    space_rows, space_cols = np.divmod(np.arange(rows * cols), cols)
+    return (space_rows[:, None] != space_rows[None, :]) & (space_cols[:, None] != space_cols[None, :])
+
+
+def add_counts(totals, key, values):
+    """Accumulate np.bincount(values) into totals[key], growing it as larger values show up."""
+    counts = np.bincount(values.ravel())
+    current = totals[key]
+    if len(counts) > len(current):
+        current = np.concatenate([current, np.zeros(len(counts) - len(current), dtype=np.int64)])
+    current[:len(counts)] += counts
+    totals[key] = current
+
+
+def summarize(grids, rows=None, cols=None):
+    """Statistics over a list of grids on a rows x cols board (square by default).
+
+    Grids are processed in chunks sized so the (K, N, N) arrays stay around
+    16M cells whatever the board size.
+    """
+    if rows is None:
+        rows, cols = board_shape(len(grids[0]["spaces"]))
+    elif cols is None:
+        cols = rows
+    ordinal = ordinal_mask(rows, cols)
+    chunk_size = max(1, (1 << 24) // (rows * cols) ** 2)
+    empty = np.zeros(0, dtype=np.int64)
+    totals = {
+        "grids": 0,
+        "invalid": 0,
+        "crown_distance": empty,
+        "degree": empty,
+        "non_adjacent_links": empty,
+        "diameter": empty,
+        "type_counts": None,
+    }
+    for begin in range(0, len(grids), chunk_size):
+        adjacency, types, start, crown = pack_arrays(grids[begin:begin + chunk_size])
+        count, size, _ = adjacency.shape
+        index = np.arange(count)
+        distances = all_pairs_distances(adjacency)
+
+        from_start = distances[index, start]
+        crown_distance = from_start[index, crown]
+        # The rules validate_grid enforces: no space has more than 4 connections, every space is
+        # reachable from Start, the Crown has exactly one connection and sits at least 3 steps away
+        invalid = ((adjacency.sum(axis=2) > 4).any(axis=1) | (from_start == UNREACHABLE).any(axis=1)
+                   | (adjacency[index, crown].sum(axis=1) != 1) | (crown_distance < 3))
+        totals["grids"] += count
+        totals["invalid"] += int(invalid.sum())
+        add_counts(totals, "crown_distance", crown_distance[crown_distance >= 0])
+        add_counts(totals, "degree", adjacency.sum(axis=2))
+
+        # Ordinal links not touching the Crown are the ones phase 2 made; count each pair once
+        touches_crown = np.zeros_like(adjacency)
+        touches_crown[index, crown, :] = True
+        touches_crown[index, :, crown] = True
+        links = adjacency & ordinal & ~touches_crown
+        add_counts(totals, "non_adjacent_links", (links | links.transpose(0, 2, 1)).sum(axis=(1, 2)) // 2)
+
+        eccentricity = distances.max(axis=(1, 2))
+        add_counts(totals, "diameter", eccentricity[eccentricity >= 0])
+
+        counts = np.stack([(types == code).sum(axis=0) for code in range(len(SPACE_TYPES))], axis=1)
+        totals["type_counts"] = counts if totals["type_counts"] is None else totals["type_counts"] + counts
+
+    fallbacks = [grid["stats"].get("crown_fallbacks", 0) for grid in grids if "stats" in grid]
+    return report(totals, fallbacks)
+
+
+def histogram(counts):
+    """{value: count} for the non-zero buckets of a bincount."""
+    return {int(value): int(n) for value, n in enumerate(counts) if n}
+
+
+def mean(counts):
+    total = counts.sum()
+    return float((np.arange(len(counts)) * counts).sum() / total) if total else None
+
+
+def report(totals, fallbacks):
+    grids = totals["grids"]
+    frequencies = totals["type_counts"] / grids
+    return {
+        "grids": grids,
+        "invalid": totals["invalid"],
+        "crown_distance": histogram(totals["crown_distance"]),
+        "crown_distance_mean": mean(totals["crown_distance"]),
+        "degree": histogram(totals["degree"]),
+        "degree_mean": mean(totals["degree"]),
+        "non_adjacent_links": histogram(totals["non_adjacent_links"]),
+        "non_adjacent_links_mean": mean(totals["non_adjacent_links"]),
+        "diameter": histogram(totals["diameter"]),
+        # Share of grids where phase 5 had to clear links to reach the Crown; needs per-grid counters
+        "crown_fallback_rate": sum(1 for n in fallbacks if n) / len(fallbacks) if fallbacks else None,
+        "type_frequency": {
+            name: [round(float(f), 4) for f in frequencies[:, code]]
+            for code, name in enumerate(SPACE_TYPES)
+        },
+    }
+
+
+def generate(count, engine, first_seed=0, workers=None, rows=5, cols=None):
+    from grid_batch import iter_chunks
+    grids = []
+    for chunk in iter_chunks(count, first_seed, engine=engine, with_stats=True, workers=workers, rows=rows, cols=cols):
+        grids.extend(json.loads(line) for line in chunk.splitlines())
+    return grids
+
+
+def print_report(result):
+    print(f"{result['grids']} grids, {result['invalid']} invalid")
+    for key in ("crown_distance", "degree", "non_adjacent_links", "diameter"):
+        values = "  ".join(f"{value}:{n}" for value, n in result[key].items())
+        average = result.get(f"{key}_mean")
+        suffix = f"  (mean {average:.2f})" if average is not None else ""
+        print(f"{key:>20}  {values}{suffix}")
+    rate = result["crown_fallback_rate"]
+    print(f"{'crown_fallback_rate':>20}  {'n/a (no per-grid counters)' if rate is None else f'{100 * rate:.2f}%'}")
+    print("type frequency per space:")
+    for name, row in result["type_frequency"].items():
+        if any(row):
+            print(f"{name:>20}  " + " ".join(f"{f:.2f}" for f in row))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="grid_stats.py", description=__doc__.splitlines()[0])
+    parser.add_argument("input", nargs="?", help="NDJSON or binary batch file from `grid_generator.py batch`")
+    parser.add_argument("--generate", type=int, metavar="COUNT", help="generate this many grids instead of reading a file")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="phased")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="generator processes (default: one per core)")
+    parser.add_argument("--rows", type=int, help="board height (default: the square board that fits the grids)")
+    parser.add_argument("--cols", type=int, help="board width (defaults to --rows)")
+    parser.add_argument("--json", action="store_true", help="print the statistics as JSON")
+    args = parser.parse_args(argv)
+    if (args.input is None) == (args.generate is None):
+        parser.error("give either an input file or --generate COUNT")
+
+    if args.generate is not None:
+        grids = generate(args.generate, args.engine, args.first_seed, args.workers, args.rows or 5, args.cols)
+    else:
+        from grid_batch import read_batch
+        grids = list(read_batch(args.input))
+    if not grids:
+        parser.error("no grids to analyse")
+
+    result = summarize(grids, args.rows, args.cols)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print_report(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,137 @@
+"""Where grid generation time goes: per-phase wall time and per-grid counters.
+
+Instrumentation is off unless a recorder is passed to create_grid(); the
+engines then get a PhaseTimer and call lap() after each phase. Without one
+they only test `if timer:` a handful of times per grid.
+
+Usage:
+    python3 grid_generator.py 12 --timings                        # one grid, its record on stderr
+    python3 grid_generator.py batch 10000 -o /dev/null --timings 2> timings.ndjson
+    python3 grid_timing.py timings.ndjson                         # aggregate those records
+"""
+import json
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class PhaseTimer:
+    """Wall time per phase of one grid. lap(phase) charges the time since the previous lap to phase."""
+
+    __slots__ = ("phases", "began", "last")
+
+    def __init__(self):
+        self.phases = {}
+        self.began = self.last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def total(self):
+        return self.last - self.began
+
+
+class GenerationRecorder:
+    """Aggregates PhaseTimer results and engine counters over many grids; safe to share between threads.
+
+    With emit (a text file such as sys.stderr) every grid is also written
+    there as one JSON line, the same records summarize_records() reads back.
+    """
+
+    def __init__(self, emit=None):
+        self.emit = emit
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.grids = 0
+            self.failed = 0
+            self.seconds = Counter()
+            self.engines = Counter()
+            self.attempts = Counter()
+            self.failures = Counter()
+            self.counters = Counter()
+            self.fallback_grids = 0
+
+    def timer(self):
+        return PhaseTimer()
+
+    def add(self, engine, timer, stats, failed=False, **details):
+        """Record one grid: its timer, the stats dict its engine filled in, and identifying details (seed, start)."""
+        record = grid_record(engine, timer, stats, failed, **details)
+        self.add_record(record)
+        if self.emit is not None:
+            self.emit.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self.emit.flush()
+
+    def add_record(self, record):
+        with self._lock:
+            self.grids += 1
+            self.failed += int(record["failed"])
+            self.engines[record["engine"]] += 1
+            for phase, us in record["phases_us"].items():
+                self.seconds[phase] += us / 1e6
+            self.seconds["total"] += record["total_us"] / 1e6
+            self.attempts[record["attempts"]] += 1
+            self.failures.update(record["failures"])
+            self.counters.update(record["counters"])
+            self.fallback_grids += int(record["counters"].get("crown_fallbacks", 0) > 0)
+
+    def summary(self):
+        """Totals and per-grid means, shaped for JSON."""
+        with self._lock:
+            grids = self.grids
+            total = self.seconds["total"]
+            return {
+                "grids": grids,
+                "failed": self.failed,
+                "engines": dict(self.engines),
+                "mean_us": {phase: round(1e6 * s / grids, 1) for phase, s in self.seconds.items()} if grids else {},
+                "share": {phase: round(s / total, 4) for phase, s in self.seconds.items() if phase != "total"}
+                if total else {},
+                "attempts": {str(n): count for n, count in sorted(self.attempts.items())},
+                "validation_failures": dict(self.failures),
+                "counters": dict(self.counters),
+                "crown_fallback_grids": self.fallback_grids,
+            }
+
+
+def grid_record(engine, timer, stats, failed=False, **details):
+    stats = stats or {}
+    counters = {key: value for key, value in stats.items() if key not in ("attempts", "failures")}
+    return {
+        "engine": engine,
+        **details,
+        "failed": failed,
+        "total_us": round(1e6 * timer.total(), 1),
+        "phases_us": {phase: round(1e6 * s, 1) for phase, s in timer.phases.items()},
+        "attempts": stats.get("attempts", 1),
+        "failures": stats.get("failures", {}),
+        "counters": counters,
+    }
+
+
+def summarize_records(lines):
+    """Aggregate per-grid JSON records (as written with emit), skipping any other lines."""
+    recorder = GenerationRecorder()
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and "phases_us" in record:
+            recorder.add_record(record)
+    return recorder.summary()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] != "-":
+        with open(sys.argv[1], encoding="utf-8") as f:
+            result = summarize_records(f)
+    else:
+        result = summarize_records(sys.stdin)
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def image_key(grid_data, players_data, options):
+    """sha256 over the canonical JSON of everything that decides the rendered image.
+
+    Equal inputs always give the same key, so it doubles as the image's ETag.
+    options should carry the render settings (size, dpi, format, renderer
+    version) so that changing any of them changes the key.
+    """
+    canonical = json.dumps([grid_data, players_data or [], options], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ImageCache:
+    """Size-bounded LRU of rendered images keyed by image_key, with an optional disk tier.
+
+    Memory holds up to max_bytes of images. When disk_dir is given every
+    image is also written there, named by its key (e.g. <hash>.png), so
+    other workers and restarts can reuse it; the directory is trimmed,
+    oldest first, to disk_max_bytes. A memory miss that hits disk is promoted back to memory.
+    The directory's size and file count are measured once at startup and kept
+    up to date by put, so the directory is only listed again when it outgrows
+    disk_max_bytes.
+    """
+
+    def __init__(self, max_bytes=32 << 20, disk_dir=None, disk_max_bytes=256 << 20):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.images = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_bytes = 0
+        self.disk_files = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self.disk_bytes, self.disk_files = self._measure_disk()
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key)
+
+    def get(self, key):
+        with self._lock:
+            data = self.images.get(key)
+            if data is not None:
+                self.images.move_to_end(key)
+                self.hits += 1
+                return data
+        if self.disk_dir:
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+                os.utime(self._path(key))  # Keep recently used files out of the trim
+            except FileNotFoundError:
+                data = None  # Not written yet, or trimmed by another process sharing the directory
+            if data is not None:
+                self._remember(key, data)
+                with self._lock:
+                    self.disk_hits += 1
+                return data
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, data):
+        self._remember(key, data)
+        if self.disk_dir:
+            path = self._path(key)
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.disk_dir)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = None
+            os.replace(tmp_path, path)
+            with self._lock:
+                if replaced is None:
+                    self.disk_files += 1
+                    self.disk_bytes += len(data)
+                else:
+                    self.disk_bytes += len(data) - replaced
+                over = self.disk_bytes > self.disk_max_bytes
+            if over:
+                self._trim_disk()
+
+    def _remember(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self.images.pop(key, None)
+            if previous is not None:
+                self.bytes -= len(previous)
+            self.images[key] = data
+            self.bytes += len(data)
+            while self.bytes > self.max_bytes:
+                _, evicted = self.images.popitem(last=False)
+                self.bytes -= len(evicted)
+
+    def _scan_disk(self):
+        entries = []
+        with os.scandir(self.disk_dir) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue  # Trimmed by another worker mid-scan
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _measure_disk(self):
+        entries = self._scan_disk()
+        return sum(size for _, size, _ in entries), len(entries)
+
+    def _trim_disk(self):
+        # Rescan rather than trust the running totals: other workers share the
+        # directory, so this is also where their writes are picked up.
+        entries = self._scan_disk()
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            count -= 1
+        with self._lock:
+            self.disk_bytes, self.disk_files = total, count
+
+    def stats(self):
+        with self._lock:
+            return {
+                "images": len(self.images),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "disk_dir": self.disk_dir,
+                "disk_bytes": self.disk_bytes,
+                "disk_files": self.disk_files,
+            }
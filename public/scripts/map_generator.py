@@ -1,233 +1,486 @@
-import matplotlib.pyplot as plt
-from matplotlib.patches import Patch, FancyBboxPatch
-from matplotlib.patches import FancyArrowPatch
+import base64
+import hashlib
+import importlib
 import json
 import sys
-import base64
-from io import BytesIO
-import numpy as np
-
-def generate_map_image(grid_data, players_data=None):
-    color_map = {
-        "Shop": "gold",
-        "Neutral": "lightgray",
-        "Teleport": "purple",
-        "Bad": "red",
-        "Good": "green",
-        "Crown": "orange",
-        "Start": "blue",
-        "Combat": "brown",
-        "Shadow Realm": "black"
-    }
-    
-    fig, ax = plt.subplots(figsize=(10, 10))
-    
-    pos = {}
-    size = 5
-    for node in grid_data:
-        node_id = node["id"]
-        x = node_id % size
-        y = size - 1 - (node_id // size)
-        pos[node_id] = (x, y)
-    
-    # Helper function to check if connection is adjacent
-    def is_adjacent(id1, id2):
-        x1, y1 = pos[id1]
-        x2, y2 = pos[id2]
-        return abs(x1 - x2) <= 1 and abs(y1 - y2) <= 1
-    
-    # Helper function to create curved line
-    def get_control_point(x1, y1, x2, y2, curve_strength=0.3):
-        """Calculate control point for quadratic Bezier curve"""
-        # Midpoint
-        mid_x = (x1 + x2) / 2
-        mid_y = (y1 + y2) / 2
-        
-        # Perpendicular vector
-        dx = x2 - x1
-        dy = y2 - y1
-        length = np.sqrt(dx**2 + dy**2)
-        
-        if length == 0:
-            return mid_x, mid_y
-        
-        # Perpendicular offset (curve away from center)
-        perp_x = -dy / length
-        perp_y = dx / length
-        
-        # Control point offset from midpoint
-        offset = curve_strength * length
-        control_x = mid_x + perp_x * offset
-        control_y = mid_y + perp_y * offset
-        
-        return control_x, control_y
-    
-    # Separate connections into adjacent and non-adjacent
-    adjacent_connections = []
-    non_adjacent_connections = []
-    processed_pairs = set()
-    
-    for node in grid_data:
-        node_id = node["id"]
-        for conn in node["connections"]:
-            # Skip if we've already drawn this connection (undirected)
-            pair = tuple(sorted([node_id, conn]))
-            if pair in processed_pairs:
-                continue
-            processed_pairs.add(pair)
-            
-            if is_adjacent(node_id, conn):
-                adjacent_connections.append((node_id, conn))
-            else:
-                non_adjacent_connections.append((node_id, conn))
-    
-    # Draw adjacent connections (straight, gray, thin)
-    for node_id, conn in adjacent_connections:
-        x_values = [pos[node_id][0], pos[conn][0]]
-        y_values = [pos[node_id][1], pos[conn][1]]
-        ax.plot(x_values, y_values, color='gray', linewidth=2, zorder=1, alpha=0.6)
-    
-    # Draw non-adjacent connections (curved, colorful, thicker, with arrows)
-    colors = ['#FF1493', '#00CED1', '#FFD700', '#FF4500', '#9370DB', 
-              '#32CD32', '#FF69B4', '#1E90FF', '#FFA500', '#00FA9A']
-    
-    for idx, (node_id, conn) in enumerate(non_adjacent_connections):
-        x1, y1 = pos[node_id]
-        x2, y2 = pos[conn]
-        
-        # Get control point for curve
-        cx, cy = get_control_point(x1, y1, x2, y2, curve_strength=0.25)
-        
-        # Create curved path using quadratic Bezier
-        t = np.linspace(0, 1, 100)
-        curve_x = (1-t)**2 * x1 + 2*(1-t)*t * cx + t**2 * x2
-        curve_y = (1-t)**2 * y1 + 2*(1-t)*t * cy + t**2 * y2
-        
-        # Choose color
-        color = colors[idx % len(colors)]
-        
-        # Draw curved line with dashed style
-        ax.plot(curve_x, curve_y, color=color, linewidth=2.5, 
-                linestyle='--', zorder=2, alpha=0.8)
-        
-        # Add small circles at endpoints to show connection clearly
-        ax.plot(x1, y1, 'o', color=color, markersize=4, zorder=3, alpha=0.8)
-        ax.plot(x2, y2, 'o', color=color, markersize=4, zorder=3, alpha=0.8)
-        
-        # Add connection label at midpoint
-        label_x = (1-0.5)**2 * x1 + 2*(1-0.5)*0.5 * cx + 0.5**2 * x2
-        label_y = (1-0.5)**2 * y1 + 2*(1-0.5)*0.5 * cy + 0.5**2 * y2
-        ax.text(label_x, label_y, f'{node_id}↔{conn}', 
-                fontsize=7, color=color, weight='bold',
-                bbox=dict(boxstyle='round,pad=0.3', facecolor='white', 
-                         edgecolor=color, alpha=0.8),
-                ha='center', va='center', zorder=4)
-    
-    # Draw nodes with labels
-    for node in grid_data:
-        x, y = pos[node["id"]]
-        node_type = node["type"]
-        color = color_map.get(node_type, "white")
-        
-        # Draw node circle
-        ax.scatter(x, y, s=800, color=color, edgecolors='black', 
-                  linewidths=2.5, zorder=5)
-        
-        # Add node ID label
-        ax.text(x, y, str(node["id"]), fontsize=11, weight='bold',
-               ha='center', va='center', zorder=6, color='white' if node_type in ['Shadow Realm', 'Combat'] else 'black')
-    
-    # Draw player positions
-    if players_data:
-        player_colors = ['#FF6B6B', '#4ECDC4', '#95E1D3']  # Red, Teal, Mint
-        player_markers = ['o', 's', '^']  # Circle, Square, Triangle
-        
-        for idx, player in enumerate(players_data):
-            player_pos = player.get('position')
-            player_name = player.get('name', f'Player {idx + 1}')
-            if player_pos is not None and player_pos in pos:
-                x, y = pos[player_pos]
-                # Draw player marker with distinct shape
-                offset = (idx - 1) * 0.25
-                ax.scatter(x + offset * 0.4, y - 0.3, s=250, 
-                          color=player_colors[idx % len(player_colors)], 
-                          edgecolors='white', linewidth=2.5, zorder=7,
-                          marker=player_markers[idx % len(player_markers)])
-                
-                # Add player name label below node
-                ax.text(x + offset * 0.4, y - 0.5, player_name[:8], 
-                       fontsize=8, weight='bold',
-                       ha='center', va='top', zorder=7,
-                       color=player_colors[idx % len(player_colors)],
-                       bbox=dict(boxstyle='round,pad=0.3', 
-                                facecolor='white', alpha=0.9))
-    
-    # Create legend
-    legend_elements = [Patch(facecolor=color, edgecolor='black', label=type_name)
-                       for type_name, color in color_map.items()]
-    
-    # Add connection type indicators to legend
-    legend_elements.append(plt.Line2D([0], [0], color='gray', linewidth=2, 
-                                     label='Adjacent Connection'))
-    legend_elements.append(plt.Line2D([0], [0], color='purple', linewidth=2.5, 
-                                     linestyle='--', label='Non-Adjacent Connection'))
-    
-    # Add player legend if players exist
-    if players_data:
-        player_colors = ['#FF6B6B', '#4ECDC4', '#95E1D3']
-        player_markers = ['o', 's', '^']
-        for idx, player in enumerate(players_data):
-            legend_elements.append(plt.Line2D([0], [0], marker=player_markers[idx % len(player_markers)], 
-                                             color='w', 
-                                             markerfacecolor=player_colors[idx % len(player_colors)], 
-                                             markersize=10, 
-                                             label=player.get('name', f'Player {idx + 1}')))
-    
-    ax.legend(handles=legend_elements, title="Legend", 
-             bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=9)
-    
-    # Styling
-    ax.set_xlim(-0.8, size - 0.2)
-    ax.set_ylim(-0.8, size - 0.2)
-    ax.set_xticks([])
-    ax.set_yticks([])
-    ax.set_aspect('equal')
-    ax.set_title("Blind Crown Quest - Final Map", fontsize=18, weight='bold', pad=20)
-    ax.set_facecolor('#F5F5DC')  # Beige background
-    plt.grid(False)
-    plt.tight_layout()
-    
-    # Save to bytes
-    buf = BytesIO()
-    plt.savefig(buf, format='png', dpi=120, bbox_inches='tight', facecolor='#F5F5DC')
-    buf.seek(0)
-    
-    # Encode to base64
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    plt.close(fig)
-    
-    return img_base64
+from collections import OrderedDict
+
+from grid_geometry import board_shape
+from image_cache import ImageCache, image_key
+
+RENDER_VERSION = 2  # Bump whenever the drawing changes, so cached images and ETags go stale
+CONTENT_TYPES = {"png": "image/png", "webp": "image/webp", "svg": "image/svg+xml"}
+# Renderer name -> (module, board class, formats it writes); modules are imported on first use,
+# so the svg and pillow backends never pay for importing matplotlib (about half a second)
+BACKENDS = {
+    "matplotlib": ("map_matplotlib", "BoardImage", ("png", "webp")),
+    "pillow": ("map_lite", "PillowBoard", ("png", "webp")),
+    "svg": ("map_lite", "SvgBoard", ("svg",)),
+}
+DEFAULT_BACKEND = "matplotlib"
+
+
+def resolve_backend(backend=None, fmt=None):
+    """(backend, format) for a render: svg output implies the svg backend, and each backend has a default format."""
+    if backend is None:
+        backend = "svg" if fmt == "svg" else DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown map backend: {backend}")
+    formats = BACKENDS[backend][2]
+    fmt = fmt or formats[0]
+    if fmt not in formats:
+        raise ValueError(f"The {backend} backend cannot write {fmt}")
+    return backend, fmt
+
+
+def board_class(backend):
+    module, name, _ = BACKENDS[backend]
+    return getattr(importlib.import_module(module), name)
+
+
+class BoardCache:
+    """LRU of drawn boards, keyed by room (or by the grid itself when no key is given).
+
+    Each entry remembers a fingerprint of the grid it was drawn from, so a
+    key that comes back with a different grid is redrawn rather than served
+    stale. evict() drops a board as soon as its room ends.
+    """
+
+    def __init__(self, max_boards=8):
+        self.max_boards = max_boards
+        self.boards = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def board(self, key, grid_data, rows=None, cols=None, backend=DEFAULT_BACKEND):
+        fingerprint = hashlib.sha1(json.dumps([grid_data, rows, cols, backend], sort_keys=True).encode("utf-8")).hexdigest()
+        key = key or fingerprint
+        entry = self.boards.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            self.boards.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        self.evict(key)
+        board = board_class(backend)(grid_data, rows, cols)
+        self.boards[key] = (fingerprint, board)
+        while len(self.boards) > self.max_boards:
+            _, (_, oldest) = self.boards.popitem(last=False)
+            oldest.close()
+        return board
+
+    def evict(self, key):
+        entry = self.boards.pop(key, None)
+        if entry is not None:
+            entry[1].close()
+        return entry is not None
+
+    def stats(self):
+        return {"boards": len(self.boards), "max_boards": self.max_boards, "hits": self.hits, "misses": self.misses}
+
+
+def generate_map_image(grid_data, players_data=None, rows=None, cols=None):
+    """Render a grid (list of spaces) as a base64 PNG.
+
+    The board is rows x cols; both default to the square board that fits
+    the number of spaces. Boards larger than 15x15 shrink their cells so the
+    image stays a manageable size.
+    """
+    board = board_class("matplotlib")(grid_data, rows, cols)
+    try:
+        png = board.render_image(players_data)
+    finally:
+        board.close()
+    return base64.b64encode(png).decode('utf-8')
+
+
+def write_map_image(grid_data, out, players_data=None, rows=None, cols=None, fmt=None, backend=None):
+    """Render a grid straight to out (a path, or a binary file object such as stdout's buffer).
+
+    The encoded bytes are written as they are, with no base64 step; returns
+    how many were written. backend and fmt are resolved by resolve_backend().
+    """
+    backend, fmt = resolve_backend(backend, fmt)
+    board = board_class(backend)(grid_data, rows, cols)
+    try:
+        data = board.render_image(players_data, fmt)
+    finally:
+        board.close()
+    if hasattr(out, "write"):
+        out.write(data)
+        out.flush()
+    else:
+        with open(out, "wb") as f:
+            f.write(data)
+    return len(data)
+
+
+def load_json_arg(value):
+    """JSON from a command-line argument: inline JSON text, - for stdin, or a file path.
+
+    Reading from stdin or a file keeps large boards clear of the argv size limit.
+    """
+    if value == "-":
+        return json.load(sys.stdin)
+    if value.lstrip()[:1] in ("[", "{"):
+        return json.loads(value)
+    with open(value, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def split_grid(grid_data):
+    """(spaces, rows, cols) from either a bare list of spaces or a grid object that may carry its board size."""
+    if isinstance(grid_data, dict):
+        return grid_data["spaces"], grid_data.get("rows"), grid_data.get("cols")
+    return grid_data, None, None
+
+
+def render_options(grid_data, rows=None, cols=None, fmt="png", backend=DEFAULT_BACKEND):
+    """Everything besides the grid and players that changes the rendered image."""
+    if rows is None:
+        rows, cols = board_shape(len(grid_data))
+    elif cols is None:
+        cols = rows
+    return {"rows": rows, "cols": cols, "format": fmt, "backend": backend, "version": RENDER_VERSION}
+
+
+def handle_render(request, cache, images=None, backend=None):
+    """Answer one job from the serve loop.
+
+    {"grid": ..., "players": [...], "key": room} -> {"image": base64 PNG,
+    "etag": hash}; the board for key is drawn once and reused. The etag is
+    image_key() of the grid, players and render options: finished images are
+    kept under it in images, and a request whose "if_none_match" (one etag
+    or a list) contains it gets {"not_modified": true} without any image.
+
+    "backend" picks the renderer (see BACKENDS; defaults to backend, then
+    DEFAULT_BACKEND) and "format" its output, "png", "webp" or "svg" (see
+    resolve_backend). With "encoding": "binary" the
+    raw image follows the response line (see serve_lines) instead of base64
+    inside it; with "out": path it is written to that file and only
+    "path" and "bytes" come back.
+
+    {"op": "evict", "key": room} forgets a board, {"op": "stats"} reports
+    both caches and {"op": "replay"} animates a game (see handle_replay).
+    """
+    op = request.get("op", "render")
+    if op == "evict":
+        return {"evicted": cache.evict(request.get("key"))}
+    if op == "stats":
+        return {"stats": cache.stats(), "images": images.stats() if images is not None else None}
+    if op == "replay":
+        return handle_replay(request, images)
+    if "grid" not in request:
+        raise ValueError("render request needs a grid")
+    grid_data, rows, cols = split_grid(request["grid"])
+    players_data = request.get("players") or []
+    backend, fmt = resolve_backend(request.get("backend", backend), request.get("format"))
+    etag = image_key(grid_data, players_data, render_options(grid_data, rows, cols, fmt, backend))
+    if etag_matches(request, etag):
+        return {"etag": etag, "not_modified": True}
+
+    image_name = f"{etag}.{fmt}"
+    data = images.get(image_name) if images is not None else None
+    if data is None:
+        board = cache.board(request.get("key"), grid_data, rows, cols, backend)
+        data = board.render_image(players_data, fmt)
+        if images is not None:
+            images.put(image_name, data)
+
+    response = {"etag": etag, "content_type": CONTENT_TYPES[fmt]}
+    if request.get("out"):
+        with open(request["out"], "wb") as f:
+            f.write(data)
+        return {**response, "path": request["out"], "bytes": len(data)}
+    if request.get("encoding") == "binary":
+        return response, data
+    return {**response, "image": base64.b64encode(data).decode('utf-8')}
+
+
+def etag_matches(request, etag):
+    if_none_match = request.get("if_none_match") or []
+    if isinstance(if_none_match, str):
+        if_none_match = [if_none_match]
+    return etag in if_none_match
+
+
+def handle_replay(request, images=None):
+    """{"op": "replay", "grid": ..., "history": [players, ...]} -> an animation of the game (see map_replay).
+
+    history holds the players' positions frame by frame. "format" is gif
+    (default), mp4 or webp, "fps" the frame rate and "backend" a raster
+    renderer (default map_replay.REPLAY_BACKEND). The etag, "if_none_match",
+    "encoding" and "out" work as in handle_render; "out" streams the frames
+    to the file and skips the image cache. The board is drawn for this
+    replay alone and closed after it, so rooms' cached boards stay put.
+    """
+    import os
+    from io import BytesIO
+
+    from map_replay import DEFAULT_FPS, REPLAY_BACKEND, REPLAY_TYPES, check_fps, write_replay
+
+    if "grid" not in request:
+        raise ValueError("replay request needs a grid")
+    history = request.get("history") or []
+    if not history:
+        raise ValueError("replay request needs a history with at least one frame")
+    grid_data, rows, cols = split_grid(request["grid"])
+    fmt = request.get("format", "gif")
+    if fmt not in REPLAY_TYPES:
+        raise ValueError(f"Unknown replay format: {fmt}")
+    backend = request.get("backend", REPLAY_BACKEND)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown map backend: {backend}")
+    fps = check_fps(request.get("fps", DEFAULT_FPS))
+    options = {**render_options(grid_data, rows, cols, fmt, backend), "fps": fps, "replay": True}
+    etag = image_key(grid_data, history, options)
+    if etag_matches(request, etag):
+        return {"etag": etag, "not_modified": True}
+
+    response = {"etag": etag, "content_type": REPLAY_TYPES[fmt]}
+    name = f"{etag}.{fmt}"
+    data = images.get(name) if images is not None and not request.get("out") else None
+    if data is None:
+        board = board_class(backend)(grid_data, rows, cols)
+        try:
+            if request.get("out"):
+                frames = write_replay(board, history, request["out"], fmt, fps)
+                return {**response, "path": request["out"], "bytes": os.path.getsize(request["out"]),
+                        "frames": frames}
+            buf = BytesIO()
+            write_replay(board, history, buf, fmt, fps)
+            data = buf.getvalue()
+        finally:
+            board.close()
+        if images is not None:
+            images.put(name, data)
+    if request.get("encoding") == "binary":
+        return response, data
+    return {**response, "image": base64.b64encode(data).decode('utf-8')}
+
+
+def write_stdout(data):
+    """serve_lines() writer for stdout: response lines as UTF-8 text, binary payloads as they are."""
+    sys.stdout.buffer.write(data.encode("utf-8") if isinstance(data, str) else data)
+    sys.stdout.buffer.flush()
+
+
+def render_batch(lines, write, out_dir=None, fmt=None, cache_size=8, backend=None):
+    """Render newline-delimited JSON jobs in one process; returns (jobs, failures).
+
+    Jobs look like serve()'s ({"grid": ..., "players": [...]}) and get one
+    response line each through write. With out_dir every job without its
+    own "out" is written to <out_dir>/<name>.<format>, name defaulting to
+    the job's position in the input; otherwise the images come back base64
+    in the responses, or, for jobs with "encoding": "binary", as raw bytes
+    after their response line (see serve_lines), so write must accept
+    bytes as well as text. Jobs sharing a grid reuse its drawn board. fmt and
+    backend are defaults for jobs that do not name their own.
+    """
+    import os
+
+    from grid_generator import serve_lines
+
+    cache = BoardCache(cache_size)
+    counts = {"jobs": 0, "failures": 0}
+
+    def handle(job):
+        index = counts["jobs"]
+        counts["jobs"] += 1
+        try:
+            job_backend, job_format = resolve_backend(job.get("backend", backend), job.get("format", fmt))
+            job = {**job, "backend": job_backend, "format": job_format}
+            if out_dir and "out" not in job:
+                job["out"] = os.path.join(out_dir, f"{job.get('name', f'{index:06d}')}.{job_format}")
+            return handle_render(job, cache)
+        except Exception:
+            counts["failures"] += 1
+            raise
+
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    serve_lines(lines, write, handle)
+    return counts["jobs"], counts["failures"]
+
+
+def serve(socket_path=None, cache_size=8, image_cache_mb=32, image_cache_dir=None, image_cache_disk_mb=256,
+          backend=DEFAULT_BACKEND):
+    """Keep the renderer loaded in one process and answer render jobs until EOF.
+
+    Jobs are newline-delimited JSON, {"id": 1, "grid": [...], "players": [...]},
+    read from stdin (answered on stdout) or, with socket_path, from clients of
+    a Unix socket. Responses echo the id with "image" and "etag", or
+    "error"; binary jobs are followed by the raw image bytes. Up to
+    cache_size drawn boards are kept (see BoardCache), plus image_cache_mb
+    of finished images, mirrored to image_cache_dir when given (see
+    ImageCache). backend is the default renderer for jobs that do not name
+    one. pyplot keeps global state, so socket clients take turns rendering.
+    """
+    import functools
+    import os
+    import threading
+
+    from grid_generator import serve_lines
+
+    cache = BoardCache(cache_size)
+    images = ImageCache(image_cache_mb << 20, image_cache_dir, image_cache_disk_mb << 20)
+    handle_job = functools.partial(handle_render, cache=cache, images=images, backend=backend)
+
+    if socket_path is None:
+        serve_lines(sys.stdin, write_stdout, handle_job)
+        return
+
+    import socketserver
+
+    render_lock = threading.Lock()
+
+    def handle(request):
+        with render_lock:
+            return handle_job(request)
+
+    class RenderRequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            def write(data):
+                self.wfile.write(data.encode("utf-8") if isinstance(data, str) else data)
+                self.wfile.flush()
+
+            serve_lines((raw.decode("utf-8") for raw in self.rfile), write, handle)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    with socketserver.ThreadingUnixStreamServer(socket_path, RenderRequestHandler) as server:
+        server.daemon_threads = True
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(socket_path)
+
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        import argparse
+        parser = argparse.ArgumentParser(prog="map_generator.py serve",
+                                         description="Answer newline-delimited JSON render jobs")
+        parser.add_argument("--socket", help="listen on this Unix socket path instead of stdin/stdout")
+        parser.add_argument("--cache-size", type=int, default=8, help="drawn boards to keep for reuse")
+        parser.add_argument("--image-cache-mb", type=int, default=32, help="memory for finished PNGs")
+        parser.add_argument("--image-cache-dir", help="also keep finished PNGs in this directory")
+        parser.add_argument("--image-cache-disk-mb", type=int, default=256,
+                            help="trim --image-cache-dir to this size, oldest first")
+        parser.add_argument("--backend", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                            help="renderer for jobs that do not name one")
+        args = parser.parse_args(sys.argv[2:])
+        serve(args.socket, args.cache_size, args.image_cache_mb, args.image_cache_dir, args.image_cache_disk_mb,
+              args.backend)
+        sys.exit(0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "render":
+        import argparse
+        parser = argparse.ArgumentParser(prog="map_generator.py render",
+                                         description="Write one map image as raw PNG or WebP bytes")
+        parser.add_argument("grid", nargs="?", default="-",
+                            help="grid as inline JSON, a file path, or - for stdin (default): a list of spaces, "
+                                 "an object with spaces/rows/cols, or a job {\"grid\": ..., \"players\": ...}")
+        parser.add_argument("players", nargs="?",
+                            help="players as inline JSON or a file path: [{\"name\": ..., \"position\": ...}]")
+        parser.add_argument("-o", "--output", default="-", help="file to write, or - for stdout (default)")
+        parser.add_argument("--format", choices=sorted(CONTENT_TYPES), help="default: png, or svg for --backend svg")
+        parser.add_argument("--backend", choices=sorted(BACKENDS), help=f"renderer (default: {DEFAULT_BACKEND})")
+        args = parser.parse_args(sys.argv[2:])
+        job = load_json_arg(args.grid)
+        if not (isinstance(job, dict) and "grid" in job):
+            job = {"grid": job}
+        grid_data, rows, cols = split_grid(job["grid"])
+        players_data = load_json_arg(args.players) if args.players else job.get("players")
+        out = sys.stdout.buffer if args.output == "-" else args.output
+        write_map_image(grid_data, out, players_data, rows, cols, args.format, args.backend)
+        sys.exit(0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        import argparse
+        import os
+
+        from map_replay import DEFAULT_FPS, REPLAY_BACKEND, REPLAY_TYPES, check_fps, iter_frames, write_replay
+        parser = argparse.ArgumentParser(prog="map_generator.py replay",
+                                         description="Animate a game's move history on its map")
+        parser.add_argument("job", nargs="?", default="-",
+                            help="{\"grid\": ..., \"history\": [[players], ...]} as inline JSON, a file path, "
+                                 "or - for stdin (default)")
+        parser.add_argument("-o", "--output", default="-",
+                            help="file to write, or - for stdout (default); its extension picks the format")
+        parser.add_argument("--format", choices=sorted(REPLAY_TYPES), help="default: from --output, else gif")
+        parser.add_argument("--fps", type=float, default=DEFAULT_FPS)
+        parser.add_argument("--backend", choices=sorted(BACKENDS), default=REPLAY_BACKEND,
+                            help="renderer (default: %(default)s); svg only works with --frames-dir")
+        parser.add_argument("--frames-dir", help="write one still per frame here instead of an animation")
+        args = parser.parse_args(sys.argv[2:])
+        try:
+            check_fps(args.fps)
+        except ValueError as e:
+            parser.error(str(e))
+        job = load_json_arg(args.job)
+        grid_data, rows, cols = split_grid(job["grid"])
+        board = board_class(args.backend)(grid_data, rows, cols)
+        try:
+            if args.frames_dir:
+                _, fmt = resolve_backend(args.backend)
+                os.makedirs(args.frames_dir, exist_ok=True)
+                for i, data in enumerate(iter_frames(board, job["history"], fmt)):
+                    with open(os.path.join(args.frames_dir, f"frame-{i:05d}.{fmt}"), "wb") as f:
+                        f.write(data)
+            else:
+                fmt = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+                fmt = fmt if fmt in REPLAY_TYPES else "gif"
+                out = sys.stdout.buffer if args.output == "-" else args.output
+                write_replay(board, job["history"], out, fmt, args.fps)
+        except (ValueError, RuntimeError) as e:
+            sys.stderr.write(f"Error: {e}\n")
+            sys.exit(1)
+        finally:
+            board.close()
+        sys.exit(0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        import argparse
+        import time
+        parser = argparse.ArgumentParser(prog="map_generator.py batch",
+                                         description="Render many newline-delimited JSON jobs in one process")
+        parser.add_argument("jobs", nargs="?", default="-", help="NDJSON file of render jobs, or - for stdin (default)")
+        parser.add_argument("--out-dir", help="write each image here instead of returning base64")
+        parser.add_argument("--format", choices=sorted(CONTENT_TYPES), help="default for jobs without one")
+        parser.add_argument("--backend", choices=sorted(BACKENDS), help="default for jobs without one")
+        args = parser.parse_args(sys.argv[2:])
+
+        began = time.perf_counter()
+        jobs = sys.stdin if args.jobs == "-" else open(args.jobs, encoding="utf-8")
+        with jobs:
+            count, failures = render_batch(jobs, write_stdout, args.out_dir, args.format, backend=args.backend)
+        elapsed = time.perf_counter() - began
+        sys.stderr.write(f"{count} jobs, {failures} failed, {elapsed:.1f}s ({count / elapsed if elapsed else 0:.1f} images/sec)\n")
+        sys.exit(1 if failures else 0)
+
     try:
         if len(sys.argv) < 2:
             sys.stderr.write("No grid data provided\n")
             sys.exit(1)
-        
-        grid_data = json.loads(sys.argv[1])
+
+        # Each argument is inline JSON, a file path, or - for stdin
+        grid_data, rows, cols = split_grid(load_json_arg(sys.argv[1]))
         players_data = None
-        
+
         # Parse players data if provided
         if len(sys.argv) > 2:
-            players_data = json.loads(sys.argv[2])
-        
-        img_base64 = generate_map_image(grid_data, players_data)
+            players_data = load_json_arg(sys.argv[2])
+
+        img_base64 = generate_map_image(grid_data, players_data, rows, cols)
         print(img_base64)
         sys.exit(0)
-        
+
     except json.JSONDecodeError as e:
         sys.stderr.write(f"Invalid JSON: {str(e)}\n")
         sys.exit(1)
     except Exception as e:
         sys.stderr.write(f"Error: {str(e)}\n")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
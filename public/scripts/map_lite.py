@@ -0,0 +1,429 @@
+"""Lightweight map renderers: SVG written directly, or a Pillow raster, without importing matplotlib.
+
+Both draw the same map as map_matplotlib (space colors, gray adjacent
+links, curved dashed non-adjacent links with labels, player markers and
+the legends) from one MapLayout in pixel coordinates. SvgBoard only needs
+the standard library; PillowBoard needs Pillow, which comes with matplotlib
+but is imported on its own in a few milliseconds.
+"""
+import importlib.util
+import math
+import os
+from io import BytesIO
+
+from grid_geometry import board_shape
+from map_style import BACKGROUND, COLOR_MAP, CONNECTION_COLORS, DARK_TYPES, PLAYER_COLORS, PLAYER_MARKERS
+
+TITLE = "Blind Crown Quest - Final Map"
+BASE_UNIT = 120  # Pixels per board cell up to 15 cells across
+MAX_BOARD = 1920  # Larger boards shrink their cells to stay within this many pixels
+PX = BASE_UNIT / 108  # Pixels per point, so sizes keep the matplotlib figure's proportions
+MARGIN = 20
+TITLE_HEIGHT = 60
+LEGEND_WIDTH = 200
+LEGEND_FONT = 9 * PX
+LEGEND_ROW = 1.9 * LEGEND_FONT
+LEGEND_PAD = 8
+CURVE_STRENGTH = 0.25
+DASH = (3.7, 1.6)  # matplotlib's '--', in multiples of the line width
+FONT_FAMILY = "DejaVu Sans, Verdana, Arial, sans-serif"
+
+
+def bold_font_path():
+    """matplotlib's bundled DejaVu Sans Bold, found without importing matplotlib; None when it is missing."""
+    spec = importlib.util.find_spec("matplotlib")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    path = os.path.join(spec.submodule_search_locations[0], "mpl-data", "fonts", "ttf", "DejaVuSans-Bold.ttf")
+    return path if os.path.exists(path) else None
+
+
+def control_point(x1, y1, x2, y2, curve_strength=CURVE_STRENGTH):
+    """Control point of the quadratic Bezier between two points, offset perpendicular to the chord."""
+    return (x1 + x2) / 2 - (y2 - y1) * curve_strength, (y1 + y2) / 2 + (x2 - x1) * curve_strength
+
+
+class MapLayout:
+    """Pixel geometry of one board: everything the renderers draw, computed once.
+
+    adjacent holds (p1, p2) segments; curves holds (p1, control, p2, color,
+    label, label_point) for non-adjacent links in the order they are first
+    listed (that order picks their colors, as in map_matplotlib); nodes
+    holds (center, fill, label, label_color).
+    """
+
+    def __init__(self, grid_data, rows=None, cols=None):
+        if rows is None:
+            rows, cols = board_shape(len(grid_data))
+        elif cols is None:
+            cols = rows
+        self.rows, self.cols = rows, cols
+        self.unit = min(BASE_UNIT, MAX_BOARD / (max(rows, cols) + 0.6))
+        self.scale = self.unit / BASE_UNIT
+        self.board = (MARGIN, TITLE_HEIGHT, (cols + 0.6) * self.unit, (rows + 0.6) * self.unit)
+        self.legend_x = MARGIN + self.board[2] + 12
+        self.width = round(self.legend_x + LEGEND_WIDTH + MARGIN)
+        self.height = round(TITLE_HEIGHT + self.board[3] + MARGIN)
+
+        self.pos = {node["id"]: self.point(node["id"] % cols, rows - 1 - node["id"] // cols) for node in grid_data}
+        self.adjacent = []
+        self.curves = []
+        seen = set()
+        for node in grid_data:
+            node_id = node["id"]
+            for conn in node["connections"]:
+                pair = (min(node_id, conn), max(node_id, conn))
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                x1, y1 = node_id % cols, node_id // cols
+                x2, y2 = conn % cols, conn // cols
+                if abs(x1 - x2) <= 1 and abs(y1 - y2) <= 1:
+                    self.adjacent.append((self.pos[node_id], self.pos[conn]))
+                    continue
+                # The curve is bent in board coordinates (y up), then mapped to pixels
+                cx, cy = control_point(x1, rows - 1 - y1, x2, rows - 1 - y2)
+                p1, control, p2 = self.pos[node_id], self.point(cx, cy), self.pos[conn]
+                label_point = tuple(0.25 * a + 0.5 * b + 0.25 * c for a, b, c in zip(p1, control, p2))
+                color = CONNECTION_COLORS[len(self.curves) % len(CONNECTION_COLORS)]
+                self.curves.append((p1, control, p2, color, f"{node_id}↔{conn}", label_point))
+
+        self.nodes = [
+            (self.pos[node["id"]], COLOR_MAP.get(node["type"], "white"), str(node["id"]),
+             "white" if node["type"] in DARK_TYPES else "black")
+            for node in grid_data
+        ]
+        self.legend_entries = [("patch", color, name) for name, color in COLOR_MAP.items()]
+        self.legend_entries.append(("line", "gray", "Adjacent Connection"))
+        self.legend_entries.append(("dashed", "purple", "Non-Adjacent Connection"))
+
+    def point(self, x, y):
+        """Pixel position of board coordinates (x to the right, y up, one unit per cell)."""
+        left, top, _, _ = self.board
+        return left + (x + 0.8) * self.unit, top + (self.rows - 0.2 - y) * self.unit
+
+    def legend_box(self, top, count):
+        """(x, y, width, height) of a legend with a title and count entries."""
+        return self.legend_x, top, LEGEND_WIDTH - 8, 2 * LEGEND_PAD + (count + 1) * LEGEND_ROW
+
+    def players(self, players_data):
+        """Markers to draw, as (center, color, marker, name), and the player legend entries."""
+        marks = []
+        entries = []
+        for idx, player in enumerate(players_data or []):
+            position = player.get("position")
+            name = player.get("name", f"Player {idx + 1}")
+            color = PLAYER_COLORS[idx % len(PLAYER_COLORS)]
+            marker = PLAYER_MARKERS[idx % len(PLAYER_MARKERS)]
+            if position is not None and position in self.pos:
+                x, y = self.pos[position]
+                offset = (idx - 1) * 0.25 * 0.4 * self.unit
+                marks.append(((x + offset, y + 0.3 * self.unit), color, marker, name[:8]))
+            entries.append((marker, color, name))
+        return marks, entries
+
+
+def marker_points(marker, x, y, r):
+    """Polygon for a square or triangle marker of radius r; None for a circle."""
+    if marker == "s":
+        side = 0.9 * r
+        return [(x - side, y - side), (x + side, y - side), (x + side, y + side), (x - side, y + side)]
+    if marker == "^":
+        return [(x, y - 1.15 * r), (x + r, y + 0.6 * r), (x - r, y + 0.6 * r)]
+    return None
+
+
+def escape(text):
+    # xml.sax.saxutils.escape would pull in urllib and cost more than the whole render
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _f(value):
+    return f"{value:.1f}"
+
+
+def _svg_text(x, y, text, size, color, anchor="middle", baseline="central"):
+    return (f'<text x="{_f(x)}" y="{_f(y)}" font-size="{_f(size)}" fill="{color}" text-anchor="{anchor}" '
+            f'dominant-baseline="{baseline}">{escape(text)}</text>')
+
+
+def _svg_marker(marker, x, y, r, color, edge, edge_width):
+    style = f'fill="{color}" stroke="{edge}" stroke-width="{_f(edge_width)}"'
+    points = marker_points(marker, x, y, r)
+    if points is None:
+        return f'<circle cx="{_f(x)}" cy="{_f(y)}" r="{_f(r)}" {style}/>'
+    return f'<polygon points="{" ".join(f"{_f(px)},{_f(py)}" for px, py in points)}" {style}/>'
+
+
+def _svg_label(x, y, text, size, color, edge, opacity, top=False):
+    """Text in a rounded white box centered on x (and on y, or hanging from y when top)."""
+    width = 0.64 * size * len(text) + 0.6 * size
+    height = 1.2 * size + 0.6 * size
+    box_y = y if top else y - height / 2
+    return (f'<rect x="{_f(x - width / 2)}" y="{_f(box_y)}" width="{_f(width)}" height="{_f(height)}" '
+            f'rx="{_f(0.3 * size)}" fill="white" fill-opacity="{opacity}" stroke="{edge}" stroke-width="1"/>'
+            + _svg_text(x, box_y + height / 2, text, size, color))
+
+
+def _svg_legend(layout, top, title, entries):
+    x, y, width, height = layout.legend_box(top, len(entries))
+    parts = [f'<rect x="{_f(x)}" y="{_f(y)}" width="{width}" height="{_f(height)}" rx="4" fill="white" '
+             f'fill-opacity="0.8" stroke="#CCCCCC"/>',
+             _svg_text(x + width / 2, y + LEGEND_PAD + LEGEND_ROW / 2, title, LEGEND_FONT, "black")]
+    for i, (kind, color, label) in enumerate(entries):
+        row_y = y + LEGEND_PAD + (i + 1.5) * LEGEND_ROW
+        handle_x = x + LEGEND_PAD
+        if kind == "patch":
+            parts.append(f'<rect x="{_f(handle_x)}" y="{_f(row_y - 0.35 * LEGEND_FONT)}" width="{_f(2 * LEGEND_FONT)}" '
+                         f'height="{_f(0.7 * LEGEND_FONT)}" fill="{color}" stroke="black"/>')
+        elif kind in ("line", "dashed"):
+            dash = f' stroke-dasharray="{_f(DASH[0] * 2.5)} {_f(DASH[1] * 2.5)}"' if kind == "dashed" else ""
+            parts.append(f'<path d="M{_f(handle_x)} {_f(row_y)}h{_f(2 * LEGEND_FONT)}" stroke="{color}" '
+                         f'stroke-width="2.5"{dash}/>')
+        else:
+            parts.append(_svg_marker(kind, handle_x + LEGEND_FONT, row_y, 5 * PX, color, "white", 0))
+        parts.append(_svg_text(handle_x + 2.8 * LEGEND_FONT, row_y, label, LEGEND_FONT, "black", anchor="start"))
+    return parts, y + height
+
+
+class SvgBoard:
+    """A board rendered as SVG text: the static part is built once, players are appended per render."""
+
+    formats = ("svg",)
+
+    def __init__(self, grid_data, rows=None, cols=None):
+        self.layout = layout = MapLayout(grid_data, rows, cols)
+        scale = layout.scale
+        left, top, width, height = layout.board
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{layout.width}" height="{layout.height}" '
+            f'viewBox="0 0 {layout.width} {layout.height}" font-family="{FONT_FAMILY}" font-weight="bold">',
+            f'<rect width="100%" height="100%" fill="{BACKGROUND}"/>',
+            _svg_text(left + width / 2, TITLE_HEIGHT / 2, TITLE, 18 * PX, "black"),
+            f'<rect x="{left}" y="{top}" width="{_f(width)}" height="{_f(height)}" fill="{BACKGROUND}" stroke="black"/>',
+        ]
+        if layout.adjacent:
+            segments = "".join(f"M{_f(x1)} {_f(y1)}L{_f(x2)} {_f(y2)}" for (x1, y1), (x2, y2) in layout.adjacent)
+            parts.append(f'<path d="{segments}" stroke="gray" stroke-opacity="0.6" '
+                         f'stroke-width="{_f(2 * PX * scale)}" fill="none"/>')
+
+        line_width = 2.5 * PX * scale
+        dash = f'{_f(DASH[0] * line_width)} {_f(DASH[1] * line_width)}'
+        for (x1, y1), (cx, cy), (x2, y2), color, _, _ in layout.curves:
+            parts.append(f'<path d="M{_f(x1)} {_f(y1)}Q{_f(cx)} {_f(cy)} {_f(x2)} {_f(y2)}" stroke="{color}" '
+                         f'stroke-opacity="0.8" stroke-width="{_f(line_width)}" stroke-dasharray="{dash}" fill="none"/>')
+        for (x1, y1), _, (x2, y2), color, _, _ in layout.curves:
+            for x, y in ((x1, y1), (x2, y2)):
+                parts.append(f'<circle cx="{_f(x)}" cy="{_f(y)}" r="{_f(2 * PX * scale)}" fill="{color}" opacity="0.8"/>')
+        for _, _, _, color, label, (x, y) in layout.curves:
+            parts.append(_svg_label(x, y, label, 7 * PX * scale, color, color, 0.8))
+
+        radius = 14.1 * PX * scale
+        for (x, y), fill, label, label_color in layout.nodes:
+            parts.append(f'<circle cx="{_f(x)}" cy="{_f(y)}" r="{_f(radius)}" fill="{fill}" stroke="black" '
+                         f'stroke-width="{_f(2.5 * PX * scale)}"/>')
+            parts.append(_svg_text(x, y, label, 11 * PX * scale, label_color))
+
+        legend, self.legend_bottom = _svg_legend(layout, top, "Legend", layout.legend_entries)
+        parts.extend(legend)
+        self.static = "\n".join(parts)
+
+    def render_image(self, players_data=None, fmt="svg"):
+        if fmt not in self.formats:
+            raise ValueError(f"Unknown image format for the svg backend: {fmt}")
+        marks, entries = self.layout.players(players_data)
+        parts = [self.static]
+        for (x, y), color, marker, name in marks:
+            parts.append(_svg_marker(marker, x, y, 7.9 * PX, color, "white", 2.5 * PX))
+            parts.append(_svg_label(x, y + 0.2 * self.layout.unit, name, 8 * PX, color, "black", 0.9, top=True))
+        if entries:
+            legend, _ = _svg_legend(self.layout, self.legend_bottom + 8, "Players", entries)
+            parts.extend(legend)
+        parts.append("</svg>\n")
+        return "\n".join(parts).encode("utf-8")
+
+    def close(self):
+        pass
+
+
+def quad_points(p1, control, p2, count=32):
+    """count + 1 points along a quadratic Bezier."""
+    points = []
+    for i in range(count + 1):
+        t = i / count
+        points.append(tuple((1 - t) ** 2 * a + 2 * (1 - t) * t * b + t ** 2 * c for a, b, c in zip(p1, control, p2)))
+    return points
+
+
+def dash_runs(points, on, off):
+    """The drawn pieces of a polyline under an on/off dash pattern."""
+    runs = []
+    current = [points[0]]
+    drawing = True
+    left = on
+    for (x1, y1), (x2, y2) in zip(points, points[1:]):
+        length = math.hypot(x2 - x1, y2 - y1)
+        done = 0.0
+        while length - done > left:
+            done += left
+            t = done / length
+            point = (x1 + (x2 - x1) * t, y1 + (y2 - y1) * t)
+            if drawing:
+                current.append(point)
+                runs.append(current)
+            else:
+                current = [point]
+            drawing = not drawing
+            left = on if drawing else off
+        left -= length - done
+        if drawing:
+            current.append((x2, y2))
+    if drawing and len(current) > 1:
+        runs.append(current)
+    return runs
+
+
+class PillowBoard:
+    """A board rasterized with Pillow: drawn once at SUPERSAMPLE times the size, players added per render.
+
+    Each render copies the drawn board, adds the players and scales the
+    result down, which smooths edges the way matplotlib's anti-aliasing does.
+    """
+
+    formats = ("png", "webp")
+    SUPERSAMPLE = 2
+
+    def __init__(self, grid_data, rows=None, cols=None):
+        from PIL import Image, ImageColor, ImageDraw, ImageFont
+        self._Image, self._ImageColor, self._ImageDraw, self._ImageFont = Image, ImageColor, ImageDraw, ImageFont
+        self._fonts = {}
+        self._font_path = bold_font_path()
+        self.layout = layout = MapLayout(grid_data, rows, cols)
+        ss = self.SUPERSAMPLE
+        scale = layout.scale
+        self.base = Image.new("RGB", (layout.width * ss, layout.height * ss), self._rgba(BACKGROUND))
+        draw = ImageDraw.Draw(self.base, "RGBA")
+
+        left, top, width, height = layout.board
+        self._text(draw, (left + width / 2, TITLE_HEIGHT / 2), TITLE, 18 * PX, "black")
+        draw.rectangle(self._box(left, top, width, height), outline=(0, 0, 0), width=ss)
+
+        for p1, p2 in layout.adjacent:
+            draw.line([self._px(p1), self._px(p2)], fill=self._rgba("gray", 0.6), width=self._width(2 * PX * scale))
+
+        line_width = 2.5 * PX * scale
+        for p1, control, p2, color, _, _ in layout.curves:
+            points = [self._px(p) for p in quad_points(p1, control, p2)]
+            for run in dash_runs(points, DASH[0] * line_width * ss, DASH[1] * line_width * ss):
+                draw.line(run, fill=self._rgba(color, 0.8), width=self._width(line_width), joint="curve")
+        for p1, _, p2, color, _, _ in layout.curves:
+            for point in (p1, p2):
+                self._disc(draw, point, 2 * PX * scale, self._rgba(color, 0.8))
+        for _, _, _, color, label, point in layout.curves:
+            self._label(draw, point, label, 7 * PX * scale, color, color, 0.8)
+
+        radius = 14.1 * PX * scale
+        for point, fill, label, label_color in layout.nodes:
+            self._disc(draw, point, radius, self._rgba(fill), (0, 0, 0), 2.5 * PX * scale)
+            self._text(draw, point, label, 11 * PX * scale, label_color)
+
+        self.legend_bottom = self._legend(draw, top, "Legend", layout.legend_entries)
+
+    def _px(self, point):
+        return point[0] * self.SUPERSAMPLE, point[1] * self.SUPERSAMPLE
+
+    def _box(self, x, y, width, height):
+        ss = self.SUPERSAMPLE
+        return [x * ss, y * ss, (x + width) * ss, (y + height) * ss]
+
+    def _width(self, width):
+        return max(1, round(width * self.SUPERSAMPLE))
+
+    def _rgba(self, color, alpha=1.0):
+        return self._ImageColor.getrgb(color)[:3] + (round(255 * alpha),)
+
+    def _font(self, size):
+        size = max(1, round(size * self.SUPERSAMPLE))
+        if size not in self._fonts:
+            # Pillow's own font stands in when matplotlib's is not installed; it has no bold face or arrows
+            self._fonts[size] = (self._ImageFont.truetype(self._font_path, size) if self._font_path
+                                 else self._ImageFont.load_default(size))
+        return self._fonts[size]
+
+    def _text(self, draw, point, text, size, color, anchor="mm"):
+        draw.text(self._px(point), text, font=self._font(size), fill=self._rgba(color), anchor=anchor)
+
+    def _disc(self, draw, point, radius, fill, outline=None, width=0):
+        x, y = self._px(point)
+        r = radius * self.SUPERSAMPLE
+        draw.ellipse([x - r, y - r, x + r, y + r], fill=fill, outline=outline,
+                     width=self._width(width) if outline else 0)
+
+    def _marker(self, draw, marker, point, radius, color, edge, edge_width):
+        x, y = point
+        points = marker_points(marker, x, y, radius)
+        if points is None:
+            self._disc(draw, point, radius, self._rgba(color), self._rgba(edge), edge_width)
+        else:
+            draw.polygon([self._px(p) for p in points], fill=self._rgba(color), outline=self._rgba(edge),
+                         width=self._width(edge_width))
+
+    def _label(self, draw, point, text, size, color, edge, opacity, top=False):
+        font = self._font(size)
+        x0, y0, x1, y1 = font.getbbox(text, anchor="mm")
+        pad = 0.3 * size * self.SUPERSAMPLE
+        x, y = self._px(point)
+        if top:
+            y += (y1 - y0) / 2 + pad
+        draw.rounded_rectangle([x + x0 - pad, y + y0 - pad, x + x1 + pad, y + y1 + pad], radius=pad,
+                               fill=(255, 255, 255, round(255 * opacity)), outline=self._rgba(edge), width=1)
+        self._text(draw, (x / self.SUPERSAMPLE, y / self.SUPERSAMPLE), text, size, color)
+
+    def _legend(self, draw, top, title, entries):
+        x, y, width, height = self.layout.legend_box(top, len(entries))
+        draw.rounded_rectangle(self._box(x, y, width, height), radius=4 * self.SUPERSAMPLE,
+                               fill=(255, 255, 255, 204), outline=self._rgba("#CCCCCC"), width=self.SUPERSAMPLE)
+        self._text(draw, (x + width / 2, y + LEGEND_PAD + LEGEND_ROW / 2), title, LEGEND_FONT, "black")
+        for i, (kind, color, label) in enumerate(entries):
+            row_y = y + LEGEND_PAD + (i + 1.5) * LEGEND_ROW
+            handle_x = x + LEGEND_PAD
+            if kind == "patch":
+                draw.rectangle(self._box(handle_x, row_y - 0.35 * LEGEND_FONT, 2 * LEGEND_FONT, 0.7 * LEGEND_FONT),
+                               fill=self._rgba(color), outline=(0, 0, 0), width=self.SUPERSAMPLE)
+            elif kind in ("line", "dashed"):
+                points = [self._px((handle_x, row_y)), self._px((handle_x + 2 * LEGEND_FONT, row_y))]
+                runs = dash_runs(points, DASH[0] * 2.5 * self.SUPERSAMPLE,
+                                 DASH[1] * 2.5 * self.SUPERSAMPLE) if kind == "dashed" else [points]
+                for run in runs:
+                    draw.line(run, fill=self._rgba(color), width=self._width(2.5))
+            else:
+                self._marker(draw, kind, (handle_x + LEGEND_FONT, row_y), 5 * PX, color, color, 0)
+            self._text(draw, (handle_x + 2.8 * LEGEND_FONT, row_y), label, LEGEND_FONT, "black", anchor="lm")
+        return y + height
+
+    def render_image(self, players_data=None, fmt="png"):
+        if fmt not in self.formats:
+            raise ValueError(f"Unknown image format for the pillow backend: {fmt}")
+        image = self.render_frame(players_data)
+        buf = BytesIO()
+        if fmt == "webp":
+            image.save(buf, format="WEBP", lossless=True)
+        else:
+            image.save(buf, format="PNG")
+        return buf.getvalue()
+
+    def render_frame(self, players_data=None):
+        """The board with the players on it as an RGB PIL image, before encoding (see map_replay)."""
+        image = self.base.copy()
+        draw = self._ImageDraw.Draw(image, "RGBA")
+        marks, entries = self.layout.players(players_data)
+        for point, color, marker, name in marks:
+            self._marker(draw, marker, point, 7.9 * PX, color, "white", 2.5 * PX)
+            x, y = point
+            self._label(draw, (x, y + 0.2 * self.layout.unit), name, 8 * PX, color, "black", 0.9, top=True)
+        if entries:
+            self._legend(draw, self.legend_bottom + 8, "Players", entries)
+        return image.reduce(self.SUPERSAMPLE)
+
+    def close(self):
+        self.base = None
@@ -0,0 +1,239 @@
+"""Matplotlib map renderer: the original figure, drawn once per board and blitted per render."""
+import matplotlib
+matplotlib.use("Agg")  # Headless: images are only ever written to buffers
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.legend import Legend
+from matplotlib.patches import Patch
+from io import BytesIO
+import numpy as np
+
+from grid_geometry import board_shape
+from map_style import BACKGROUND, COLOR_MAP, CONNECTION_COLORS, DARK_TYPES, PLAYER_COLORS, PLAYER_MARKERS
+
+DPI = 120
+LEGEND_WIDTH = 2.8  # Inches to the right of the board
+
+
+def get_control_point(x1, y1, x2, y2, curve_strength=0.3):
+    """Calculate control point for quadratic Bezier curve; works on scalars or on arrays of curves"""
+    # Midpoint
+    mid_x = (x1 + x2) / 2
+    mid_y = (y1 + y2) / 2
+
+    # Perpendicular vector
+    dx = x2 - x1
+    dy = y2 - y1
+    length = np.sqrt(dx**2 + dy**2)
+
+    # Perpendicular offset (curve away from center); a zero-length curve keeps its midpoint
+    safe_length = np.where(length == 0, 1, length)
+    perp_x = -dy / safe_length
+    perp_y = dx / safe_length
+
+    # Control point offset from midpoint
+    offset = curve_strength * length
+    control_x = mid_x + perp_x * offset
+    control_y = mid_y + perp_y * offset
+
+    return control_x, control_y
+
+
+class BoardImage:
+    """One grid's map, drawn once and reused for every set of player positions.
+
+    The board (connections, curves, spaces, labels, legend, title) never
+    changes during a game, so it is drawn a single time and its pixels are
+    kept. render_image() restores those pixels, draws only the player markers,
+    names and player legend on top (matplotlib blitting) and encodes the
+    result. The figure has a fixed layout so the snapshot always lines up.
+    """
+
+    formats = ("png", "webp")
+
+    def __init__(self, grid_data, rows=None, cols=None):
+        if rows is None:
+            rows, cols = board_shape(len(grid_data))
+        elif cols is None:
+            cols = rows
+        self.grid_data = grid_data
+        # 1.5 inches per board unit up to 15 spaces across, then shrink so the board stays within 24 inches
+        unit = min(1.5, 24.0 / (max(rows, cols) + 0.6))
+        self.scale = unit / 1.5
+        board_width = (cols + 0.6) * unit
+        board_height = (rows + 0.6) * unit
+        width = board_width + 0.4 + LEGEND_WIDTH
+        height = board_height + 1.2
+
+        self.fig = plt.figure(figsize=(width, height), facecolor=BACKGROUND, dpi=DPI)
+        self.ax = self.fig.add_axes([0.2 / width, 0.2 / height, board_width / width, board_height / height])
+
+        self.pos = {}
+        for node in grid_data:
+            node_id = node["id"]
+            x = node_id % cols
+            y = rows - 1 - (node_id // cols)
+            self.pos[node_id] = (x, y)
+
+        self._draw_board(rows, cols)
+        self.fig.canvas.draw()
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._legend_bottom = self.ax.transAxes.inverted().transform(
+            self.legend.get_window_extent().p0)[1]
+
+    def _draw_board(self, rows, cols):
+        ax = self.ax
+        scale = self.scale
+
+        # Every listed connection as (node_id, conn) arrays
+        src = np.repeat([node["id"] for node in self.grid_data],
+                        [len(node["connections"]) for node in self.grid_data])
+        dst = np.array([conn for node in self.grid_data for conn in node["connections"]], dtype=src.dtype)
+
+        # Keep each undirected connection once, in the order it is first listed (that order picks curve colors)
+        _, first = np.unique(np.sort(np.stack([src, dst], axis=1), axis=1), axis=0, return_index=True)
+        first.sort()
+        src, dst = src[first], dst[first]
+
+        start = self._coords(src, rows, cols)
+        end = self._coords(dst, rows, cols)
+        adjacent = (np.abs(start - end) <= 1).all(axis=1)
+
+        # Draw adjacent connections (straight, gray, thin)
+        ax.add_collection(LineCollection(np.stack([start[adjacent], end[adjacent]], axis=1),
+                                         colors='gray', linewidths=2 * scale, zorder=1, alpha=0.6))
+
+        # Draw non-adjacent connections (curved, colorful, thicker), all curves at once
+        curve_src, curve_dst = src[~adjacent], dst[~adjacent]
+        p1, p2 = start[~adjacent], end[~adjacent]
+        if len(p1):
+            cx, cy = get_control_point(p1[:, 0], p1[:, 1], p2[:, 0], p2[:, 1], curve_strength=0.25)
+            control = np.stack([cx, cy], axis=1)
+
+            # Quadratic Bezier curves, (curves, 100, 2)
+            t = np.linspace(0, 1, 100)[None, :, None]
+            curves = (1-t)**2 * p1[:, None, :] + 2*(1-t)*t * control[:, None, :] + t**2 * p2[:, None, :]
+            colors = [CONNECTION_COLORS[idx % len(CONNECTION_COLORS)] for idx in range(len(curves))]
+            ax.add_collection(LineCollection(curves, colors=colors, linewidths=2.5 * scale,
+                                             linestyles='--', zorder=2, alpha=0.8))
+
+            # Add small circles at endpoints to show connection clearly
+            ends = np.concatenate([p1, p2])
+            ax.scatter(ends[:, 0], ends[:, 1], s=(4 * scale) ** 2, color=colors * 2,
+                       linewidths=1.0, zorder=3, alpha=0.8)
+
+            # Add connection label at midpoint
+            labels = 0.25 * p1 + 0.5 * control + 0.25 * p2
+            for (label_x, label_y), node_id, conn, color in zip(labels, curve_src, curve_dst, colors):
+                ax.text(label_x, label_y, f'{node_id}↔{conn}',
+                        fontsize=7 * scale, color=color, weight='bold',
+                        bbox=dict(boxstyle='round,pad=0.3', facecolor='white',
+                                  edgecolor=color, alpha=0.8),
+                        ha='center', va='center', zorder=4)
+
+        # Draw node circles in one collection, then their labels
+        node_ids = np.array([node["id"] for node in self.grid_data])
+        node_xy = self._coords(node_ids, rows, cols)
+        ax.scatter(node_xy[:, 0], node_xy[:, 1], s=800 * scale ** 2,
+                   c=[COLOR_MAP.get(node["type"], "white") for node in self.grid_data],
+                   edgecolors='black', linewidths=2.5 * scale, zorder=5)
+        for (x, y), node in zip(node_xy, self.grid_data):
+            ax.text(x, y, str(node["id"]), fontsize=11 * scale, weight='bold',
+                    ha='center', va='center', zorder=6,
+                    color='white' if node["type"] in DARK_TYPES else 'black')
+
+        # Create legend
+        legend_elements = [Patch(facecolor=color, edgecolor='black', label=type_name)
+                           for type_name, color in COLOR_MAP.items()]
+
+        # Add connection type indicators to legend
+        legend_elements.append(plt.Line2D([0], [0], color='gray', linewidth=2,
+                                         label='Adjacent Connection'))
+        legend_elements.append(plt.Line2D([0], [0], color='purple', linewidth=2.5,
+                                         linestyle='--', label='Non-Adjacent Connection'))
+
+        self.legend = ax.legend(handles=legend_elements, title="Legend",
+                                bbox_to_anchor=(1.02, 1), loc='upper left', fontsize=9)
+
+        # Styling
+        ax.set_xlim(-0.8, cols - 0.2)
+        ax.set_ylim(-0.8, rows - 0.2)
+        ax.set_xticks([])
+        ax.set_yticks([])
+        ax.set_aspect('equal')
+        ax.set_title("Blind Crown Quest - Final Map", fontsize=18, weight='bold', pad=20)
+        ax.set_facecolor(BACKGROUND)
+
+    @staticmethod
+    def _coords(ids, rows, cols):
+        """(len(ids), 2) board coordinates, row 0 at the top."""
+        return np.stack([ids % cols, rows - 1 - ids // cols], axis=1).astype(float)
+
+    def _player_artists(self, players_data):
+        """Markers, names and a player legend for the current positions, not yet drawn."""
+        ax = self.ax
+        artists = []
+        legend_elements = []
+        for idx, player in enumerate(players_data):
+            player_pos = player.get('position')
+            player_name = player.get('name', f'Player {idx + 1}')
+            color = PLAYER_COLORS[idx % len(PLAYER_COLORS)]
+            marker = PLAYER_MARKERS[idx % len(PLAYER_MARKERS)]
+            if player_pos is not None and player_pos in self.pos:
+                x, y = self.pos[player_pos]
+                # Draw player marker with distinct shape
+                offset = (idx - 1) * 0.25
+                artists.append(ax.scatter(x + offset * 0.4, y - 0.3, s=250,
+                                          color=color, edgecolors='white', linewidth=2.5, zorder=7,
+                                          marker=marker))
+
+                # Add player name label below node
+                artists.append(ax.text(x + offset * 0.4, y - 0.5, player_name[:8],
+                                       fontsize=8, weight='bold',
+                                       ha='center', va='top', zorder=7, color=color,
+                                       bbox=dict(boxstyle='round,pad=0.3',
+                                                 facecolor='white', alpha=0.9)))
+            legend_elements.append(plt.Line2D([0], [0], marker=marker, color='w',
+                                              markerfacecolor=color, markersize=10, label=player_name))
+
+        # Player legend sits just under the board legend
+        if legend_elements:
+            artists.append(Legend(ax, legend_elements, [h.get_label() for h in legend_elements],
+                                  title="Players", bbox_to_anchor=(1.02, self._legend_bottom - 0.02),
+                                  loc='upper left', fontsize=9))
+        return artists
+
+    def render_image(self, players_data=None, fmt="png"):
+        """Encoded image bytes (PNG, or lossless WebP) with the players drawn on the board."""
+        if fmt not in self.formats:
+            raise ValueError(f"Unknown image format: {fmt}")
+        pixels = self._render_pixels(players_data)
+        buf = BytesIO()
+        if fmt == "webp":
+            plt.imsave(buf, pixels, format='webp', dpi=DPI, pil_kwargs={'lossless': True})
+        else:
+            plt.imsave(buf, pixels, format='png', dpi=DPI)
+        return buf.getvalue()
+
+    def render_frame(self, players_data=None):
+        """The board with the players on it as an RGB PIL image, before encoding (see map_replay)."""
+        from PIL import Image
+        return Image.fromarray(np.ascontiguousarray(self._render_pixels(players_data)[..., :3]))
+
+    def _render_pixels(self, players_data):
+        """RGBA view of the canvas with the players blitted over the saved background; valid until the next render."""
+        canvas = self.fig.canvas
+        canvas.restore_region(self.background)
+        artists = self._player_artists(players_data or [])
+        renderer = canvas.get_renderer()
+        for artist in artists:
+            artist.set_figure(self.fig)
+            artist.draw(renderer)
+        pixels = np.asarray(canvas.buffer_rgba())
+        for artist in artists:
+            if artist.axes is not None and artist in artist.axes.get_children():
+                artist.remove()
+        return pixels
+
+    def close(self):
+        plt.close(self.fig)
@@ -0,0 +1,144 @@
+"""Replays: a game's move history drawn as an animation on one board.
+
+A replay is a grid plus its history, a list of frames that each hold the
+players' positions at that point ([{"name": ..., "position": ...}, ...],
+one frame per round or per move). The board and its static layers are
+drawn once; each frame only adds the players (see render_frame() on the
+raster boards) and is encoded and written before the next one is drawn, so
+memory stays flat however long the game ran.
+
+Formats:
+    gif   animated GIF written frame by frame with Pillow; after the first
+          frame only the rectangle that changed is stored
+    mp4   H.264 video, raw frames piped to ffmpeg (needs ffmpeg on PATH)
+    webp  animated WebP through the same ffmpeg pipe (Pillow's own animated
+          WebP writer collects every frame before encoding)
+iter_frames() instead yields one encoded still per frame, from any backend.
+"""
+import itertools
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+
+REPLAY_TYPES = {"gif": "image/gif", "mp4": "video/mp4", "webp": "image/webp"}
+REPLAY_BACKEND = "pillow"  # Raster and light to import; matplotlib works too
+DEFAULT_FPS = 2
+
+
+def check_fps(fps):
+    """fps as a float, or ValueError unless it is a finite number above zero."""
+    try:
+        fps = float(fps)
+    except (TypeError, ValueError):
+        raise ValueError(f"fps must be a number, got {fps!r}") from None
+    if not (fps > 0 and math.isfinite(fps)):
+        raise ValueError(f"fps must be a finite number above zero, got {fps}")
+    return fps
+FFMPEG_OUTPUT = {
+    # Odd sizes are padded by a pixel: yuv420p needs even dimensions
+    "mp4": ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-c:v", "libx264", "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart", "-f", "mp4"],
+    "webp": ["-c:v", "libwebp_anim", "-lossless", "1", "-loop", "0", "-f", "webp"],
+}
+
+
+def iter_frames(board, history, fmt):
+    """One encoded still (board.render_image) per frame of history, produced as they are consumed."""
+    for players_data in history:
+        yield board.render_image(players_data, fmt)
+
+
+def iter_pixels(board, history):
+    """One RGB PIL image per frame of history, from a raster board."""
+    if not hasattr(board, "render_frame"):
+        raise ValueError(f"{type(board).__name__} does not draw raster frames; use the pillow or matplotlib backend")
+    for players_data in history:
+        yield board.render_frame(players_data)
+
+
+def write_gif(frames, out, fps=DEFAULT_FPS):
+    """Stream RGB frames to the binary file object out as a looping GIF; returns the number of frames.
+
+    Every frame is mapped onto the first frame's palette (the board's colors
+    never change) and only the bounding box of the pixels that changed since
+    the previous frame is stored, at its offset.
+    """
+    from PIL import GifImagePlugin, Image, ImageChops
+
+    duration = round(1000 / fps)
+    palette = previous = None
+    count = 0
+    for frame in frames:
+        if palette is None:
+            palette = frame.quantize(colors=256, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+            header, _ = GifImagePlugin.getheader(palette, info={"loop": 0})
+            out.write(b"".join(header))
+        indexed = frame.quantize(palette=palette, dither=Image.Dither.NONE)
+        if previous is None:
+            box = (0, 0) + indexed.size
+        else:
+            # Nothing moved: a one-pixel frame still holds the frame's time
+            box = ImageChops.difference(previous, indexed).getbbox() or (0, 0, 1, 1)
+        out.write(b"".join(GifImagePlugin.getdata(indexed.crop(box), offset=box[:2], duration=duration)))
+        previous = indexed
+        count += 1
+    if palette is None:
+        raise ValueError("a replay needs at least one frame")
+    out.write(b";")
+    out.flush()
+    return count
+
+
+def pipe_ffmpeg(frames, path, fmt, fps=DEFAULT_FPS):
+    """Encode RGB frames to path (mp4 or webp) through an ffmpeg pipe; returns the number of frames."""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError(f"{fmt} replays need ffmpeg on PATH; gif works without it")
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError("a replay needs at least one frame")
+    width, height = first.size
+    command = [ffmpeg, "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+               "-s", f"{width}x{height}", "-r", str(fps), "-i", "-", *FFMPEG_OUTPUT[fmt], path]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    count = 0
+    try:
+        for frame in itertools.chain([first], frames):
+            process.stdin.write(frame.tobytes())
+            count += 1
+        process.stdin.close()
+    except BrokenPipeError:
+        pass  # ffmpeg stopped reading; its exit code and message below say why
+    error = process.stderr.read().decode("utf-8", "replace").strip()
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed: {error or f'exit code {process.returncode}'}")
+    return count
+
+
+def write_replay(board, history, out, fmt="gif", fps=DEFAULT_FPS):
+    """Write the replay of history on board to out (a path, or a binary file object); returns the frame count.
+
+    mp4 and webp go through ffmpeg, which writes to a path; for a file
+    object they are encoded to a temporary file and copied over.
+    """
+    if fmt not in REPLAY_TYPES:
+        raise ValueError(f"Unknown replay format: {fmt}")
+    fps = check_fps(fps)
+    frames = iter_pixels(board, history)
+    if fmt == "gif":
+        if hasattr(out, "write"):
+            return write_gif(frames, out, fps)
+        with open(out, "wb") as f:
+            return write_gif(frames, f, fps)
+    if not hasattr(out, "write"):
+        return pipe_ffmpeg(frames, out, fmt, fps)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"replay.{fmt}")
+        count = pipe_ffmpeg(frames, path, fmt, fps)
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, out)
+    out.flush()
+    return count
@@ -0,0 +1,20 @@
+"""Colors and markers shared by every map renderer (see map_generator.BACKENDS)."""
+
+COLOR_MAP = {
+    "Shop": "gold",
+    "Neutral": "lightgray",
+    "Teleport": "purple",
+    "Bad": "red",
+    "Good": "green",
+    "Crown": "orange",
+    "Start": "blue",
+    "Combat": "brown",
+    "Shadow Realm": "black"
+}
+CONNECTION_COLORS = ['#FF1493', '#00CED1', '#FFD700', '#FF4500', '#9370DB',
+                     '#32CD32', '#FF69B4', '#1E90FF', '#FFA500', '#00FA9A']
+PLAYER_COLORS = ['#FF6B6B', '#4ECDC4', '#95E1D3']  # Red, Teal, Mint
+PLAYER_MARKERS = ['o', 's', '^']  # Circle, Square, Triangle
+BACKGROUND = '#F5F5DC'  # Beige
+# Space types whose circle is dark enough to need a white label
+DARK_TYPES = ('Shadow Realm', 'Combat')
@@ -0,0 +1,117 @@
+const { spawn } = require('child_process');
+
+// Long-lived Python helper that answers newline-delimited JSON requests.
+// Each request gets an id; the script echoes it back so several requests
+// can be in flight on the same pipe. The process is restarted lazily if it dies.
+class PythonWorker {
+    constructor(name, scriptPath, args = []) {
+        this.name = name;
+        this.scriptPath = scriptPath;
+        this.args = args;
+        this.child = null;
+        this.nextId = 1;
+        this.pending = new Map();
+    }
+
+    start() {
+        if (this.child) {
+            return this.child;
+        }
+        const child = spawn('python3', [this.scriptPath, ...this.args], { stdio: ['pipe', 'pipe', 'pipe'] });
+        this.child = child;
+
+        // Responses are JSON lines; one with "payload_bytes" is followed by that many raw
+        // bytes (e.g. an image), which arrive on the response as a Buffer in "payload".
+        let buffered = Buffer.alloc(0);
+        let waiting = null;
+        child.stdout.on('data', (chunk) => {
+            buffered = buffered.length ? Buffer.concat([buffered, chunk]) : chunk;
+            for (;;) {
+                if (waiting) {
+                    if (buffered.length < waiting.payload_bytes) {
+                        return;
+                    }
+                    const response = waiting;
+                    response.payload = buffered.subarray(0, response.payload_bytes);
+                    buffered = buffered.subarray(response.payload_bytes);
+                    waiting = null;
+                    this.settle(response);
+                    continue;
+                }
+                const newline = buffered.indexOf(10);
+                if (newline === -1) {
+                    return;
+                }
+                const line = buffered.toString('utf8', 0, newline);
+                buffered = buffered.subarray(newline + 1);
+                if (!line.trim()) {
+                    continue;
+                }
+                let response;
+                try {
+                    response = JSON.parse(line);
+                } catch (e) {
+                    console.error(`${this.name} worker sent invalid JSON:`, e.message);
+                    continue;
+                }
+                if (typeof response.payload_bytes === 'number') {
+                    waiting = response;
+                } else {
+                    this.settle(response);
+                }
+            }
+        });
+
+        child.stderr.on('data', (data) => {
+            console.error(`${this.name} worker: ${data.toString().trim()}`);
+        });
+
+        const onGone = (err) => {
+            if (this.child !== child) {
+                return;
+            }
+            this.child = null;
+            const reason = err ? err.message : `exited with code ${child.exitCode}`;
+            console.error(`${this.name} worker ${reason}`);
+            for (const entry of this.pending.values()) {
+                entry.reject(new Error(`${this.name} worker ${reason}`));
+            }
+            this.pending.clear();
+        };
+        child.on('error', onGone);
+        child.stdin.on('error', onGone);
+        child.on('exit', () => onGone());
+        return child;
+    }
+
+    settle(response) {
+        const entry = this.pending.get(response.id);
+        if (!entry) {
+            return;
+        }
+        this.pending.delete(response.id);
+        if (response.error) {
+            entry.reject(new Error(response.error));
+        } else {
+            entry.resolve(response);
+        }
+    }
+
+    request(payload) {
+        const child = this.start();
+        const id = this.nextId++;
+        return new Promise((resolve, reject) => {
+            this.pending.set(id, { resolve, reject });
+            child.stdin.write(JSON.stringify({ ...payload, id }) + '\n');
+        });
+    }
+
+    stop() {
+        if (this.child) {
+            this.child.stdin.end();
+            this.child = null;
+        }
+    }
+}
+
+module.exports = { PythonWorker };
@@ -1,9 +1,9 @@
 const express = require('express');
 const http = require('http');
 const { Server } = require('socket.io');
-const { spawnSync } = require('child_process');
 const path = require('path');
 const fs = require('fs');
+const { PythonWorker } = require('./pythonWorker');
 const app = express();
 const server = http.createServer(app);
 const io = new Server(server);
@@ -30,21 +30,68 @@ app.get('/faq', (req, res) => {
 
 const rooms = {};
 
-function generateGrid(startSpaceId = 12) {
-    const result = spawnSync('python3', [path.join(__dirname, 'public', 'scripts', 'grid_generator.py'), startSpaceId.toString()]);
-    if (result.error) {
-        console.error('Error generating grid:', result.error);
-        return null;
-    }
+// One resident grid generator instead of a python3 spawn per room. It keeps a pool of
+// ready grids per start space, persisted under .cache/ so a restart is hot immediately.
+// Rooms use the phased engine's boards; the pool keeps its retry loop off room creation.
+const cacheDir = path.join(__dirname, '.cache');
+fs.mkdirSync(cacheDir, { recursive: true });
+// A catalogue built with `grid_generator.py catalogue .cache/grid_catalogue.bin --engine phased`
+// is used when present, so rooms read a pre-generated grid by seed instead of generating one.
+const gridWorkerArgs = [
+    'serve',
+    '--engine', 'phased',
+    '--pool-depth', '4',
+    '--pool-store', path.join(cacheDir, 'grid_pool.bin'),
+    // Per-phase generation timings, reported by /api/grid-stats
+    '--timings'
+];
+const gridCataloguePath = path.join(cacheDir, 'grid_catalogue.bin');
+if (fs.existsSync(gridCataloguePath)) {
+    gridWorkerArgs.push('--catalogue', gridCataloguePath);
+}
+const gridWorker = new PythonWorker('Grid', path.join(__dirname, 'public', 'scripts', 'grid_generator.py'), gridWorkerArgs);
+// Resident renderer so map images do not pay the matplotlib import on every request. It draws
+// the original matplotlib figure as PNG; '--backend', 'svg' or 'pillow' render the same layout
+// without matplotlib. Finished images are cached by content hash, in memory and under
+// .cache/maps across restarts.
+const mapWorker = new PythonWorker('Map', path.join(__dirname, 'public', 'scripts', 'map_generator.py'), [
+    'serve',
+    '--backend', 'matplotlib',
+    '--image-cache-dir', path.join(cacheDir, 'maps')
+]);
+
+async function generateGrid(startSpaceId = 12) {
     try {
-        return JSON.parse(result.stdout.toString());
+        // index: distances, next hops to the Crown and teleport targets, computed once per room
+        const response = await gridWorker.request({ start: startSpaceId, index: true });
+        return response.grid;
     } catch (e) {
-        console.error('Error parsing grid JSON:', e.message);
+        console.error('Error generating grid:', e.message);
         return null;
     }
 }
 
-app.get('/api/grid', (req, res) => {
+// Player positions after every move, replayed by /api/map-replay; a snapshot is only kept
+// when someone's position changed, so each frame of the replay is one move
+function recordPositions(room) {
+    const positions = room.state.players.map(p => ({ name: p.name, position: p.position }));
+    const last = room.history[room.history.length - 1];
+    if (!last || JSON.stringify(last) !== JSON.stringify(positions)) {
+        room.history.push(positions);
+    }
+}
+
+function deleteRoom(roomId) {
+    delete rooms[roomId];
+    // Drop the room's drawn board from the map worker's cache; nothing to do if it never rendered
+    if (mapWorker.child) {
+        mapWorker.request({ op: 'evict', key: roomId }).catch((e) => {
+            console.error('Error evicting map board:', e.message);
+        });
+    }
+}
+
+app.get('/api/grid', async (req, res) => {
     const roomId = req.query.roomId;
     if (!roomId || !rooms[roomId]) {
         res.status(400).send('Invalid or missing roomId');
@@ -52,7 +99,7 @@ app.get('/api/grid', (req, res) => {
     }
     if (!rooms[roomId].grid) {
         console.log(`Generating new grid for room ${roomId}`);
-        rooms[roomId].grid = generateGrid();
+        rooms[roomId].grid = await generateGrid();
         if (!rooms[roomId].grid) {
             res.status(500).send('Failed to generate grid');
             return;
@@ -61,7 +108,17 @@ app.get('/api/grid', (req, res) => {
     res.json(rooms[roomId].grid);
 });
 
-app.get('/api/map-image', (req, res) => {
+app.get('/api/grid-stats', async (req, res) => {
+    try {
+        const response = await gridWorker.request({ op: 'stats' });
+        res.json(response.stats);
+    } catch (e) {
+        console.error('Error reading grid stats:', e.message);
+        res.status(500).send('Failed to read grid stats');
+    }
+});
+
+app.get('/api/map-image', async (req, res) => {
     const roomId = req.query.roomId;
     if (!roomId || !rooms[roomId]) {
         res.status(400).send('Invalid or missing roomId');
@@ -80,20 +137,84 @@ app.get('/api/map-image', (req, res) => {
         position: p.position
     }));
 
-    // Call the map generator with grid data and players data as JSON
-    const result = spawnSync('python3', [path.join(__dirname, 'public', 'scripts', 'map_generator.py'), JSON.stringify(grid.spaces), JSON.stringify(playersData)]);
-    if (result.error || result.status !== 0) {
-        console.error('Error generating map image:', result.error || result.stderr.toString());
+    // The worker's etag is a hash of the grid, players and render options, so a client that
+    // already holds this exact image gets a 304 without anything being rendered or re-sent
+    const ifNoneMatch = (req.headers['if-none-match'] || '')
+        .split(',')
+        .map(tag => tag.trim().replace(/^W\//, '').replace(/"/g, ''))
+        .filter(Boolean);
+
+    // Ask the map worker to render the grid with the players' positions
+    let response;
+    try {
+        response = await mapWorker.request({
+            key: roomId,
+            grid: grid.spaces,
+            players: playersData,
+            if_none_match: ifNoneMatch,
+            encoding: 'binary'
+        });
+    } catch (error) {
+        console.error('Error generating map image:', error.message);
         res.status(500).send('Failed to generate map image');
         return;
     }
 
-    const base64Image = result.stdout.toString().trim();
-    res.json({ image: `data:image/png;base64,${base64Image}` });
+    res.set('ETag', `"${response.etag}"`);
+    res.set('Cache-Control', 'no-cache');
+    if (response.not_modified) {
+        res.status(304).end();
+        return;
+    }
+    // Raw image bytes (SVG or PNG) straight from the worker pipe, no base64 data URI
+    res.type(response.content_type).send(response.payload);
+});
+
+// The game's moves animated on its map (GIF by default; ?format=mp4 or webp needs ffmpeg on the server).
+// Frames are drawn one at a time on a single board, so long games do not cost more memory to replay.
+app.get('/api/map-replay', async (req, res) => {
+    const room = rooms[req.query.roomId];
+    if (!room || !room.grid) {
+        res.status(400).send('Invalid or missing roomId');
+        return;
+    }
+    if (room.history.length === 0) {
+        res.status(404).send('No moves to replay yet');
+        return;
+    }
+
+    const ifNoneMatch = (req.headers['if-none-match'] || '')
+        .split(',')
+        .map(tag => tag.trim().replace(/^W\//, '').replace(/"/g, ''))
+        .filter(Boolean);
+
+    let response;
+    try {
+        response = await mapWorker.request({
+            op: 'replay',
+            grid: room.grid.spaces,
+            history: room.history,
+            format: req.query.format || 'gif',
+            if_none_match: ifNoneMatch,
+            encoding: 'binary'
+        });
+    } catch (error) {
+        console.error('Error generating map replay:', error.message);
+        res.status(500).send('Failed to generate map replay');
+        return;
+    }
+
+    res.set('ETag', `"${response.etag}"`);
+    res.set('Cache-Control', 'no-cache');
+    if (response.not_modified) {
+        res.status(304).end();
+        return;
+    }
+    res.type(response.content_type).send(response.payload);
 });
 
 io.on('connection', (socket) => {
-    socket.on('create', ({ memoryMode, randomStartSpace, name }, callback) => {
+    socket.on('create', async ({ memoryMode, randomStartSpace, name }, callback) => {
         console.log('Create event received:', { memoryMode, randomStartSpace, name });
 
         const roomId = Math.random().toString(36).substring(2, 10);
@@ -105,11 +226,12 @@ io.on('connection', (socket) => {
             console.log(`Random start space selected: ${startSpaceId}`);
         }
 
-        const grid = generateGrid(startSpaceId);
+        const grid = await generateGrid(startSpaceId);
 
         rooms[roomId] = {
             players: [{ id: playerId, name, gold: 1, items: [], position: startSpaceId, hasMoved: false }],
             grid,
+            history: [],
             state: {
                 players: [{ id: playerId, name, gold: 1, items: [], position: startSpaceId, hasMoved: false }],
                 currentPlayer: null,
@@ -135,7 +257,7 @@ io.on('connection', (socket) => {
         socket.join(roomId);
         socket.playerId = playerId;
         socket.roomId = roomId;
-        console.log(`Room created: ${roomId}, Player: ${name} (${playerId}), Memory Mode: ${memoryMode}, Random Start: ${randomStartSpace}`);
+        console.log(`Room created: ${roomId}, Player: ${name} (${playerId}), Memory Mode: ${memoryMode}, Random Start: ${randomStartSpace}, Grid Seed: ${grid.seed}`);
         callback({ roomId, playerId, memoryMode, randomStartSpace });
         socket.emit('assignPlayerId', { playerId });
         socket.emit('state', rooms[roomId].state);
@@ -202,6 +324,7 @@ io.on('connection', (socket) => {
             rooms[roomId].state.turnOrder.sort(() => Math.random() - 0.5);
             rooms[roomId].state.currentPlayer = rooms[roomId].state.turnOrder[0];
             rooms[roomId].state.initComplete = true;
+            recordPositions(rooms[roomId]);
             io.to(roomId).emit('initComplete', {
                 turnOrder: rooms[roomId].state.turnOrder,
                 currentPlayer: rooms[roomId].state.currentPlayer
@@ -226,7 +349,7 @@ io.on('connection', (socket) => {
             socket.leave(roomId);
             if (rooms[roomId].players.length === 0) {
                 console.log(`Room ${roomId} is empty, deleting room`);
-                delete rooms[roomId];
+                deleteRoom(roomId);
             } else {
                 // Update turn order if necessary
                 if (rooms[roomId].state.turnOrder.includes(socket.playerId)) {
@@ -276,6 +399,9 @@ io.on('connection', (socket) => {
             ...newState,
             players: rooms[roomId].state.players // Use the merged players array
         };
+        if (rooms[roomId].state.initComplete) {
+            recordPositions(rooms[roomId]);
+        }
 
         console.log(`Received state update for room ${roomId}, new currentPlayer: ${rooms[roomId].state.currentPlayer}, player positions: ${rooms[roomId].state.players.map(p => `${p.name}: ${p.position}`).join(', ')}, hasMoved: ${rooms[roomId].state.players.map(p => `${p.name}: ${p.hasMoved}`).join(', ')}`);
         io.to(roomId).emit('state', rooms[roomId].state);
@@ -371,7 +497,7 @@ io.on('connection', (socket) => {
 
                         if (allDisconnected) {
                             console.log(`Room ${socket.roomId} has been abandoned, deleting`);
-                            delete rooms[socket.roomId];
+                            deleteRoom(socket.roomId);
                         }
                     }
                 }, 300000); // 5 minutes